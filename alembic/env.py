@@ -9,6 +9,7 @@ from alembic import context
 
 from src.core.config import get_settings
 from src.models.base import Base
+from src.models import outbox  # noqa: F401  (register tables on Base.metadata)
 
 # this is the Alembic Config object
 config = context.config
@@ -20,17 +21,26 @@ if config.config_file_name is not None:
 # Add your model's MetaData object here for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Tables created by migrations that have no model on Base.metadata
+UNMODELED_TABLES = {"kombu_pgqueue"}
+
 # Get database URL from settings
 settings = get_settings()
 config.set_main_option('sqlalchemy.url', settings.database_url)
 
 
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Leave unmodeled tables out of autogenerate comparisons."""
+    return not (type_ == "table" and name in UNMODELED_TABLES)
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -41,7 +51,11 @@ def run_migrations_offline() -> None:
 
 def do_run_migrations(connection: Connection) -> None:
     """Run migrations with connection."""
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
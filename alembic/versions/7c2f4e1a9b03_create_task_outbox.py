@@ -0,0 +1,62 @@
+"""create task_outbox
+
+Revision ID: 7c2f4e1a9b03
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "7c2f4e1a9b03"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.create_table(
+        "task_outbox",
+        sa.Column(
+            "id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            autoincrement=True,
+            nullable=False,
+        ),
+        sa.Column("task_id", sa.String(length=36), nullable=False),
+        sa.Column("task_name", sa.String(length=255), nullable=False),
+        sa.Column("queue", sa.String(length=100), nullable=False),
+        sa.Column("priority", sa.SmallInteger(), nullable=False),
+        sa.Column("args", sa.JSON(), nullable=False),
+        sa.Column("kwargs", sa.JSON(), nullable=False),
+        sa.Column("headers", sa.JSON(), nullable=False),
+        sa.Column("published_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("dead_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_task_outbox_task_id"), "task_outbox", ["task_id"], unique=False
+    )
+    op.create_index(
+        "ix_task_outbox_pending",
+        "task_outbox",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("published_at IS NULL AND dead_at IS NULL"),
+        sqlite_where=sa.text("published_at IS NULL AND dead_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index("ix_task_outbox_pending", table_name="task_outbox")
+    op.drop_index(op.f("ix_task_outbox_task_id"), table_name="task_outbox")
+    op.drop_table("task_outbox")
@@ -0,0 +1,54 @@
+"""create kombu_pgqueue
+
+Revision ID: b81d3c5e2f47
+Revises: 7c2f4e1a9b03
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b81d3c5e2f47"
+down_revision = "7c2f4e1a9b03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Message table of the Postgres broker transport (src/worker/pg_transport.py)
+    op.create_table(
+        "kombu_pgqueue",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("queue", sa.Text(), nullable=False),
+        sa.Column("priority", sa.SmallInteger(), server_default="0", nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column(
+            "visible_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("deliveries", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_kombu_pgqueue_dequeue",
+        "kombu_pgqueue",
+        ["queue", sa.text("priority DESC"), "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index("ix_kombu_pgqueue_dequeue", table_name="kombu_pgqueue")
+    op.drop_table("kombu_pgqueue")
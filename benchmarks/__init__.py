@@ -0,0 +1 @@
+"""Performance benchmarks and simulations."""
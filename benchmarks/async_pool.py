@@ -0,0 +1,132 @@
+"""Tasks per second per worker process for an I/O-heavy task mix.
+
+Runs ``execute_task`` through the worker's own handler path, with lease,
+statistics and retry bookkeeping, on the in-process stand-ins:
+
+- prefork: one process runs a blocking handler per task, back to back, as
+  a prefork child does.
+- async: ``--threads`` pool threads run an ``async`` handler per task,
+  which ``_call_handler`` submits to the process's ``AsyncExecutor``, as
+  the ``--pool=threads`` I/O worker does. ``ASYNC_POOL_CONCURRENCY``
+  bounds the coroutines in flight.
+
+I/O is simulated with sleeps whose durations stand in for HTTP calls, DB
+reads and notifications.
+
+Run with ``python -m benchmarks.async_pool``.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .harness import save_results, summarize
+from .standins import configure_environment, fake_redis
+
+configure_environment()
+
+from src.core.config import get_settings  # noqa: E402
+from src.worker.async_pool import get_async_executor  # noqa: E402
+from src.worker.handlers import register_handler  # noqa: E402
+from src.worker.tasks import execute_task  # noqa: E402
+
+BLOCKING_TASK_TYPE = "benchmark_blocking_io"
+ASYNC_TASK_TYPE = "benchmark_async_io"
+
+# (kind, simulated I/O wait in seconds, share of the mix)
+IO_MIX = (
+    ("http_call", 0.050, 0.6),
+    ("db_read", 0.010, 0.3),
+    ("notification", 0.100, 0.1),
+)
+
+
+@register_handler(BLOCKING_TASK_TYPE)
+def blocking_io(parameters: Dict[str, Any]) -> None:
+    time.sleep(parameters["io_wait"])
+
+
+@register_handler(ASYNC_TASK_TYPE)
+async def async_io(parameters: Dict[str, Any]) -> None:
+    await asyncio.sleep(parameters["io_wait"])
+
+
+def make_workload(tasks: int, seed: int) -> List[float]:
+    """Draw I/O waits for ``tasks`` tasks from the mix."""
+    rng = random.Random(seed)
+    waits = [wait for _, wait, _ in IO_MIX]
+    weights = [share for _, _, share in IO_MIX]
+    return rng.choices(waits, weights=weights, k=tasks)
+
+
+def execute(task_type: str, wait: float) -> float:
+    """Run one task through the worker's task function, returning its latency."""
+    task_start = time.perf_counter()
+    execute_task.apply(
+        args=[str(uuid.uuid4()), task_type, {"io_wait": wait}], throw=True
+    )
+    return time.perf_counter() - task_start
+
+
+def measure(latencies: List[float], elapsed: float) -> Dict[str, Any]:
+    return {
+        "tasks_per_second": len(latencies) / elapsed,
+        "latency": summarize(latencies),
+    }
+
+
+def run_prefork(workload: List[float]) -> Dict[str, Any]:
+    """One prefork child: blocking handlers run back to back."""
+    start = time.perf_counter()
+    latencies = [execute(BLOCKING_TASK_TYPE, wait) for wait in workload]
+    return measure(latencies, time.perf_counter() - start)
+
+
+def run_async(workload: List[float], threads: int) -> Dict[str, Any]:
+    """One thread-pool process: handlers share the process event loop."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(partial(execute, ASYNC_TASK_TYPE), workload))
+    return measure(latencies, time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--prefork-tasks", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with fake_redis():
+        results = {
+            "prefork": run_prefork(make_workload(args.prefork_tasks, args.seed)),
+            "async": run_async(make_workload(args.tasks, args.seed), args.threads),
+        }
+        get_async_executor().shutdown()
+
+    for mode, result in results.items():
+        print(
+            f"{mode:<8} {result['tasks_per_second']:>8.1f} tasks/s per process  "
+            f"p50 {result['latency']['p50'] * 1000:6.1f} ms  "
+            f"p99 {result['latency']['p99'] * 1000:6.1f} ms"
+        )
+
+    config = {**vars(args), "concurrency": get_settings().async_pool_concurrency}
+    path = save_results(
+        "async_pool",
+        {**results, "config": config},
+        output=Path(args.output) if args.output else None,
+    )
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare two benchmark result files and flag regressions.
+
+Run with ``python -m benchmarks.compare BASELINE.json CANDIDATE.json``.
+Exits non-zero when any metric regressed by more than ``--threshold``.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+# Metrics where a larger value is an improvement; everything else is a
+# latency or cost where larger is worse.
+HIGHER_IS_BETTER = ("throughput", "hit_rate", "tasks_per_second")
+SKIPPED_KEYS = {"config", "timestamp", "count"}
+
+
+def flatten(data: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield dotted paths of every numeric leaf."""
+    for key, value in data.items():
+        if key in SKIPPED_KEYS:
+            continue
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, float(value)
+
+
+def compare(
+    baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float
+) -> bool:
+    """Print metric deltas and return True if no metric regressed."""
+    old = dict(flatten(baseline))
+    new = dict(flatten(candidate))
+    ok = True
+
+    print(f"{baseline.get('revision')} -> {candidate.get('revision')}")
+    for path in sorted(old.keys() & new.keys()):
+        before, after = old[path], new[path]
+        if before == 0:
+            continue
+        change = (after - before) / abs(before)
+        higher_is_better = any(marker in path for marker in HIGHER_IS_BETTER)
+        regressed = -change > threshold if higher_is_better else change > threshold
+        ok = ok and not regressed
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{path:<40} {before:>12.4f} {after:>12.4f} {change:>+8.1%}{marker}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    ok = compare(
+        json.loads(args.baseline.read_text()),
+        json.loads(args.candidate.read_text()),
+        args.threshold,
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
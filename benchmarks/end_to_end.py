@@ -0,0 +1,180 @@
+"""End-to-end throughput benchmark: outbox -> relay -> broker -> worker -> result.
+
+Tasks are submitted the way task creation does it: each is staged in the
+transactional outbox in its own transaction, and the ``OutboxRelay``
+publishes committed rows in batches through ``src.worker.celery_app``.
+A real Celery worker runs ``src.worker.tasks`` (retry engine included) and
+results are read back from the result backend. Postgres, Redis, the broker
+and the result backend are in-process stand-ins, so the numbers measure
+the application's own overhead rather than the network.
+
+Run with ``python -m benchmarks.end_to_end [--tasks N] [--output PATH]``.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from .harness import save_results, summarize
+from .standins import (
+    POLLING_INTERVAL,
+    celery_worker,
+    configure_environment,
+    create_sqlite_engine,
+    fake_redis,
+)
+
+configure_environment()
+
+from src.services.outbox import (  # noqa: E402
+    OutboxRelay,
+    add_task_message,
+    make_celery_batch_publisher,
+)
+from src.worker.celery_app import celery_app  # noqa: E402
+from src.worker.handlers import register_handler  # noqa: E402
+
+BENCHMARK_TASK_TYPE = "benchmark_work"
+
+
+@register_handler(BENCHMARK_TASK_TYPE)
+def benchmark_work(parameters: Dict[str, Any]) -> Dict[str, float]:
+    """Busy-loop for the requested amount of time and report stage stamps."""
+    started_at = time.time()
+    deadline = time.perf_counter() + parameters.get("work_seconds", 0.0)
+    while time.perf_counter() < deadline:
+        pass
+    return {"started_at": started_at, "finished_at": time.time()}
+
+
+def make_task(priority: str, work_seconds: float) -> SimpleNamespace:
+    """Task-like object carrying the fields the outbox reads."""
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        task_type=BENCHMARK_TASK_TYPE,
+        parameters={"work_seconds": work_seconds},
+        priority=SimpleNamespace(name=priority),
+        created_by=None,
+    )
+
+
+async def run(
+    tasks: int, work_seconds: float, high_priority_ratio: float, batch_size: int
+) -> Dict[str, Any]:
+    """Submit ``tasks`` tasks and measure each stage of their lifecycle.
+
+    A task's publish stage is its outbox commit, after which task creation
+    would return; the relay runs after every ``batch_size`` staged tasks,
+    and its delay counts towards the queue wait.
+    """
+    engine = await create_sqlite_engine()
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    relay = OutboxRelay(
+        session_factory, make_celery_batch_publisher(celery_app), batch_size=batch_size
+    )
+    submitted: List[Dict[str, Any]] = []
+    high_priority_every = int(1 / high_priority_ratio) if high_priority_ratio else 0
+
+    submit_start = time.time()
+    for i in range(tasks):
+        urgent = high_priority_every and i % high_priority_every == 0
+        task = make_task("URGENT" if urgent else "NORMAL", work_seconds)
+        staged_at = time.time()
+        async with session_factory() as session:
+            async with session.begin():
+                add_task_message(session, task)
+        submitted.append(
+            {
+                "task_id": str(task.id),
+                "submit_start": staged_at,
+                "submit_end": time.time(),
+            }
+        )
+        if (i + 1) % batch_size == 0:
+            await relay.relay_batch()
+    while await relay.relay_batch():
+        pass
+    submit_duration = time.time() - submit_start
+    await engine.dispose()
+
+    stages: Dict[str, List[float]] = {
+        "publish": [],
+        "queue_wait": [],
+        "execute": [],
+        "result_fetch": [],
+    }
+    end_to_end: List[float] = []
+    for item in submitted:
+        fetch_start = time.time()
+        stamps = celery_app.AsyncResult(item["task_id"]).get(
+            timeout=120, interval=POLLING_INTERVAL
+        )
+        fetch_end = time.time()
+
+        stages["publish"].append(item["submit_end"] - item["submit_start"])
+        stages["queue_wait"].append(stamps["started_at"] - item["submit_end"])
+        stages["execute"].append(stamps["finished_at"] - stamps["started_at"])
+        # Results are collected in submit order, so only the wait past the
+        # handler finishing counts as result retrieval.
+        stages["result_fetch"].append(
+            max(0.0, fetch_end - max(fetch_start, stamps["finished_at"]))
+        )
+        end_to_end.append(stamps["finished_at"] - item["submit_start"])
+    total_duration = time.time() - submit_start
+
+    return {
+        "submit_throughput": tasks / submit_duration,
+        "completed_throughput": tasks / total_duration,
+        "end_to_end": summarize(end_to_end),
+        "stages": {name: summarize(values) for name, values in stages.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--work-seconds", type=float, default=0.0)
+    parser.add_argument("--high-priority-ratio", type=float, default=0.1)
+    parser.add_argument("--relay-batch-size", type=int, default=50)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with fake_redis(), celery_worker():
+        results = asyncio.run(
+            run(
+                args.tasks,
+                args.work_seconds,
+                args.high_priority_ratio,
+                args.relay_batch_size,
+            )
+        )
+
+    results["config"] = vars(args)
+    path = save_results(
+        "end_to_end", results, output=Path(args.output) if args.output else None
+    )
+
+    print(f"submit throughput:    {results['submit_throughput']:.0f} tasks/s")
+    print(f"completed throughput: {results['completed_throughput']:.0f} tasks/s")
+    e2e = results["end_to_end"]
+    print(
+        f"end-to-end latency:   p50 {e2e['p50'] * 1000:.2f} ms, "
+        f"p99 {e2e['p99'] * 1000:.2f} ms"
+    )
+    for name, summary in results["stages"].items():
+        print(
+            f"  {name:<13} p50 {summary['p50'] * 1000:8.2f} ms  "
+            f"p99 {summary['p99'] * 1000:8.2f} ms"
+        )
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
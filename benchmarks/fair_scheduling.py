@@ -0,0 +1,117 @@
+"""Simulation of tenant tail latency under FIFO and deficit round robin dispatch.
+
+A heavy tenant submits ``--ratio`` times more work than a light tenant into
+a worker pool that is slightly over capacity. The same arrival trace is
+replayed against a shared FIFO queue and against the ``DeficitRoundRobin``
+selector used by the fair dispatcher, and end-to-end latency percentiles
+are reported per tenant.
+
+Run with ``python -m benchmarks.fair_scheduling``.
+"""
+
+import argparse
+import heapq
+import random
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Tuple
+
+from src.services.fair_scheduler import DeficitRoundRobin
+
+from .harness import save_results, summarize
+
+HEAVY = "data_team"
+LIGHT = "ml_team"
+
+
+def make_arrivals(
+    light_tasks: int, ratio: int, duration: float, seed: int
+) -> List[Tuple[float, str]]:
+    """Uniformly spread arrivals for both tenants over ``duration`` seconds."""
+    rng = random.Random(seed)
+    arrivals = [(rng.uniform(0, duration), LIGHT) for _ in range(light_tasks)]
+    arrivals += [(rng.uniform(0, duration), HEAVY) for _ in range(light_tasks * ratio)]
+    return sorted(arrivals)
+
+
+def simulate(
+    policy: str,
+    arrivals: List[Tuple[float, str]],
+    workers: int,
+    service_time: float,
+) -> Dict[str, List[float]]:
+    """Replay arrivals through a worker pool, returning latencies per tenant."""
+    events: List[Tuple[float, int, str]] = []
+    for seq, (arrived, tenant) in enumerate(arrivals):
+        heapq.heappush(events, (arrived, seq, tenant))
+
+    queues: Dict[str, Deque[float]] = {HEAVY: deque(), LIGHT: deque()}
+    fifo: Deque[Tuple[str, float]] = deque()
+    drr = DeficitRoundRobin()
+    latencies: Dict[str, List[float]] = {HEAVY: [], LIGHT: []}
+    free_workers = workers
+    seq = len(arrivals)
+
+    while events:
+        now, _, tenant = heapq.heappop(events)
+        if tenant == "":
+            free_workers += 1
+        elif policy == "fifo":
+            fifo.append((tenant, now))
+        else:
+            queues[tenant].append(now)
+
+        while free_workers:
+            if policy == "fifo":
+                if not fifo:
+                    break
+                chosen, arrived = fifo.popleft()
+            else:
+                chosen = drr.select({name: len(q) for name, q in queues.items()})
+                if chosen is None:
+                    break
+                arrived = queues[chosen].popleft()
+
+            latencies[chosen].append(now + service_time - arrived)
+            free_workers -= 1
+            seq += 1
+            heapq.heappush(events, (now + service_time, seq, ""))
+
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--light-tasks", type=int, default=100)
+    parser.add_argument("--ratio", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=100.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--service-time", type=float, default=0.08)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    arrivals = make_arrivals(args.light_tasks, args.ratio, args.duration, args.seed)
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    print(f"{'policy':<6} {'tenant':<10} {'tasks':>6} {'p50 (s)':>9} {'p99 (s)':>9}")
+    for policy in ("fifo", "drr"):
+        latencies = simulate(policy, arrivals, args.workers, args.service_time)
+        results[policy] = {
+            tenant: summarize(latencies[tenant]) for tenant in (LIGHT, HEAVY)
+        }
+        for tenant, summary in results[policy].items():
+            print(
+                f"{policy:<6} {tenant:<10} {summary['count']:>6} "
+                f"{summary['p50']:>9.3f} {summary['p99']:>9.3f}"
+            )
+
+    path = save_results(
+        "fair_scheduling",
+        {"latency": results, "config": vars(args)},
+        output=Path(args.output) if args.output else None,
+    )
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Shared helpers for summarizing and persisting benchmark results."""
+
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Summarize a latency sample in seconds."""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def git_revision() -> str:
+    """Get the short hash of the checked-out commit, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(
+    name: str,
+    results: Dict[str, Any],
+    output: Optional[Path] = None,
+) -> Path:
+    """Write results as JSON tagged with the commit they were measured on.
+
+    Defaults to ``benchmarks/results/<name>-<revision>.json`` so runs on
+    different commits can be diffed with ``benchmarks.compare``.
+    """
+    revision = git_revision()
+    payload = {
+        "benchmark": name,
+        "revision": revision,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        **results,
+    }
+    path = output or RESULTS_DIR / f"{name}-{revision}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True))
+    return path
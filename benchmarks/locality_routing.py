@@ -0,0 +1,222 @@
+"""Simulation of data reads and latency with and without locality routing.
+
+Tasks read one dataset each, chosen with Zipf popularity, on a pool of
+hosts that each keep their most recently read datasets in a small LRU
+cache. Reading a dataset that is not cached costs ``--read-time`` on top
+of the task's compute time. The same arrival trace is replayed against a
+shared queue, where any free slot takes the next task, and against the
+``LocalityRouter`` used by the publishers, with its delay-scheduling
+fallback and claims running on an in-memory Redis.
+
+Run with ``python -m benchmarks.locality_routing``.
+"""
+
+import argparse
+import heapq
+import random
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import fakeredis
+
+from src.services.locality import (
+    LOCAL,
+    SHARED,
+    LocalityRouter,
+    WarmDataRegistry,
+    locality_queue,
+)
+
+from .harness import save_results, summarize
+
+QUEUE = "default"
+ARRIVE = 0
+FINISH = 1
+FALLBACK = 2
+
+
+def make_arrivals(
+    tasks: int, rate: float, datasets: int, skew: float, seed: int
+) -> List[Tuple[float, str]]:
+    """Poisson arrivals, each reading a Zipf-distributed dataset."""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank**skew) for rank in range(1, datasets + 1)]
+    names = [f"/data/set-{rank}.parquet" for rank in range(1, datasets + 1)]
+    chosen = rng.choices(names, weights=weights, k=tasks)
+    now = 0.0
+    arrivals = []
+    for dataset in chosen:
+        now += rng.expovariate(rate)
+        arrivals.append((now, dataset))
+    return arrivals
+
+
+def simulate(
+    policy: str, arrivals: List[Tuple[float, str]], args: argparse.Namespace
+) -> Dict[str, Any]:
+    """Replay arrivals through the host pool under one routing policy."""
+    hosts = [f"host-{index}" for index in range(args.hosts)]
+    caches: Dict[str, "OrderedDict[str, None]"] = {
+        host: OrderedDict() for host in hosts
+    }
+    free = {host: args.slots for host in hosts}
+    # Queued copies as (task id, locality token)
+    shared: Deque[Tuple[str, Optional[str]]] = deque()
+    local: Dict[str, Deque[Tuple[str, str]]] = {host: deque() for host in hosts}
+
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    registry = WarmDataRegistry(redis_client, ttl=args.warm_ttl)
+    router = LocalityRouter(
+        redis_client,
+        registry,
+        ["data_source"],
+        wait=args.wait,
+        max_backlog=args.max_backlog,
+    )
+    for host in hosts:
+        registry.advertise(host, [], [QUEUE], now=0.0)
+
+    arrived_at: Dict[str, float] = {}
+    datasets: Dict[str, str] = {}
+    latencies: List[float] = []
+    cold_reads = 0
+    local_runs = 0
+    fallbacks = 0
+
+    events: List[Tuple[float, int, int, Any]] = []
+    seq = 0
+    for arrived, dataset in arrivals:
+        heapq.heappush(events, (arrived, seq, ARRIVE, dataset))
+        seq += 1
+    if policy == "locality":
+        heapq.heappush(events, (args.fallback_interval, seq, FALLBACK, None))
+        seq += 1
+
+    def start(host: str, task_id: str, now: float) -> None:
+        nonlocal seq, cold_reads
+        dataset = datasets[task_id]
+        cache = caches[host]
+        duration = args.compute_time
+        if dataset in cache:
+            cache.move_to_end(dataset)
+        else:
+            cold_reads += 1
+            duration += args.read_time
+            cache[dataset] = None
+            if len(cache) > args.cache_size:
+                cache.popitem(last=False)
+        free[host] -= 1
+        heapq.heappush(events, (now + duration, seq, FINISH, (host, task_id)))
+        seq += 1
+
+    def next_task(host: str) -> Tuple[str, str, Optional[str]]:
+        # A host's own queue first, then the shared queue
+        if local[host]:
+            return (*local[host].popleft(), LOCAL)
+        return (*shared.popleft(), SHARED)
+
+    def dispatch(now: float) -> None:
+        nonlocal local_runs
+        for host in hosts:
+            while free[host] and (local[host] or shared):
+                task_id, token, copy = next_task(host)
+                if policy == "locality" and not router.claim(
+                    task_id, copy, QUEUE, locality_queue(QUEUE, host), token=token
+                ):
+                    # The other copy already ran
+                    continue
+                local_runs += copy == LOCAL
+                start(host, task_id, now)
+
+    while events:
+        now, _, kind, payload = heapq.heappop(events)
+        if kind == ARRIVE:
+            task_id = f"task-{len(arrived_at)}"
+            arrived_at[task_id] = now
+            datasets[task_id] = payload
+            if policy == "shared":
+                shared.append((task_id, None))
+            else:
+                route = router.route(QUEUE, {"data_source": payload}, now=now)
+                message = {"args": [task_id], "queue": QUEUE}
+                router.dispatched(task_id, route, message, now=now)
+                if route.host is None:
+                    shared.append((task_id, None))
+                else:
+                    local[route.host].append((task_id, route.headers["locality_token"]))
+        elif kind == FINISH:
+            host, task_id = payload
+            free[host] += 1
+            latencies.append(now - arrived_at[task_id])
+            if policy == "locality":
+                registry.advertise(
+                    host, [f"data_source={datasets[task_id]}"], [QUEUE], now=now
+                )
+        else:
+            fallbacks += router.fallback(
+                lambda message: shared.append(
+                    (message["args"][0], message["headers"]["locality_token"])
+                ),
+                now=now,
+            )
+            if len(latencies) < len(arrivals):
+                heapq.heappush(
+                    events, (now + args.fallback_interval, seq, FALLBACK, None)
+                )
+                seq += 1
+        dispatch(now)
+
+    return {
+        "latency": summarize(latencies),
+        "cold_reads": cold_reads,
+        "bytes_read_per_task": cold_reads * args.dataset_bytes / len(latencies),
+        "local_fraction": local_runs / len(latencies),
+        "fallbacks": fallbacks,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--hosts", type=int, default=8)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--datasets", type=int, default=200)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--cache-size", type=int, default=10)
+    parser.add_argument("--compute-time", type=float, default=1.0)
+    parser.add_argument("--read-time", type=float, default=2.0)
+    parser.add_argument("--dataset-bytes", type=int, default=512 * 1024 * 1024)
+    parser.add_argument("--rate", type=float, default=6.0)
+    parser.add_argument("--wait", type=float, default=5.0)
+    parser.add_argument("--max-backlog", type=int, default=4)
+    parser.add_argument("--warm-ttl", type=int, default=1800)
+    parser.add_argument("--fallback-interval", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    arrivals = make_arrivals(args.tasks, args.rate, args.datasets, args.skew, args.seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    print(
+        f"{'policy':<9} {'MiB/task':>9} {'local':>6} {'fallbacks':>9} "
+        f"{'p50 (s)':>9} {'p99 (s)':>9}"
+    )
+    for policy in ("shared", "locality"):
+        results[policy] = result = simulate(policy, arrivals, args)
+        print(
+            f"{policy:<9} {result['bytes_read_per_task'] / 2**20:>9.1f} "
+            f"{result['local_fraction']:>6.1%} {result['fallbacks']:>9} "
+            f"{result['latency']['p50']:>9.3f} {result['latency']['p99']:>9.3f}"
+        )
+
+    path = save_results(
+        "locality_routing",
+        {"policies": results, "config": vars(args)},
+        output=Path(args.output) if args.output else None,
+    )
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""In-process stand-ins for Redis, Postgres and the Celery broker.
+
+``configure_environment`` must run before anything under ``src`` is
+imported: ``src.worker.celery_app`` reads the broker URLs from settings at
+import time.
+"""
+
+import os
+from contextlib import ExitStack, contextmanager
+from typing import Iterator
+from unittest import mock
+
+import fakeredis
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+IN_MEMORY_BROKER_URL = "memory://"
+IN_MEMORY_RESULT_BACKEND = "cache+memory://"
+# The virtual transports sleep this long after an empty poll (default 1s)
+POLLING_INTERVAL = 0.001
+
+
+def configure_environment() -> None:
+    """Point Celery at the in-memory transport and result backend."""
+    os.environ["CELERY_BROKER_URL"] = IN_MEMORY_BROKER_URL
+    os.environ["CELERY_RESULT_BACKEND"] = IN_MEMORY_RESULT_BACKEND
+    os.environ.setdefault("ENVIRONMENT", "testing")
+
+
+@contextmanager
+def fake_redis() -> Iterator[fakeredis.FakeServer]:
+    """Route every Redis client created by the app to one in-memory server."""
+    server = fakeredis.FakeServer()
+
+    def sync_from_url(url, **kwargs):
+        return fakeredis.FakeRedis(
+            server=server, decode_responses=kwargs.get("decode_responses", False)
+        )
+
+    def async_from_url(url, **kwargs):
+        return fakeredis.FakeAsyncRedis(
+            server=server, decode_responses=kwargs.get("decode_responses", False)
+        )
+
+    from src.core import redis_client
+
+    redis_client.get_redis_client.cache_clear()
+    redis_client.get_async_redis_client.cache_clear()
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(redis.Redis, "from_url", sync_from_url))
+        stack.enter_context(
+            mock.patch.object(aioredis.Redis, "from_url", async_from_url)
+        )
+        yield server
+    redis_client.get_redis_client.cache_clear()
+    redis_client.get_async_redis_client.cache_clear()
+
+
+async def create_sqlite_engine() -> AsyncEngine:
+    """Create an in-memory SQLite engine with every model table created."""
+    from src.models.base import Base
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+@contextmanager
+def celery_worker() -> Iterator[None]:
+    """Run a real Celery worker on the in-memory transport in a thread.
+
+    The worker uses the solo pool: with the in-memory transport the worker
+    runs its synchronous consume loop, which only tops up prefetch every
+    two seconds, so pools with several slots stall between batches.
+    """
+    from celery.contrib.testing.worker import start_worker
+
+    from src.worker.celery_app import celery_app
+
+    celery_app.conf.broker_transport_options = {"polling_interval": POLLING_INTERVAL}
+    with start_worker(
+        celery_app,
+        pool="solo",
+        perform_ping_check=False,
+        queues=["default", "high_priority", "io"],
+    ):
+        yield
@@ -0,0 +1,224 @@
+"""Streaming gzip/brotli compression of large JSON responses.
+
+Bodies are compressed chunk by chunk as the app sends them; at most
+``minimum_size`` bytes are held back to decide whether a response of
+unknown length is worth compressing. Brotli is used when the client
+accepts it and the optional ``brotli`` package is installed.
+
+Usage::
+
+    app.add_middleware(CompressionMiddleware)
+"""
+
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ...core.config import get_settings
+from ...core.metrics import http_compression_bytes_saved_total
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = ("application/json",)
+SKIP_STATUSES = {204, 206, 304}
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each accepted content-coding to its quality value."""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(
+    header: str, brotli_available: bool = brotli is not None
+) -> Optional[str]:
+    """Pick brotli or gzip from an ``Accept-Encoding`` header.
+
+    Brotli wins ties since it compresses JSON noticeably better.
+    """
+    accepted = parse_accept_encoding(header)
+
+    def quality(coding: str) -> float:
+        return accepted.get(coding, accepted.get("*", 0.0))
+
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    best = max(candidates, key=quality)
+    return best if quality(best) > 0 else None
+
+
+class _Compressor:
+    """Uniform incremental interface over zlib and brotli."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class _CompressingResponder:
+    """Wraps ``send`` for one response, compressing it if it qualifies."""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        minimum_size: int,
+        content_types: Sequence[str],
+        gzip_level: int,
+        brotli_quality: int,
+    ):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.start: Optional[Message] = None
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+
+    def _eligible(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        if message["status"] in SKIP_STATUSES or "content-encoding" in headers:
+            return False
+        if content_type not in self.content_types:
+            return False
+        content_length = headers.get("content-length")
+        return content_length is None or int(content_length) >= self.minimum_size
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            if content_type in self.content_types:
+                MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+            if self._eligible(message):
+                self.start = message
+            else:
+                self.passthrough = True
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            self.pending.append(body)
+            self.pending_size += len(body)
+            if more_body and self.pending_size < self.minimum_size:
+                return
+            if self.pending_size < self.minimum_size:
+                # Whole body turned out small: send it as is
+                await self.send(self.start)
+                await self.send(
+                    {"type": "http.response.body", "body": b"".join(self.pending)}
+                )
+                return
+            await self._begin()
+            body = b"".join(self.pending)
+            self.pending = []
+
+        self.raw_bytes += len(body)
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        self.sent_bytes += len(chunk)
+        if chunk or not more_body:
+            await self.send(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
+        if not more_body:
+            http_compression_bytes_saved_total.labels(encoding=self.encoding).inc(
+                max(0, self.raw_bytes - self.sent_bytes)
+            )
+
+    async def _begin(self) -> None:
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        del headers["Content-Length"]
+        self.compressor = _Compressor(
+            self.encoding, self.gzip_level, self.brotli_quality
+        )
+        await self.send(self.start)
+
+
+class CompressionMiddleware:
+    """Compresses JSON responses above a size threshold."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        content_types: Sequence[str] = DEFAULT_CONTENT_TYPES,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.app = app
+        if minimum_size is None:
+            minimum_size = settings.http_compression_min_bytes
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.gzip_level = settings.http_gzip_level if gzip_level is None else gzip_level
+        self.brotli_quality = (
+            settings.http_brotli_quality if brotli_quality is None else brotli_quality
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(
+            send,
+            encoding,
+            self.minimum_size,
+            self.content_types,
+            self.gzip_level,
+            self.brotli_quality,
+        )
+        await self.app(scope, receive, responder)
@@ -0,0 +1,169 @@
+"""ETag validation for task endpoints, answered from Redis.
+
+The ETag of a task response is derived from the app version, the request
+URL and the task's change marker in Redis (see
+``src.services.resource_versions``), so a matching ``If-None-Match`` is
+answered with ``304 Not Modified`` before the request reaches a route or
+the database. Statistics responses cover a time window that moves on
+without any task changing, so their ETag also includes the current
+statistics bucket.
+
+Usage::
+
+    app.add_middleware(ETagMiddleware)
+"""
+
+import hashlib
+import re
+import time
+from typing import List, Optional, Pattern, Sequence, Tuple
+
+import redis.asyncio as aioredis
+import structlog
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ...core.config import get_settings
+from ...core.metrics import http_conditional_requests_total
+from ...core.redis_client import get_async_redis_client
+from ...services.resource_versions import (
+    TASKS_RESOURCE,
+    resource_version_key,
+    task_resource,
+)
+
+logger = structlog.get_logger(__name__)
+
+API_PREFIX = r"^(?:/api/v\d+)?"
+
+# (path pattern, resource) pairs; ``{task_id}`` is filled from the match
+DEFAULT_RULES: List[Tuple[Pattern[str], str]] = [
+    (re.compile(API_PREFIX + r"/tasks/?$"), TASKS_RESOURCE),
+    (re.compile(API_PREFIX + r"/tasks/stats/?$"), TASKS_RESOURCE),
+    (re.compile(API_PREFIX + r"/stats/?$"), TASKS_RESOURCE),
+    (
+        re.compile(API_PREFIX + r"/tasks/(?P<task_id>[^/]+)/?$"),
+        task_resource("{task_id}"),
+    ),
+]
+
+# Paths whose responses also change as the statistics window moves
+WINDOWED_PATHS: List[Pattern[str]] = [
+    re.compile(API_PREFIX + r"/tasks/stats/?$"),
+    re.compile(API_PREFIX + r"/stats/?$"),
+]
+
+
+def resolve_resource(
+    path: str, rules: Sequence[Tuple[Pattern[str], str]]
+) -> Optional[str]:
+    """Map a request path to the resource whose version validates it."""
+    for pattern, resource in rules:
+        match = pattern.match(path)
+        if match:
+            return resource.format(**match.groupdict())
+    return None
+
+
+def make_etag(app_version: str, path: str, query: str, version: str) -> str:
+    """Weak ETag for a response; weak so it survives content-encoding."""
+    digest = hashlib.blake2b(
+        f"{app_version}|{path}?{query}|{version}".encode(), digest_size=12
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+class ETagMiddleware:
+    """Adds ETags to task responses and answers revalidations with 304."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        redis_client: Optional[aioredis.Redis] = None,
+        rules: Optional[Sequence[Tuple[Pattern[str], str]]] = None,
+        windowed: Optional[Sequence[Pattern[str]]] = None,
+    ):
+        self.app = app
+        self.redis_client = redis_client
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.windowed = WINDOWED_PATHS if windowed is None else windowed
+        settings = get_settings()
+        self.app_version = settings.version
+        self.bucket_seconds = settings.task_stats_bucket_seconds
+
+    async def _version(self, resource: str) -> Optional[str]:
+        client = self.redis_client or get_async_redis_client()
+        try:
+            return await client.get(resource_version_key(resource))
+        except RedisError as e:
+            # Serve normally without validators rather than fail the request
+            logger.warning(
+                "Resource version unavailable", resource=resource, error=str(e)
+            )
+            return None
+
+    def _window(self, path: str) -> Optional[str]:
+        if not any(pattern.match(path) for pattern in self.windowed):
+            return None
+        return str(int(time.time() // self.bucket_seconds))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        resource = resolve_resource(scope["path"], self.rules)
+        version = await self._version(resource) if resource else None
+        if version is None:
+            await self.app(scope, receive, send)
+            return
+
+        window = self._window(scope["path"])
+        if window is not None:
+            version = f"{version}|{window}"
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        etag = make_etag(self.app_version, scope["path"], query, version)
+        endpoint = resource.split(":", 1)[0]
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            http_conditional_requests_total.labels(
+                endpoint=endpoint, result="not_modified"
+            ).inc()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [
+                        (b"etag", etag.encode()),
+                        (b"cache-control", b"no-cache"),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        http_conditional_requests_total.labels(endpoint=endpoint, result="full").inc()
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = etag
+                # Cacheable, but revalidated on every use
+                headers.setdefault("Cache-Control", "no-cache")
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,74 @@
+"""Dead-letter queue inspection and re-drive endpoints."""
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from ...worker.tasks import get_dead_letter_queue, redrive_dead_letter
+
+router = APIRouter(prefix="/dead-letter", tags=["dead-letter"])
+
+
+class DeadLetterResponse(BaseModel):
+    """A task parked in the dead-letter queue."""
+
+    task_id: str
+    task_type: str
+    parameters: Dict[str, Any]
+    queue: str
+    error: str
+    reason: str
+    retries: int
+    failed_at: float
+
+
+class RedriveRequest(BaseModel):
+    """Selection of dead-lettered tasks to re-drive."""
+
+    task_ids: Optional[List[str]] = None
+    task_type: Optional[str] = None
+    limit: int = Field(100, ge=1, le=1000)
+
+
+class RedriveResponse(BaseModel):
+    """Result of a bulk re-drive."""
+
+    redriven: List[str]
+    count: int
+
+
+# Endpoints are sync: the DLQ uses the blocking Redis client, so FastAPI
+# runs them in its threadpool instead of on the event loop.
+@router.get("", response_model=List[DeadLetterResponse])
+def list_dead_letters(
+    task_type: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+) -> List[DeadLetterResponse]:
+    """List tasks parked in the dead-letter queue."""
+    entries = get_dead_letter_queue().list(
+        task_type=task_type, limit=limit, offset=offset
+    )
+    return [DeadLetterResponse(**entry.__dict__) for entry in entries]
+
+
+@router.get("/{task_id}", response_model=DeadLetterResponse)
+def get_dead_letter(task_id: str) -> DeadLetterResponse:
+    """Get a single dead-lettered task."""
+    entry = get_dead_letter_queue().get(task_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Task not in dead-letter queue")
+    return DeadLetterResponse(**entry.__dict__)
+
+
+@router.post("/redrive", response_model=RedriveResponse)
+def redrive_dead_letters(request: RedriveRequest) -> RedriveResponse:
+    """Re-publish dead-lettered tasks to their original queues."""
+    redriven = get_dead_letter_queue().redrive(
+        redrive_dead_letter,
+        task_ids=request.task_ids,
+        task_type=request.task_type,
+        limit=request.limit,
+    )
+    return RedriveResponse(redriven=redriven, count=len(redriven))
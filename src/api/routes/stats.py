@@ -0,0 +1,37 @@
+"""Task statistics endpoint served from precomputed counters."""
+
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+
+from ...core.config import get_settings
+from ...core.redis_client import get_redis_client
+from ...services.task_stats import create_task_stats, publish_queue_sizes
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+class TaskStatsResponse(BaseModel):
+    """Task counts plus outcome rates and durations over a recent window."""
+
+    by_status: Dict[str, int]
+    by_priority: Dict[str, Dict[str, int]]
+    by_task_type: Dict[str, Dict[str, int]]
+    queue_depths: Dict[str, int]
+    window_seconds: int
+    success_rate_by_tenant: Dict[str, float]
+    duration_p95_by_task_type: Dict[str, Optional[float]]
+
+
+# Sync for the same reason as the dead-letter endpoints: the counters are
+# read with the blocking Redis client.
+@router.get("", response_model=TaskStatsResponse)
+def get_task_stats(
+    window: Optional[int] = Query(None, ge=60, le=7 * 24 * 3600),
+) -> TaskStatsResponse:
+    """Get task statistics without scanning tasks."""
+    window = window or get_settings().task_stats_window
+    snapshot = create_task_stats(get_redis_client()).snapshot(window=window)
+    publish_queue_sizes(snapshot)
+    return TaskStatsResponse(**snapshot)
@@ -2,7 +2,7 @@
 
 import os
 from functools import lru_cache
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from pydantic import BaseSettings, validator
 
@@ -33,6 +33,7 @@ class Settings(BaseSettings):
     # Celery
     celery_broker_url: str = "redis://localhost:6379/1"
     celery_result_backend: str = "redis://localhost:6379/2"
+    celery_broker_backend: str = "redis"
     
     # Security
     secret_key: str = "your-secret-key-change-in-production"
@@ -50,12 +51,109 @@ class Settings(BaseSettings):
     circuit_breaker_failure_threshold: int = 5
     circuit_breaker_timeout: int = 60
     
+    # Retry Policy
+    # Modules registering task handlers, imported by workers and the reaper
+    task_handler_modules: List[str] = []
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 300.0
+    retry_budget_ratio: float = 0.1
+    retry_budget_min_retries: int = 10
+    retry_budget_window: int = 60
+    dead_letter_max_entries: int = 10000
+    
+    # Fair Scheduling
+    fair_scheduling_enabled: bool = False
+    tenant_max_concurrency: int = 20
+    tenant_concurrency_limits: Dict[str, int] = {}
+    tenant_weights: Dict[str, float] = {}
+    fair_dispatch_target_depth: int = 20
+    fair_dispatch_interval: float = 0.1
+    
+    # Result Cache
+    result_cache_dir: str = "/tmp/task-result-cache"
+    result_cache_max_bytes: int = 1024 * 1024 * 1024
+    result_cache_ttl: int = 24 * 3600
+    result_cache_inline_max_bytes: int = 64 * 1024
+    
+    # Async Execution Pool
+    async_pool_concurrency: int = 100
+    async_pool_http_max_connections: int = 100
+    async_pool_http_timeout: float = 30.0
+    async_pool_db_max_size: int = 10
+    async_pool_queue: str = "io"
+    async_pool_task_types: List[str] = []
+    
+    # Outbox Relay
+    outbox_batch_size: int = 500
+    outbox_poll_interval: float = 0.2
+    outbox_retention_hours: int = 24
+    outbox_max_attempts: int = 10
+    outbox_retry_backoff: float = 1.0
+    outbox_retry_backoff_max: float = 300.0
+    
+    # Postgres Queue (CELERY_BROKER_BACKEND=postgres)
+    pg_queue_visibility_timeout: int = 3600
+    pg_queue_batch_size: int = 10
+    pg_queue_poll_interval: float = 1.0
+    
+    # Task Leases
+    task_lease_ttl: int = 60
+    task_lease_heartbeat_interval: float = 10.0
+    task_lease_fence_ttl: int = 3600
+    task_lease_reaper_interval: float = 5.0
+    task_lease_reaper_batch_size: int = 100
+    
+    # HTTP Compression
+    http_compression_min_bytes: int = 1024
+    http_gzip_level: int = 6
+    http_brotli_quality: int = 4
+    
+    # Task Statistics
+    task_stats_bucket_seconds: int = 300
+    task_stats_retention: int = 7 * 24 * 3600
+    task_stats_window: int = 3600
+    task_stats_reconcile_interval: float = 60.0
+    task_stats_stale_after: int = 24 * 3600
+    
+    # Speculative Execution (idempotent task types only)
+    speculation_task_types: List[str] = []
+    speculation_percentile: float = 75.0
+    speculation_multiplier: float = 1.5
+    speculation_min_samples: int = 20
+    speculation_window: int = 3600
+    speculation_max_in_flight: int = 10
+    speculation_max_bounces: int = 3
+    speculation_ttl: int = 24 * 3600
+    speculation_interval: float = 5.0
+    
+    # Locality Routing
+    locality_routing_enabled: bool = False
+    locality_parameter_keys: List[str] = ["data_source", "model_path"]
+    locality_warm_ttl: int = 1800
+    locality_wait: float = 5.0
+    locality_max_backlog: int = 4
+    locality_fallback_interval: float = 0.5
+    
     @validator("database_url")
     def validate_database_url(cls, v: str) -> str:
         if not v.startswith(("postgresql://", "postgresql+asyncpg://")):
             raise ValueError("Invalid database URL format")
         return v
     
+    @validator("celery_broker_backend")
+    def validate_celery_broker_backend(cls, v: str) -> str:
+        allowed = {"redis", "postgres"}
+        if v not in allowed:
+            raise ValueError(f"Celery broker backend must be one of {allowed}")
+        return v
+    
+    @validator("tenant_weights")
+    def validate_tenant_weights(cls, v: Dict[str, float]) -> Dict[str, float]:
+        for tenant, weight in v.items():
+            if weight <= 0:
+                raise ValueError(f"Weight of tenant '{tenant}' must be positive")
+        return v
+    
     @validator("environment")
     def validate_environment(cls, v: str) -> str:
         allowed = {"development", "testing", "staging", "production"}
@@ -0,0 +1,26 @@
+"""Async database engine and session factory."""
+
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from .config import get_settings
+
+
+@lru_cache()
+def get_engine() -> AsyncEngine:
+    """Get cached async engine configured from settings."""
+    settings = get_settings()
+    return create_async_engine(
+        settings.database_url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_pre_ping=True,
+    )
+
+
+@lru_cache()
+def get_session_factory() -> sessionmaker:
+    """Get cached async session factory bound to the engine."""
+    return sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
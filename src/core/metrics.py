@@ -28,6 +28,139 @@ active_workers = Gauge(
     ['worker_type']
 )
 
+task_retries_total = Counter(
+    'task_retries_total',
+    'Retry decisions taken for failed tasks',
+    ['task_type', 'decision']  # retried, max_retries_exceeded, budget_exhausted
+)
+
+dead_letter_total = Counter(
+    'dead_letter_total',
+    'Tasks moved into or re-driven out of the dead-letter queue',
+    ['task_type', 'operation']  # enqueued, redriven
+)
+
+dead_letter_size = Gauge(
+    'dead_letter_size',
+    'Number of tasks currently held in the dead-letter queue'
+)
+
+async_tasks_in_flight = Gauge(
+    'async_tasks_in_flight',
+    'Async task handlers currently running on worker event loops'
+)
+
+tasks_reclaimed_total = Counter(
+    'tasks_reclaimed_total',
+    'Tasks reclaimed from workers whose lease expired',
+    ['task_type', 'outcome']  # requeued, dead_lettered
+)
+
+lease_detection_time = Histogram(
+    'lease_detection_seconds',
+    'Time from a lease\'s last heartbeat to the reaper reclaiming it',
+    buckets=(1.0, 5.0, 10.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, float('inf'))
+)
+
+task_stats_corrections_total = Counter(
+    'task_stats_corrections_total',
+    'Task statistics counters found drifted and rebuilt by reconciliation'
+)
+
+task_stats_expired_total = Counter(
+    'task_stats_expired_total',
+    'Unfinished tasks dropped from the statistics after going stale'
+)
+
+# Speculative execution metrics
+speculative_executions_total = Counter(
+    'speculative_executions_total',
+    'Speculative copies of straggler tasks by result',
+    ['task_type', 'result']
+)
+
+speculative_duplicate_seconds_total = Counter(
+    'speculative_duplicate_seconds_total',
+    'Compute time spent on task attempts that lost a speculative race',
+    ['task_type']
+)
+
+speculative_latency_saved = Histogram(
+    'speculative_latency_saved_seconds',
+    'Estimated remaining run time of stragglers beaten by their copy',
+    ['task_type'],
+    buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0, 1800.0, 3600.0, float('inf'))
+)
+
+# Locality routing metrics
+locality_routing_decisions_total = Counter(
+    'locality_routing_decisions_total',
+    'Routing decisions for new tasks: local, busy, no_holder or no_key',
+    ['queue', 'decision']
+)
+
+locality_claims_total = Counter(
+    'locality_claims_total',
+    'Locality-routed tasks by the copy that ran them: local or shared',
+    ['queue', 'copy']
+)
+
+# Outbox metrics
+outbox_published_total = Counter(
+    'outbox_published_total',
+    'Outbox messages published to the broker',
+    ['queue']
+)
+
+outbox_publish_failures_total = Counter(
+    'outbox_publish_failures_total',
+    'Outbox messages whose publish failed and will be retried',
+    ['queue']
+)
+
+outbox_dead_lettered_total = Counter(
+    'outbox_dead_lettered_total',
+    'Outbox messages given up on after exhausting their publish attempts',
+    ['queue']
+)
+
+outbox_relay_lag = Histogram(
+    'outbox_relay_lag_seconds',
+    'Time between an outbox row being committed and published',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 60.0, float('inf'))
+)
+
+outbox_batch_duration = Histogram(
+    'outbox_batch_duration_seconds',
+    'Time to claim, publish and mark one outbox batch'
+)
+
+# Tenant scheduling metrics
+tenant_queue_depth = Gauge(
+    'tenant_queue_depth',
+    'Number of tasks waiting in a tenant sub-queue',
+    ['queue_name', 'tenant']
+)
+
+tenant_wait_time = Histogram(
+    'tenant_wait_time_seconds',
+    'Time tasks spent in their tenant sub-queue before dispatch',
+    ['queue_name', 'tenant'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, float('inf'))
+)
+
+tenant_tasks_dispatched_total = Counter(
+    'tenant_tasks_dispatched_total',
+    'Tasks released from tenant sub-queues to workers',
+    ['queue_name', 'tenant']
+)
+
+tenant_tasks_throttled_total = Counter(
+    'tenant_tasks_throttled_total',
+    'Dispatch attempts deferred because a tenant was at its concurrency cap',
+    ['queue_name', 'tenant']
+)
+
 # HTTP metrics
 http_requests_total = Counter(
     'http_requests_total',
@@ -41,6 +174,18 @@ http_request_duration = Histogram(
     ['method', 'endpoint']
 )
 
+http_conditional_requests_total = Counter(
+    'http_conditional_requests_total',
+    'GET requests on ETag-validated endpoints',
+    ['endpoint', 'result']  # not_modified, full
+)
+
+http_compression_bytes_saved_total = Counter(
+    'http_compression_bytes_saved_total',
+    'Response bytes saved by compression',
+    ['encoding']
+)
+
 # Database metrics
 db_connections = Gauge(
     'db_connections',
@@ -61,6 +206,12 @@ cache_operations = Counter(
     ['operation', 'result']  # hit, miss, error
 )
 
+result_cache_requests_total = Counter(
+    'result_cache_requests_total',
+    'Task result cache lookups',
+    ['task_type', 'result']  # hit_local, hit_shared, miss_remote, miss
+)
+
 # System info
 system_info = Info(
     'system_info',
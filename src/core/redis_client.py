@@ -0,0 +1,30 @@
+"""Shared Redis client factories."""
+
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from .config import get_settings
+
+
+@lru_cache()
+def get_redis_client() -> redis.Redis:
+    """Get cached synchronous Redis client for worker-side services."""
+    settings = get_settings()
+    return redis.Redis.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        decode_responses=True,
+    )
+
+
+@lru_cache()
+def get_async_redis_client() -> aioredis.Redis:
+    """Get cached asyncio Redis client for API-side services."""
+    settings = get_settings()
+    return aioredis.Redis.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        decode_responses=True,
+    )
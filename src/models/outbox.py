@@ -0,0 +1,58 @@
+"""Transactional outbox of broker messages awaiting publication."""
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    and_,
+)
+
+from .base import BaseModel
+
+
+class OutboxMessage(BaseModel):
+    """A Celery message written in the same transaction as its task row.
+
+    The relay publishes unpublished rows in id order and stamps
+    ``published_at``, so a task is published if and only if its row was
+    committed. A failed publish is retried after ``next_attempt_at``; once
+    the relay gives up, it stamps ``dead_at`` and the row waits for an
+    operator.
+    """
+
+    __tablename__ = "task_outbox"
+
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    task_id = Column(String(36), nullable=False, index=True)
+    task_name = Column(String(255), nullable=False)
+    queue = Column(String(100), nullable=False)
+    priority = Column(SmallInteger, nullable=False, default=0)
+    args = Column(JSON, nullable=False, default=list)
+    kwargs = Column(JSON, nullable=False, default=dict)
+    headers = Column(JSON, nullable=False, default=dict)
+    published_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    dead_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Only pending rows are indexed, so claiming a batch stays cheap
+        # however many published or dead rows are kept around.
+        Index(
+            "ix_task_outbox_pending",
+            "id",
+            postgresql_where=and_(published_at.is_(None), dead_at.is_(None)),
+            sqlite_where=and_(published_at.is_(None), dead_at.is_(None)),
+        ),
+    )
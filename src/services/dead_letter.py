@@ -0,0 +1,166 @@
+"""Dead-letter queue for tasks that exhausted their retries."""
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+import structlog
+
+from ..core.metrics import dead_letter_size, dead_letter_total
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class DeadLetterEntry:
+    """A task parked in the dead-letter queue."""
+
+    task_id: str
+    task_type: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    queue: str = "default"
+    task_name: str = "src.worker.tasks.execute_task"
+    error: str = ""
+    reason: str = ""
+    retries: int = 0
+    failed_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        """Serialize the entry for storage."""
+        return json.dumps(asdict(self), default=str)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "DeadLetterEntry":
+        """Deserialize a stored entry."""
+        return cls(**json.loads(raw))
+
+
+class DeadLetterQueue:
+    """Redis-backed dead-letter queue.
+
+    Entries live in their own keys, separate from the broker queues, so
+    parking a task never competes with live traffic. A global sorted set
+    and one per task type index entries by failure time for listing and
+    bulk re-drive.
+    """
+
+    ENTRIES_KEY = "dead_letter:entries"
+    INDEX_KEY = "dead_letter:index"
+
+    def __init__(self, redis_client: redis.Redis, max_entries: int = 10000):
+        self.redis_client = redis_client
+        self.max_entries = max_entries
+
+    def _type_index_key(self, task_type: str) -> str:
+        return f"{self.INDEX_KEY}:{task_type}"
+
+    def _store(self, entry: DeadLetterEntry) -> int:
+        """Write an entry and its indexes, returning the new queue size."""
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self.ENTRIES_KEY, entry.task_id, entry.to_json())
+        pipe.zadd(self.INDEX_KEY, {entry.task_id: entry.failed_at})
+        pipe.zadd(
+            self._type_index_key(entry.task_type), {entry.task_id: entry.failed_at}
+        )
+        pipe.zcard(self.INDEX_KEY)
+        return pipe.execute()[-1]
+
+    def push(self, entry: DeadLetterEntry) -> None:
+        """Park a task in the dead-letter queue."""
+        size = self._store(entry)
+        if size > self.max_entries:
+            size -= self._trim(size - self.max_entries)
+
+        dead_letter_total.labels(task_type=entry.task_type, operation="enqueued").inc()
+        dead_letter_size.set(size)
+        logger.warning(
+            "Task moved to dead-letter queue",
+            task_id=entry.task_id,
+            task_type=entry.task_type,
+            reason=entry.reason,
+            retries=entry.retries,
+        )
+
+    def _trim(self, count: int) -> int:
+        """Drop the oldest entries to respect ``max_entries``."""
+        oldest = self.redis_client.zrange(self.INDEX_KEY, 0, count - 1)
+        for entry in self._load(oldest):
+            self._remove(entry)
+        return len(oldest)
+
+    def _load(self, task_ids: List[str]) -> List[DeadLetterEntry]:
+        if not task_ids:
+            return []
+        raw_entries = self.redis_client.hmget(self.ENTRIES_KEY, task_ids)
+        return [DeadLetterEntry.from_json(raw) for raw in raw_entries if raw]
+
+    def _remove(self, entry: DeadLetterEntry) -> bool:
+        """Remove an entry, returning False if another caller already did."""
+        removed = self.redis_client.zrem(self.INDEX_KEY, entry.task_id)
+        pipe = self.redis_client.pipeline()
+        pipe.zrem(self._type_index_key(entry.task_type), entry.task_id)
+        pipe.hdel(self.ENTRIES_KEY, entry.task_id)
+        pipe.execute()
+        return bool(removed)
+
+    def size(self) -> int:
+        """Get the number of parked tasks."""
+        return self.redis_client.zcard(self.INDEX_KEY)
+
+    def get(self, task_id: str) -> Optional[DeadLetterEntry]:
+        """Get a single parked task."""
+        raw = self.redis_client.hget(self.ENTRIES_KEY, task_id)
+        return DeadLetterEntry.from_json(raw) if raw else None
+
+    def list(
+        self,
+        task_type: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[DeadLetterEntry]:
+        """List parked tasks, oldest first."""
+        index_key = self._type_index_key(task_type) if task_type else self.INDEX_KEY
+        task_ids = self.redis_client.zrange(index_key, offset, offset + limit - 1)
+        return self._load(task_ids)
+
+    def redrive(
+        self,
+        publish: Callable[[DeadLetterEntry], None],
+        task_ids: Optional[List[str]] = None,
+        task_type: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[str]:
+        """Re-publish parked tasks and remove them from the queue.
+
+        Each entry is claimed before publishing so concurrent re-drives
+        never publish the same task twice. Entries whose publish fails
+        are put back.
+        """
+        if task_ids is not None:
+            entries = self._load(task_ids[:limit])
+        else:
+            entries = self.list(task_type=task_type, limit=limit)
+
+        redriven = []
+        for entry in entries:
+            if not self._remove(entry):
+                continue
+            try:
+                publish(entry)
+            except Exception as e:
+                logger.error(
+                    "Dead-letter re-drive failed",
+                    task_id=entry.task_id,
+                    error=str(e),
+                )
+                self._store(entry)
+                continue
+            dead_letter_total.labels(
+                task_type=entry.task_type, operation="redriven"
+            ).inc()
+            redriven.append(entry.task_id)
+
+        dead_letter_size.set(self.size())
+        return redriven
@@ -0,0 +1,318 @@
+"""Multi-tenant fair scheduling with deficit round robin and per-tenant quotas."""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import redis
+import structlog
+
+from ..core.config import get_settings
+from ..core.metrics import (
+    tenant_queue_depth,
+    tenant_tasks_dispatched_total,
+    tenant_tasks_throttled_total,
+    tenant_wait_time,
+)
+
+logger = structlog.get_logger(__name__)
+
+# Sub-queue of tasks submitted without a tenant
+DEFAULT_TENANT = "default"
+
+
+class DeficitRoundRobin:
+    """Deficit round robin selection across tenants.
+
+    Every visit grants a tenant ``quantum * weight`` credit; a tenant is
+    served while its credit covers the cost of its next task. A tenant with
+    a deep backlog therefore gets its share of dispatch slots and no more,
+    however much work it has queued.
+    """
+
+    def __init__(
+        self, quantum: float = 1.0, weights: Optional[Dict[str, float]] = None
+    ):
+        # A tenant whose credit never grows would stall ``select`` forever
+        if quantum <= 0:
+            raise ValueError(f"DRR quantum must be positive, got {quantum}")
+        for tenant, weight in (weights or {}).items():
+            if weight <= 0:
+                raise ValueError(
+                    f"Weight of tenant '{tenant}' must be positive, got {weight}"
+                )
+        self.quantum = quantum
+        self.weights = weights or {}
+        self._ring: List[str] = []
+        self._deficits: Dict[str, float] = {}
+        self._cursor = 0
+
+    def _sync(self, backlog: Mapping[str, int]) -> None:
+        """Add newly active tenants and drop idle ones from the ring."""
+        for tenant in list(self._ring):
+            if backlog.get(tenant, 0) <= 0:
+                index = self._ring.index(tenant)
+                self._ring.remove(tenant)
+                self._deficits.pop(tenant, None)
+                if index < self._cursor:
+                    self._cursor -= 1
+
+        for tenant, pending in backlog.items():
+            if pending > 0 and tenant not in self._deficits:
+                self._ring.append(tenant)
+                self._deficits[tenant] = 0.0
+
+        if self._cursor >= len(self._ring):
+            self._cursor = 0
+
+    def select(self, backlog: Mapping[str, int], cost: float = 1.0) -> Optional[str]:
+        """Pick the tenant whose next task should be dispatched.
+
+        ``backlog`` maps tenants to their number of pending tasks; tenants
+        with nothing pending lose their accumulated credit, as in classic
+        DRR.
+        """
+        self._sync(backlog)
+        if not self._ring:
+            return None
+
+        while True:
+            tenant = self._ring[self._cursor]
+            if self._deficits[tenant] >= cost:
+                self._deficits[tenant] -= cost
+                return tenant
+            self._cursor = (self._cursor + 1) % len(self._ring)
+            next_tenant = self._ring[self._cursor]
+            self._deficits[next_tenant] += self.quantum * self.weights.get(
+                next_tenant, 1.0
+            )
+
+
+class TenantConcurrencyLimiter:
+    """Per-tenant concurrency caps backed by Redis.
+
+    In-flight tasks are counted in one sorted set per tenant, scored by a
+    lease expiry, so a slot held by a worker that died is reclaimed once
+    the task time limit has passed instead of leaking forever.
+    """
+
+    KEY_PREFIX = "tenant_inflight"
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        default_limit: int = 20,
+        limits: Optional[Dict[str, int]] = None,
+        slot_ttl: int = 30 * 60,
+    ):
+        self.redis_client = redis_client
+        self.default_limit = default_limit
+        self.limits = limits or {}
+        self.slot_ttl = slot_ttl
+
+    def _key(self, tenant: str) -> str:
+        return f"{self.KEY_PREFIX}:{tenant}"
+
+    def limit_for(self, tenant: str) -> int:
+        """Get the concurrency cap of a tenant."""
+        return self.limits.get(tenant, self.default_limit)
+
+    def in_flight(self, tenant: str, now: float = None) -> int:
+        """Get the number of live in-flight tasks of a tenant."""
+        now = now or time.time()
+        pipe = self.redis_client.pipeline()
+        pipe.zremrangebyscore(self._key(tenant), "-inf", now)
+        pipe.zcard(self._key(tenant))
+        return pipe.execute()[-1]
+
+    def acquire(self, tenant: str, task_id: str, now: float = None) -> bool:
+        """Take a concurrency slot for a task if the tenant is below its cap."""
+        now = now or time.time()
+        key = self._key(tenant)
+        pipe = self.redis_client.pipeline()
+        pipe.zremrangebyscore(key, "-inf", now)
+        pipe.zadd(key, {task_id: now + self.slot_ttl})
+        pipe.zcard(key)
+        pipe.expire(key, self.slot_ttl)
+        _, _, count, _ = pipe.execute()
+
+        if count <= self.limit_for(tenant):
+            return True
+
+        self.redis_client.zrem(key, task_id)
+        return False
+
+    def release(self, tenant: str, task_id: str) -> None:
+        """Give back the slot held by a task."""
+        self.redis_client.zrem(self._key(tenant), task_id)
+
+
+class FairScheduler:
+    """Per-tenant sub-queues drained into a broker queue by DRR.
+
+    Tasks are held in one Redis list per tenant and only released to the
+    broker queue as workers free up, so a tenant flooding the system
+    cannot push everyone else's tasks to the back of a shared FIFO.
+    ``publish`` is only needed by the process that dispatches.
+    """
+
+    KEY_PREFIX = "fair_queue"
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        publish: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        queue_name: str = "default",
+        scheduler: Optional[DeficitRoundRobin] = None,
+        limiter: Optional[TenantConcurrencyLimiter] = None,
+    ):
+        self.redis_client = redis_client
+        self.publish = publish
+        self.queue_name = queue_name
+        self.scheduler = scheduler or DeficitRoundRobin()
+        self.limiter = limiter
+
+    @property
+    def tenants_key(self) -> str:
+        return f"{self.KEY_PREFIX}:{self.queue_name}:tenants"
+
+    def _tenant_key(self, tenant: str) -> str:
+        return f"{self.KEY_PREFIX}:{self.queue_name}:{tenant}"
+
+    def submit(
+        self,
+        tenant: str,
+        task_id: str,
+        task_type: str,
+        parameters: Dict[str, Any],
+        task_name: str = "src.worker.tasks.execute_task",
+        headers: Optional[Dict[str, Any]] = None,
+        priority: Optional[int] = None,
+    ) -> None:
+        """Queue a task in its tenant's sub-queue.
+
+        ``headers`` and ``priority`` are published with the task when it
+        is dispatched.
+        """
+        message = {
+            "task_id": task_id,
+            "task_type": task_type,
+            "parameters": parameters,
+            "task_name": task_name,
+            "headers": headers or {},
+            "priority": priority,
+            "enqueued_at": time.time(),
+        }
+        pipe = self.redis_client.pipeline()
+        pipe.rpush(self._tenant_key(tenant), json.dumps(message, default=str))
+        pipe.sadd(self.tenants_key, tenant)
+        depth = pipe.execute()[0]
+        tenant_queue_depth.labels(queue_name=self.queue_name, tenant=tenant).set(depth)
+
+    def depths(self) -> Dict[str, int]:
+        """Get the backlog of every tenant with queued work."""
+        tenants = sorted(self.redis_client.smembers(self.tenants_key))
+        pipe = self.redis_client.pipeline()
+        for tenant in tenants:
+            pipe.llen(self._tenant_key(tenant))
+        depths = dict(zip(tenants, pipe.execute()))
+
+        for tenant, depth in depths.items():
+            tenant_queue_depth.labels(queue_name=self.queue_name, tenant=tenant).set(
+                depth
+            )
+        return depths
+
+    def dispatch(self, max_tasks: int) -> int:
+        """Release up to ``max_tasks`` tasks to the broker in DRR order."""
+        backlog = {
+            tenant: depth for tenant, depth in self.depths().items() if depth > 0
+        }
+        dispatched = 0
+        now = time.time()
+
+        while dispatched < max_tasks and backlog:
+            tenant = self.scheduler.select(backlog)
+            key = self._tenant_key(tenant)
+            raw = self.redis_client.lpop(key)
+            if raw is None:
+                backlog.pop(tenant)
+                continue
+
+            message = json.loads(raw)
+            if self.limiter and not self.limiter.acquire(tenant, message["task_id"]):
+                # Tenant is at its cap: put the task back at the head and
+                # skip the tenant for the rest of this round.
+                self.redis_client.lpush(key, raw)
+                backlog.pop(tenant)
+                tenant_tasks_throttled_total.labels(
+                    queue_name=self.queue_name, tenant=tenant
+                ).inc()
+                continue
+
+            try:
+                self.publish(tenant, message)
+            except Exception:
+                self.redis_client.lpush(key, raw)
+                if self.limiter:
+                    self.limiter.release(tenant, message["task_id"])
+                raise
+
+            tenant_wait_time.labels(queue_name=self.queue_name, tenant=tenant).observe(
+                max(0.0, now - message["enqueued_at"])
+            )
+            tenant_tasks_dispatched_total.labels(
+                queue_name=self.queue_name, tenant=tenant
+            ).inc()
+            dispatched += 1
+            backlog[tenant] -= 1
+            if backlog[tenant] <= 0:
+                backlog.pop(tenant)
+
+        self._prune_idle_tenants()
+        return dispatched
+
+    def _prune_idle_tenants(self) -> None:
+        """Forget tenants whose sub-queue is empty.
+
+        The length check and removal run under WATCH so a concurrent
+        ``submit`` cannot be orphaned between them.
+        """
+        for tenant in self.redis_client.smembers(self.tenants_key):
+            key = self._tenant_key(tenant)
+            with self.redis_client.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    if pipe.llen(key) > 0:
+                        continue
+                    pipe.multi()
+                    pipe.srem(self.tenants_key, tenant)
+                    pipe.execute()
+                except redis.WatchError:
+                    continue
+
+
+def create_tenant_limiter(redis_client: redis.Redis) -> TenantConcurrencyLimiter:
+    """Create a tenant concurrency limiter configured from settings."""
+    settings = get_settings()
+    return TenantConcurrencyLimiter(
+        redis_client,
+        default_limit=settings.tenant_max_concurrency,
+        limits=settings.tenant_concurrency_limits,
+    )
+
+
+def create_fair_scheduler(
+    redis_client: redis.Redis,
+    publish: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    queue_name: str = "default",
+) -> FairScheduler:
+    """Create a fair scheduler configured from settings."""
+    settings = get_settings()
+    return FairScheduler(
+        redis_client,
+        publish,
+        queue_name=queue_name,
+        scheduler=DeficitRoundRobin(weights=settings.tenant_weights),
+        limiter=create_tenant_limiter(redis_client),
+    )
@@ -0,0 +1,321 @@
+"""Lease-based task ownership and the reaper reclaiming expired leases."""
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import redis
+import structlog
+
+from ..core.config import get_settings
+from ..core.metrics import lease_detection_time, tasks_reclaimed_total
+from .dead_letter import DeadLetterEntry, DeadLetterQueue
+from .fair_scheduler import TenantConcurrencyLimiter
+from .resource_versions import ResourceVersions
+from .retry_policy import RetryDecision, RetryPolicyEngine
+from .task_stats import FAILED, TaskStats
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class TaskLease:
+    """A running task attempt and what is needed to publish it again."""
+
+    task_id: str
+    task_type: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    queue: str = "default"
+    task_name: str = "src.worker.tasks.execute_task"
+    retries: int = 0
+    retry_delay: Optional[float] = None
+    tenant: Optional[str] = None
+    worker: str = ""
+    acquired_at: float = field(default_factory=time.time)
+    message_id: Optional[str] = None
+
+    @property
+    def attempt_id(self) -> str:
+        """Key of this delivery: its broker message and retry count.
+
+        A retry or requeue of the same task is a different attempt, while
+        a broker redelivery of the same message is not.
+        """
+        return f"{self.message_id or self.task_id}:{self.retries}"
+
+    def to_json(self) -> str:
+        """Serialize the lease for storage."""
+        return json.dumps(asdict(self), default=str)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "TaskLease":
+        """Deserialize a stored lease."""
+        return cls(**json.loads(raw))
+
+
+class LeaseRegistry:
+    """Redis-backed task leases indexed by expiry.
+
+    Leases are keyed by ``TaskLease.attempt_id``, so two attempts of one
+    task (a requeue and the stale message it replaced, or a retry) never
+    share a lease. Lease records live in one hash and their expiry times
+    in a sorted set, so finding expired leases is a range query on the
+    index whose cost depends on the number expired, not on how many tasks
+    exist.
+
+    When a lease is reclaimed its attempt is fenced: the original message
+    is still unacked and the broker will redeliver it eventually, and that
+    stale copy must not run next to the requeued one.
+
+    Every write to a lease also writes its attempt's guard key, which is
+    what a claim watches, so a claim only contends with writes to the
+    lease it is claiming.
+    """
+
+    LEASES_KEY = "task_lease:leases"
+    INDEX_KEY = "task_lease:index"
+    PROGRESS_KEY = "task_lease:progress"
+
+    def __init__(self, redis_client: redis.Redis, ttl: int = 60, fence_ttl: int = 3600):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.fence_ttl = fence_ttl
+
+    def _fence_key(self, attempt_id: str) -> str:
+        return f"task_lease:fence:{attempt_id}"
+
+    def _guard_key(self, attempt_id: str) -> str:
+        return f"task_lease:guard:{attempt_id}"
+
+    def acquire(self, lease: TaskLease, now: Optional[float] = None) -> bool:
+        """Take the lease for a task attempt.
+
+        Returns ``False`` if this attempt was already reclaimed, meaning the
+        caller holds a stale redelivery and must not run it. The fence is
+        checked under WATCH, so a reaper fencing the attempt between the
+        check and the write makes the write fail instead of reviving it.
+        """
+        now = time.time() if now is None else now
+        attempt_id = lease.attempt_id
+        fence_key = self._fence_key(attempt_id)
+        with self.redis_client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(fence_key)
+                    if pipe.exists(fence_key):
+                        return False
+                    pipe.multi()
+                    pipe.hset(self.LEASES_KEY, attempt_id, lease.to_json())
+                    pipe.zadd(self.INDEX_KEY, {attempt_id: now + self.ttl})
+                    pipe.set(self._guard_key(attempt_id), now, ex=self.fence_ttl)
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+
+    def renew(
+        self,
+        attempt_ids: Iterable[str],
+        now: Optional[float] = None,
+        progress: Optional[Dict[str, float]] = None,
+    ) -> int:
+        """Extend the leases of many attempts in one round trip.
+
+        Only existing leases are extended (``XX``), so a heartbeat racing
+        with the reaper cannot resurrect a reclaimed lease. ``progress``
+        records the latest completed fraction reported by each attempt.
+        """
+        expires_at = (time.time() if now is None else now) + self.ttl
+        mapping = {attempt_id: expires_at for attempt_id in attempt_ids}
+        if not mapping:
+            return 0
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(self.INDEX_KEY, mapping, xx=True, ch=True)
+        for attempt_id in mapping:
+            # Only guards of live leases; a released lease has none
+            pipe.set(
+                self._guard_key(attempt_id), expires_at, xx=True, ex=self.fence_ttl
+            )
+        if progress:
+            pipe.hset(self.PROGRESS_KEY, mapping=progress)
+        return pipe.execute()[0]
+
+    def release(self, attempt_id: str) -> None:
+        """Drop the lease of a finished task attempt."""
+        pipe = self.redis_client.pipeline()
+        pipe.zrem(self.INDEX_KEY, attempt_id)
+        pipe.hdel(self.LEASES_KEY, attempt_id)
+        pipe.hdel(self.PROGRESS_KEY, attempt_id)
+        pipe.delete(self._guard_key(attempt_id))
+        pipe.execute()
+
+    def get(self, attempt_id: str) -> Optional[TaskLease]:
+        """Get the lease of a running task attempt."""
+        raw = self.redis_client.hget(self.LEASES_KEY, attempt_id)
+        return TaskLease.from_json(raw) if raw else None
+
+    def leases(self, count: int = 500) -> Iterator[TaskLease]:
+        """Iterate over the leases of every running task attempt."""
+        for _, raw in self.redis_client.hscan_iter(self.LEASES_KEY, count=count):
+            yield TaskLease.from_json(raw)
+
+    def progress(self, attempt_ids: List[str]) -> Dict[str, float]:
+        """Latest reported progress of attempts, omitting those never reported."""
+        if not attempt_ids:
+            return {}
+        values = self.redis_client.hmget(self.PROGRESS_KEY, attempt_ids)
+        return {
+            attempt_id: float(value)
+            for attempt_id, value in zip(attempt_ids, values)
+            if value is not None
+        }
+
+    def expired(self, now: Optional[float] = None, limit: int = 100) -> List[str]:
+        """Get up to ``limit`` attempt ids whose lease has expired."""
+        now = time.time() if now is None else now
+        return self.redis_client.zrangebyscore(
+            self.INDEX_KEY, "-inf", now, start=0, num=limit
+        )
+
+    def claim(
+        self, attempt_id: str, now: Optional[float] = None
+    ) -> Optional[Tuple[TaskLease, float]]:
+        """Take over an expired lease, fencing its attempt.
+
+        Watches only the attempt's guard and fence keys, so a heartbeat
+        renewing this lease, a redelivery acquiring it or another reaper
+        claiming it between the check and the removal makes the check run
+        again, while writes to other leases do not. Returns the lease and
+        the time it expired.
+        """
+        now = time.time() if now is None else now
+        with self.redis_client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self._guard_key(attempt_id), self._fence_key(attempt_id))
+                    expires_at = pipe.zscore(self.INDEX_KEY, attempt_id)
+                    if expires_at is None or expires_at > now:
+                        return None
+                    raw = pipe.hget(self.LEASES_KEY, attempt_id)
+                    lease = TaskLease.from_json(raw) if raw else None
+                    pipe.multi()
+                    pipe.zrem(self.INDEX_KEY, attempt_id)
+                    pipe.hdel(self.LEASES_KEY, attempt_id)
+                    pipe.hdel(self.PROGRESS_KEY, attempt_id)
+                    pipe.delete(self._guard_key(attempt_id))
+                    pipe.set(self._fence_key(attempt_id), 1, ex=self.fence_ttl)
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    continue
+
+        if lease is None:
+            return None
+        return lease, expires_at
+
+    def restore(self, lease: TaskLease, now: Optional[float] = None) -> None:
+        """Put back a claimed lease, already expired, after a failed requeue."""
+        now = time.time() if now is None else now
+        attempt_id = lease.attempt_id
+        pipe = self.redis_client.pipeline()
+        pipe.delete(self._fence_key(attempt_id))
+        pipe.hset(self.LEASES_KEY, attempt_id, lease.to_json())
+        pipe.zadd(self.INDEX_KEY, {attempt_id: now})
+        pipe.set(self._guard_key(attempt_id), now, ex=self.fence_ttl)
+        pipe.execute()
+
+
+class LeaseReaper:
+    """Requeues or fails tasks whose worker stopped renewing their lease."""
+
+    def __init__(
+        self,
+        registry: LeaseRegistry,
+        retry_engine: RetryPolicyEngine,
+        requeue: Callable[[TaskLease, RetryDecision], None],
+        dead_letter: DeadLetterQueue,
+        limiter: Optional[TenantConcurrencyLimiter] = None,
+        stats: Optional[TaskStats] = None,
+        versions: Optional[ResourceVersions] = None,
+        batch_size: int = 100,
+    ):
+        self.registry = registry
+        self.retry_engine = retry_engine
+        self.requeue = requeue
+        self.dead_letter = dead_letter
+        self.limiter = limiter
+        self.stats = stats
+        self.versions = versions
+        self.batch_size = batch_size
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """Reclaim one batch of expired leases, returning how many."""
+        now = time.time() if now is None else now
+        reclaimed = 0
+        for attempt_id in self.registry.expired(now, self.batch_size):
+            claimed = self.registry.claim(attempt_id, now)
+            if claimed is None:
+                continue
+            lease, expires_at = claimed
+            if self._reclaim(lease, now):
+                reclaimed += 1
+                # Time since the last heartbeat the lease saw
+                lease_detection_time.observe(now - (expires_at - self.registry.ttl))
+        return reclaimed
+
+    def _reclaim(self, lease: TaskLease, now: float) -> bool:
+        decision = self.retry_engine.decide(
+            lease.task_type, lease.retries, lease.retry_delay
+        )
+
+        if decision.retry:
+            try:
+                self.requeue(lease, decision)
+            except Exception as e:
+                logger.error("Requeue failed", task_id=lease.task_id, error=str(e))
+                self.registry.restore(lease, now)
+                return False
+            outcome = "requeued"
+        else:
+            self.dead_letter.push(
+                DeadLetterEntry(
+                    task_id=lease.task_id,
+                    task_type=lease.task_type,
+                    parameters=lease.parameters,
+                    queue=lease.queue,
+                    task_name=lease.task_name,
+                    error=f"Lease expired on worker {lease.worker or 'unknown'}",
+                    reason=decision.reason,
+                    retries=lease.retries,
+                )
+            )
+            outcome = "dead_lettered"
+            # A requeued task keeps its tenant slot until it finishes
+            if self.limiter and lease.tenant:
+                self.limiter.release(lease.tenant, lease.task_id)
+            if self.stats:
+                self.stats.transition(lease.task_id, FAILED)
+            if self.versions:
+                self.versions.touch_task(lease.task_id)
+
+        tasks_reclaimed_total.labels(task_type=lease.task_type, outcome=outcome).inc()
+        logger.warning(
+            "Reclaimed task with expired lease",
+            task_id=lease.task_id,
+            task_type=lease.task_type,
+            worker=lease.worker,
+            retries=lease.retries,
+            outcome=outcome,
+        )
+        return True
+
+
+def create_lease_registry(redis_client: redis.Redis) -> LeaseRegistry:
+    """Create a lease registry configured from settings."""
+    settings = get_settings()
+    return LeaseRegistry(
+        redis_client,
+        ttl=settings.task_lease_ttl,
+        fence_ttl=settings.task_lease_fence_ttl,
+    )
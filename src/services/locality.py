@@ -0,0 +1,368 @@
+"""Locality-aware routing of tasks to hosts that hold their data warm.
+
+A task's data keys are the values of configured parameters such as
+``data_source``. Workers advertise the keys of tasks they ran in a Redis
+registry, with a TTL standing in for eviction from the host's local cache.
+A new task whose keys are warm on a host is published to that host's
+queue, ``<queue>@<host>``, which only workers on that host consume.
+
+Delay scheduling bounds how long a task waits for its host: once the
+window passes, the fallback scanner republishes it to the shared queue.
+Both copies may then be consumed. Each publication carries its own
+token, and whichever copy is consumed first claims the task by storing
+its token with a SET NX in Redis; any other publication is dropped.
+"""
+
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import redis
+import structlog
+
+from ..core.config import get_settings
+from ..core.metrics import locality_claims_total, locality_routing_decisions_total
+
+logger = structlog.get_logger(__name__)
+
+# Which copy of a locality-routed task a message is
+LOCAL = "local"
+SHARED = "shared"
+
+
+def locality_queue(queue: str, host: str) -> str:
+    """Name of the host-specific variant of a queue."""
+    return f"{queue}@{host}"
+
+
+def locality_keys(parameters: Dict[str, Any], names: Iterable[str]) -> List[str]:
+    """Data keys of a task: its string values of the given parameters."""
+    return [
+        f"{name}={parameters[name]}"
+        for name in names
+        if isinstance(parameters.get(name), str) and parameters[name]
+    ]
+
+
+@dataclass
+class LocalityRoute:
+    """Where to publish a task and the headers to publish it with."""
+
+    queue: str
+    headers: Dict[str, Any] = field(default_factory=dict)
+    host: Optional[str] = None
+    decision: str = "no_key"
+
+
+class WarmDataRegistry:
+    """Redis registry of the data keys each host holds warm.
+
+    Each data key maps to a sorted set of hosts scored by when their entry
+    expires, so entries age out per host without a key per pair. Hosts
+    also register the queues they consume, which is what makes their
+    ``<queue>@<host>`` variants safe to route to.
+    """
+
+    def __init__(self, redis_client: redis.Redis, ttl: int = 1800):
+        self.redis_client = redis_client
+        self.ttl = ttl
+
+    def _warm_key(self, key: str) -> str:
+        return f"locality:warm:{key}"
+
+    def _consumers_key(self, queue: str) -> str:
+        return f"locality:consumers:{queue}"
+
+    def advertise(
+        self,
+        host: str,
+        keys: Sequence[str],
+        queues: Sequence[str],
+        now: Optional[float] = None,
+    ) -> None:
+        """Record data keys as warm on a host that consumes ``queues``."""
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        pipe = self.redis_client.pipeline(transaction=False)
+        for redis_key in [self._warm_key(key) for key in keys] + [
+            self._consumers_key(queue) for queue in queues
+        ]:
+            pipe.zremrangebyscore(redis_key, "-inf", now)
+            pipe.zadd(redis_key, {host: expires_at})
+            pipe.expire(redis_key, self.ttl)
+        pipe.execute()
+
+    def holders(
+        self, keys: Sequence[str], queue: str, now: Optional[float] = None
+    ) -> Dict[str, int]:
+        """Hosts consuming ``queue`` with any of the keys warm, and how many."""
+        now = time.time() if now is None else now
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.zrangebyscore(self._warm_key(key), now, "+inf")
+        pipe.zrangebyscore(self._consumers_key(queue), now, "+inf")
+        *warm, consumers = pipe.execute()
+
+        live = set(consumers)
+        counts: Dict[str, int] = {}
+        for hosts in warm:
+            for host in hosts:
+                if host in live:
+                    counts[host] = counts.get(host, 0) + 1
+        return counts
+
+
+class LocalityRouter:
+    """Routes tasks to hosts with their data warm, with delay scheduling."""
+
+    PENDING_KEY = "locality:pending"
+    MESSAGES_KEY = "locality:messages"
+    BACKLOG_KEY = "locality:backlog"
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        registry: WarmDataRegistry,
+        parameter_names: Sequence[str],
+        wait: float = 5.0,
+        max_backlog: int = 4,
+        owner_ttl: int = 24 * 3600,
+    ):
+        self.redis_client = redis_client
+        self.registry = registry
+        self.parameter_names = list(parameter_names)
+        self.wait = wait
+        self.max_backlog = max_backlog
+        self.owner_ttl = owner_ttl
+
+    def _owner_key(self, task_id: str) -> str:
+        return f"locality:owner:{task_id}"
+
+    def route(
+        self,
+        queue: str,
+        parameters: Dict[str, Any],
+        headers: Optional[Dict[str, Any]] = None,
+        now: Optional[float] = None,
+    ) -> LocalityRoute:
+        """Choose the queue for a new task.
+
+        Prefers the host with the most of the task's keys warm, then the
+        shortest backlog. Hosts already holding ``max_backlog`` tasks
+        waiting for them are skipped, so a hot data key spreads to other
+        hosts instead of queueing behind one.
+        """
+        headers = dict(headers or {})
+        keys = locality_keys(parameters, self.parameter_names)
+        host: Optional[str] = None
+        decision = "no_key"
+        if keys:
+            holders = self.registry.holders(keys, queue, now)
+            decision = "no_holder" if not holders else "busy"
+            if holders:
+                candidates = list(holders)
+                backlogs = self.redis_client.hmget(
+                    self.BACKLOG_KEY,
+                    [locality_queue(queue, candidate) for candidate in candidates],
+                )
+                available = {
+                    candidate: int(backlog or 0)
+                    for candidate, backlog in zip(candidates, backlogs)
+                    if int(backlog or 0) < self.max_backlog
+                }
+                if available:
+                    host = max(
+                        available,
+                        key=lambda name: (holders[name], -available[name]),
+                    )
+                    decision = "local"
+
+        locality_routing_decisions_total.labels(queue=queue, decision=decision).inc()
+        if host is None:
+            return LocalityRoute(queue=queue, headers=headers, decision=decision)
+
+        headers.update(
+            locality=LOCAL, locality_queue=queue, locality_token=uuid.uuid4().hex
+        )
+        return LocalityRoute(
+            queue=locality_queue(queue, host),
+            headers=headers,
+            host=host,
+            decision=decision,
+        )
+
+    def dispatched(
+        self,
+        task_id: str,
+        route: LocalityRoute,
+        message: Dict[str, Any],
+        now: Optional[float] = None,
+    ) -> None:
+        """Start the delay-scheduling window of a task sent to a host queue.
+
+        ``message`` holds the ``send_task`` arguments that republish the
+        task to its shared queue if the window passes.
+        """
+        if route.host is None:
+            return
+        now = time.time() if now is None else now
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(self.PENDING_KEY, {task_id: now + self.wait})
+        record = {"message": message, "host_queue": route.queue, "routed_at": now}
+        pipe.hset(self.MESSAGES_KEY, task_id, json.dumps(record, default=str))
+        pipe.hincrby(self.BACKLOG_KEY, route.queue, 1)
+        pipe.execute()
+
+    def undispatched(self, task_id: str, route: LocalityRoute) -> None:
+        """Cancel the window of a task whose publish to the host queue failed."""
+        if route.host is None:
+            return
+        self._close_window(task_id, route.queue)
+
+    def _close_window(self, task_id: str, host_queue: Optional[str]) -> None:
+        """Drop a task's pending entry and fallback message.
+
+        The backlog is decremented by whoever deletes the message, so it
+        is decremented once however the host copy and the scanners race.
+        """
+        pipe = self.redis_client.pipeline()
+        pipe.zrem(self.PENDING_KEY, task_id)
+        pipe.hdel(self.MESSAGES_KEY, task_id)
+        _, deleted = pipe.execute()
+        if deleted and host_queue:
+            self.redis_client.hincrby(self.BACKLOG_KEY, host_queue, -1)
+
+    def claim(
+        self,
+        task_id: str,
+        copy: str,
+        queue: str,
+        host_queue: Optional[str] = None,
+        token: Optional[str] = None,
+    ) -> bool:
+        """Take ownership of a locality-routed task for the copy consumed.
+
+        ``token`` identifies the publication the copy came from. ``True``
+        if the copy may run: its publication claimed the task first, and
+        this is the first delivery, a redelivery or a retry of it.
+        Messages published without a token claim by their copy kind.
+        """
+        token = token or copy
+        pipe = self.redis_client.pipeline()
+        pipe.set(self._owner_key(task_id), token, nx=True, ex=self.owner_ttl)
+        pipe.get(self._owner_key(task_id))
+        claimed, owner = pipe.execute()
+
+        if claimed:
+            locality_claims_total.labels(queue=queue, copy=copy).inc()
+            if copy == LOCAL:
+                self._close_window(task_id, host_queue)
+        return owner == token
+
+    def fallback(
+        self,
+        republish: Callable[[Dict[str, Any]], None],
+        now: Optional[float] = None,
+        limit: int = 100,
+    ) -> int:
+        """Republish tasks whose window passed to their shared queue.
+
+        The host copy stays queued; whichever copy is consumed first runs.
+        A scanner takes a task's pending entry before republishing it, so
+        of several scanners only one republishes each task. Returns the
+        number of tasks republished.
+        """
+        now = time.time() if now is None else now
+        moved = 0
+        for task_id in self.redis_client.zrangebyscore(
+            self.PENDING_KEY, "-inf", now, start=0, num=limit
+        ):
+            if not self.redis_client.zrem(self.PENDING_KEY, task_id):
+                # Taken by another scanner or claimed by the host copy
+                continue
+            raw = self.redis_client.hget(self.MESSAGES_KEY, task_id)
+            if raw is None:
+                continue
+            record = json.loads(raw)
+            message = record["message"]
+            message["headers"] = {
+                **(message.get("headers") or {}),
+                "locality": SHARED,
+                "locality_queue": message["queue"],
+                "locality_token": uuid.uuid4().hex,
+            }
+            try:
+                republish(message)
+            except Exception as e:
+                # Put back; retried on the next pass
+                self.redis_client.zadd(self.PENDING_KEY, {task_id: now}, nx=True)
+                logger.error("Locality fallback failed", task_id=task_id, error=str(e))
+                continue
+            moved += 1
+            logger.info(
+                "Task fell back to shared queue",
+                task_id=task_id,
+                host_queue=record["host_queue"],
+                waited=now - record["routed_at"],
+            )
+            self._close_window(task_id, record["host_queue"])
+        return moved
+
+
+def publish_task(
+    celery_app: Any,
+    router: Optional[LocalityRouter],
+    name: str,
+    args: List[Any],
+    queue: str,
+    kwargs: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, Any]] = None,
+    task_id: Optional[str] = None,
+    priority: Optional[int] = None,
+    **options: Any,
+) -> None:
+    """Publish an ``execute_task`` message, routed by data locality if enabled.
+
+    ``args`` are the task's ``[task_id, task_type, parameters]``; other
+    ``options`` (such as ``producer``) apply to this publish only.
+    """
+    message = {
+        "name": name,
+        "args": args,
+        "kwargs": kwargs,
+        "queue": queue,
+        "headers": headers,
+        "task_id": task_id,
+        "priority": priority,
+    }
+    if router is None:
+        celery_app.send_task(**message, **options)
+        return
+
+    route = router.route(queue, args[2] if len(args) > 2 else {}, headers)
+    # Recorded first: a host copy consumed straight away must find its
+    # window open, or it would still fall back and count in the backlog.
+    router.dispatched(str(args[0]), route, message)
+    try:
+        celery_app.send_task(
+            **{**message, "queue": route.queue, "headers": route.headers}, **options
+        )
+    except Exception:
+        router.undispatched(str(args[0]), route)
+        raise
+
+
+def create_locality_router(redis_client: redis.Redis) -> Optional[LocalityRouter]:
+    """Create a locality router from settings, or ``None`` if disabled."""
+    settings = get_settings()
+    if not settings.locality_routing_enabled:
+        return None
+    return LocalityRouter(
+        redis_client,
+        WarmDataRegistry(redis_client, ttl=settings.locality_warm_ttl),
+        settings.locality_parameter_keys,
+        wait=settings.locality_wait,
+        max_backlog=settings.locality_max_backlog,
+    )
@@ -0,0 +1,266 @@
+"""Transactional outbox: enqueue task messages with the task row, relay them later."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Sequence, Set
+
+import redis
+import structlog
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.metrics import (
+    outbox_batch_duration,
+    outbox_dead_lettered_total,
+    outbox_publish_failures_total,
+    outbox_published_total,
+    outbox_relay_lag,
+)
+from ..models.outbox import OutboxMessage
+from ..worker.routing import message_priority, priority_level, task_queue
+from .fair_scheduler import DEFAULT_TENANT, FairScheduler, create_fair_scheduler
+from .locality import LocalityRouter, publish_task
+from .speculation import attempt_message_id
+
+logger = structlog.get_logger(__name__)
+
+HIGH_PRIORITY_NAMES = {"HIGH", "URGENT"}
+
+
+def add_task_message(
+    session: AsyncSession,
+    task: Any,
+    headers: Optional[Dict[str, Any]] = None,
+) -> OutboxMessage:
+    """Stage the broker message for a task in the caller's transaction.
+
+    Must be called in the same session as the ``Task`` insert; nothing is
+    published until that transaction commits and the relay picks it up.
+    """
+    priority = getattr(task.priority, "name", str(task.priority))
+    if priority in HIGH_PRIORITY_NAMES:
+        task_name = "src.worker.tasks.execute_high_priority_task"
+    else:
+        task_name = "src.worker.tasks.execute_task"
+
+    headers = dict(headers or {})
+    headers.setdefault("task_priority", priority)
+    if getattr(task, "created_by", None):
+        headers.setdefault("tenant", task.created_by)
+
+    message = OutboxMessage(
+        task_id=str(task.id),
+        task_name=task_name,
+        queue=task_queue(task_name, task.task_type),
+        priority=priority_level(task.priority),
+        args=[str(task.id), task.task_type, task.parameters or {}],
+        kwargs={},
+        headers=headers,
+    )
+    session.add(message)
+    return message
+
+
+class OutboxRelay:
+    """Claims unpublished outbox rows in batches and publishes them.
+
+    Batches are claimed with ``FOR UPDATE SKIP LOCKED`` so several relay
+    processes can run side by side without publishing the same row twice
+    or waiting on each other. Delivery is at-least-once: if the commit
+    after a publish fails, the batch is published again.
+
+    A row whose publish fails is retried with exponential backoff, and
+    marked dead after ``max_attempts`` so that a message the broker keeps
+    rejecting does not occupy the relay forever.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        publish_batch: Callable[[Sequence[OutboxMessage]], Set[int]],
+        batch_size: int = 500,
+        max_attempts: int = 10,
+        retry_backoff: float = 1.0,
+        retry_backoff_max: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.publish_batch = publish_batch
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds to wait after ``attempts`` failed publishes."""
+        return min(self.retry_backoff * 2 ** (attempts - 1), self.retry_backoff_max)
+
+    async def relay_batch(self) -> int:
+        """Publish one batch, returning the number of rows claimed."""
+        start_time = time.time()
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(OutboxMessage)
+                    .where(
+                        OutboxMessage.published_at.is_(None),
+                        OutboxMessage.dead_at.is_(None),
+                        or_(
+                            OutboxMessage.next_attempt_at.is_(None),
+                            OutboxMessage.next_attempt_at <= datetime.now(timezone.utc),
+                        ),
+                    )
+                    .order_by(OutboxMessage.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                messages = result.scalars().all()
+                if not messages:
+                    return 0
+
+                # Publishing blocks on the broker; keep the event loop free.
+                published_ids = await asyncio.to_thread(self.publish_batch, messages)
+                now = datetime.now(timezone.utc)
+
+                if published_ids:
+                    await session.execute(
+                        update(OutboxMessage)
+                        .where(OutboxMessage.id.in_(published_ids))
+                        .values(published_at=now, attempts=OutboxMessage.attempts + 1)
+                    )
+                for message in messages:
+                    if message.id not in published_ids:
+                        self._schedule_retry(message, now)
+
+        for message in messages:
+            if message.id in published_ids:
+                outbox_published_total.labels(queue=message.queue).inc()
+                outbox_relay_lag.observe(_lag_seconds(message.created_at, now))
+            elif message.dead_at is not None:
+                outbox_dead_lettered_total.labels(queue=message.queue).inc()
+            else:
+                outbox_publish_failures_total.labels(queue=message.queue).inc()
+        outbox_batch_duration.observe(time.time() - start_time)
+        return len(messages)
+
+    def _schedule_retry(self, message: OutboxMessage, now: datetime) -> None:
+        """Back a failed row off, or mark it dead after its last attempt."""
+        message.attempts += 1
+        message.last_error = "publish failed"
+        if message.attempts >= self.max_attempts:
+            message.dead_at = now
+            logger.error(
+                "Outbox message dead-lettered",
+                outbox_id=message.id,
+                task_id=message.task_id,
+                attempts=message.attempts,
+            )
+            return
+        delay = self.retry_delay(message.attempts)
+        message.next_attempt_at = now + timedelta(seconds=delay)
+
+    async def purge_published(self, retention: timedelta) -> int:
+        """Delete rows published longer than ``retention`` ago."""
+        cutoff = datetime.now(timezone.utc) - retention
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    delete(OutboxMessage).where(OutboxMessage.published_at < cutoff)
+                )
+        return result.rowcount or 0
+
+
+def _lag_seconds(created_at: Optional[datetime], published_at: datetime) -> float:
+    """Time between the outbox write and its publication."""
+    if created_at is None:
+        return 0.0
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (published_at - created_at).total_seconds())
+
+
+def make_celery_batch_publisher(
+    celery_app: Any,
+    router: Optional[LocalityRouter] = None,
+) -> Callable[[Sequence[OutboxMessage]], Set[int]]:
+    """Create a batch publisher sharing one broker connection per batch.
+
+    The Celery task id is derived from the task id and the outbox row, so
+    a message published twice by the at-least-once relay is recognizable
+    downstream. With a
+    ``router``, tasks go to a host holding their data when there is one.
+    """
+
+    def publish_batch(messages: Sequence[OutboxMessage]) -> Set[int]:
+        published: Set[int] = set()
+        with celery_app.producer_or_acquire() as producer:
+            for message in messages:
+                try:
+                    publish_task(
+                        celery_app,
+                        router,
+                        message.task_name,
+                        args=message.args,
+                        kwargs=message.kwargs,
+                        queue=message.queue,
+                        headers=message.headers,
+                        priority=message_priority(message.priority),
+                        task_id=attempt_message_id(message.task_id, str(message.id)),
+                        producer=producer,
+                    )
+                except Exception as e:
+                    logger.error(
+                        "Outbox publish failed",
+                        outbox_id=message.id,
+                        task_id=message.task_id,
+                        error=str(e),
+                    )
+                    continue
+                published.add(message.id)
+        return published
+
+    return publish_batch
+
+
+def make_fair_batch_publisher(
+    redis_client: redis.Redis,
+) -> Callable[[Sequence[OutboxMessage]], Set[int]]:
+    """Create a batch publisher queueing tasks in their tenant's sub-queue.
+
+    Nothing reaches the broker here: the fair dispatcher releases the
+    tasks in DRR order, within each tenant's concurrency quota. Tasks
+    without a tenant share one sub-queue.
+    """
+    schedulers: Dict[str, FairScheduler] = {}
+
+    def publish_batch(messages: Sequence[OutboxMessage]) -> Set[int]:
+        published: Set[int] = set()
+        for message in messages:
+            scheduler = schedulers.get(message.queue)
+            if scheduler is None:
+                scheduler = schedulers[message.queue] = create_fair_scheduler(
+                    redis_client, queue_name=message.queue
+                )
+            task_id, task_type, parameters = message.args[:3]
+            try:
+                scheduler.submit(
+                    message.headers.get("tenant") or DEFAULT_TENANT,
+                    task_id,
+                    task_type,
+                    parameters,
+                    task_name=message.task_name,
+                    headers=message.headers,
+                    priority=message.priority,
+                )
+            except Exception as e:
+                logger.error(
+                    "Outbox submit failed",
+                    outbox_id=message.id,
+                    task_id=message.task_id,
+                    error=str(e),
+                )
+                continue
+            published.add(message.id)
+        return published
+
+    return publish_batch
@@ -0,0 +1,58 @@
+"""Change markers for task resources, used to validate cached API responses.
+
+Writers record a change whenever a task is updated; the API's ETag
+middleware reads the marker to answer conditional requests without
+querying the database. A single task's marker is its ``updated_at``; task
+collections (lists, stats) share a marker rewritten on every task change.
+Markers only need to be unique per change, not ordered, so a Redis restart
+cannot bring back an old marker and validate a stale response.
+"""
+
+import time
+from typing import Optional
+
+import redis
+
+TASKS_RESOURCE = "tasks"
+
+
+def task_resource(task_id: str) -> str:
+    """Resource name of a single task."""
+    return f"task:{task_id}"
+
+
+def resource_version_key(resource: str) -> str:
+    """Redis key holding a resource's current version."""
+    return f"resource_version:{resource}"
+
+
+class ResourceVersions:
+    """Records task changes for HTTP validators."""
+
+    def __init__(self, redis_client: redis.Redis, task_ttl: int = 24 * 3600):
+        self.redis_client = redis_client
+        # Per-task markers expire; a missing marker only disables 304s
+        self.task_ttl = task_ttl
+
+    def touch_task(self, task_id: str, updated_at: Optional[float] = None) -> None:
+        """Record that a task changed, invalidating it and all collections."""
+        updated_at = time.time() if updated_at is None else updated_at
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.set(
+            resource_version_key(task_resource(task_id)),
+            repr(updated_at),
+            ex=self.task_ttl,
+        )
+        pipe.set(resource_version_key(TASKS_RESOURCE), f"{updated_at!r}:{task_id}")
+        pipe.execute()
+
+    def touch_tasks(self, changed_at: Optional[float] = None) -> None:
+        """Record that task collections changed without any one task changing."""
+        changed_at = time.time() if changed_at is None else changed_at
+        self.redis_client.set(
+            resource_version_key(TASKS_RESOURCE), f"{changed_at!r}:{TASKS_RESOURCE}"
+        )
+
+    def get(self, resource: str) -> Optional[str]:
+        """Current version of a resource, or ``None`` if unknown."""
+        return self.redis_client.get(resource_version_key(resource))
@@ -0,0 +1,174 @@
+"""Retry policies with decorrelated jitter backoff and per-task-type retry budgets."""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import redis
+
+from ..core.config import get_settings
+from ..core.metrics import task_retries_total
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Backoff and budget settings for a single task type."""
+
+    max_retries: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 300.0
+    budget_ratio: float = 0.1
+
+    def next_delay(
+        self,
+        previous_delay: Optional[float] = None,
+        rng: random.Random = None,
+    ) -> float:
+        """Compute the next backoff using decorrelated jitter.
+
+        ``sleep = min(max_delay, uniform(base_delay, previous_delay * 3))``
+        spreads retries of tasks that failed together instead of letting
+        them return in lockstep.
+        """
+        rng = rng or random
+        previous = max(previous_delay or self.base_delay, self.base_delay)
+        return min(self.max_delay, rng.uniform(self.base_delay, previous * 3))
+
+
+@dataclass(frozen=True)
+class RetryDecision:
+    """Outcome of a retry evaluation."""
+
+    retry: bool
+    delay: float = 0.0
+    reason: str = "retried"
+
+
+class RetryBudget:
+    """Caps retry traffic to a fraction of total attempts per task type.
+
+    Attempts and retries are counted in fixed Redis buckets of ``window``
+    seconds. The previous bucket is weighted by how much of it still
+    overlaps the sliding window, so the budget does not reset abruptly.
+    """
+
+    KEY_PREFIX = "retry_budget"
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        window: int = 60,
+        min_retries: int = 10,
+    ):
+        self.redis_client = redis_client
+        self.window = window
+        self.min_retries = min_retries
+
+    def _key(self, task_type: str, bucket: int) -> str:
+        return f"{self.KEY_PREFIX}:{task_type}:{bucket}"
+
+    def _current_bucket(self, now: float) -> int:
+        return int(now // self.window)
+
+    def record_attempt(self, task_type: str, now: float = None) -> None:
+        """Count an execution attempt towards the task type's budget."""
+        key = self._key(task_type, self._current_bucket(now or time.time()))
+        pipe = self.redis_client.pipeline()
+        pipe.hincrby(key, "attempts", 1)
+        pipe.expire(key, self.window * 2)
+        pipe.execute()
+
+    def try_acquire(self, task_type: str, ratio: float, now: float = None) -> bool:
+        """Reserve one retry if the task type is still within budget."""
+        now = now or time.time()
+        bucket = self._current_bucket(now)
+        current_key = self._key(task_type, bucket)
+        previous_key = self._key(task_type, bucket - 1)
+
+        pipe = self.redis_client.pipeline()
+        pipe.hincrby(current_key, "retries", 1)
+        pipe.expire(current_key, self.window * 2)
+        pipe.hgetall(current_key)
+        pipe.hgetall(previous_key)
+        _, _, current, previous = pipe.execute()
+
+        overlap = 1.0 - (now % self.window) / self.window
+        attempts = int(current.get("attempts", 0)) + overlap * int(
+            previous.get("attempts", 0)
+        )
+        retries = int(current.get("retries", 0)) + overlap * int(
+            previous.get("retries", 0)
+        )
+
+        if retries <= max(self.min_retries, ratio * attempts):
+            return True
+
+        # Over budget: give the reservation back
+        self.redis_client.hincrby(current_key, "retries", -1)
+        return False
+
+
+class RetryPolicyEngine:
+    """Resolves retry decisions for failed tasks based on their task type."""
+
+    def __init__(
+        self,
+        budget: Optional[RetryBudget] = None,
+        default_policy: Optional[RetryPolicy] = None,
+    ):
+        self.budget = budget
+        self.default_policy = default_policy or RetryPolicy()
+        self._policies: Dict[str, RetryPolicy] = {}
+
+    def register(self, task_type: str, policy: RetryPolicy) -> None:
+        """Register a retry policy for a task type."""
+        self._policies[task_type] = policy
+
+    def policy_for(self, task_type: str) -> RetryPolicy:
+        """Get the retry policy for a task type."""
+        return self._policies.get(task_type, self.default_policy)
+
+    def record_attempt(self, task_type: str) -> None:
+        """Record an execution attempt for budget accounting."""
+        if self.budget:
+            self.budget.record_attempt(task_type)
+
+    def decide(
+        self,
+        task_type: str,
+        retries: int,
+        previous_delay: Optional[float] = None,
+    ) -> RetryDecision:
+        """Decide whether a failed task is retried and after which delay."""
+        policy = self.policy_for(task_type)
+
+        if retries >= policy.max_retries:
+            decision = RetryDecision(retry=False, reason="max_retries_exceeded")
+        elif self.budget and not self.budget.try_acquire(
+            task_type, policy.budget_ratio
+        ):
+            decision = RetryDecision(retry=False, reason="budget_exhausted")
+        else:
+            decision = RetryDecision(
+                retry=True, delay=policy.next_delay(previous_delay)
+            )
+
+        task_retries_total.labels(task_type=task_type, decision=decision.reason).inc()
+        return decision
+
+
+def create_retry_engine(redis_client: redis.Redis) -> RetryPolicyEngine:
+    """Create a retry engine configured from application settings."""
+    settings = get_settings()
+    budget = RetryBudget(
+        redis_client,
+        window=settings.retry_budget_window,
+        min_retries=settings.retry_budget_min_retries,
+    )
+    default_policy = RetryPolicy(
+        base_delay=settings.retry_base_delay,
+        max_delay=settings.retry_max_delay,
+        budget_ratio=settings.retry_budget_ratio,
+    )
+    return RetryPolicyEngine(budget=budget, default_policy=default_policy)
@@ -0,0 +1,258 @@
+"""Speculative re-execution of straggler tasks.
+
+A task running much longer than its type usually takes is often stuck on
+a slow or overloaded worker rather than doing more work. For task types
+configured as idempotent, the detector launches a duplicate of such a
+straggler elsewhere. Whichever attempt finishes first records itself as
+the winner in Redis; the other is revoked, or discards its result if it
+finishes anyway.
+
+A task is judged against the run-time distribution of its type over a
+recent window (``TaskStats.duration_histograms``), using a baseline
+percentile:
+
+- Without progress reports, it is a straggler once its elapsed time
+  exceeds the baseline times a multiplier.
+- With progress reports, its remaining time is projected from its
+  progress rate. It is a straggler when it is projected to overrun that
+  threshold and a fresh copy, expected to take the baseline, would
+  finish first.
+"""
+
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis
+import structlog
+
+from ..core.config import get_settings
+from ..core.metrics import speculative_executions_total
+from .leases import LeaseRegistry, TaskLease
+from .task_stats import TaskStats, histogram_percentile
+
+logger = structlog.get_logger(__name__)
+
+PRIMARY = "primary"
+SPECULATIVE = "speculative"
+
+
+def attempt_message_id(task_id: str, key: Optional[str] = None) -> str:
+    """Celery task id to publish an attempt of a task under.
+
+    Distinct from the task id, so revoking the attempt after it loses a
+    race never blocks later publications of the task. A ``key`` makes
+    the id deterministic, so republishing one message keeps its id.
+    """
+    return f"{task_id}.{key or uuid.uuid4().hex}"
+
+
+def speculative_task_id(message_id: str) -> str:
+    """Celery task id of the speculative copy of an attempt."""
+    return f"{message_id}.{SPECULATIVE}"
+
+
+class SpeculationLedger:
+    """Redis records of launched speculative copies and race winners.
+
+    Copies count against the in-flight budget until their race is decided
+    or cancelled, and at most ``active_ttl`` after launch: by then the
+    copy has hit the task time limit or never started.
+    """
+
+    ACTIVE_KEY = "speculation:active"
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        ttl: int = 24 * 3600,
+        active_ttl: float = 30 * 60,
+    ):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.active_ttl = active_ttl
+
+    def _launched_key(self, task_id: str) -> str:
+        return f"speculation:launched:{task_id}"
+
+    def _started_key(self, task_id: str) -> str:
+        return f"speculation:started:{task_id}"
+
+    def _winner_key(self, task_id: str) -> str:
+        return f"speculation:winner:{task_id}"
+
+    def launch(self, task_id: str, now: Optional[float] = None) -> bool:
+        """Record a copy as launched; ``False`` if one already was."""
+        now = time.time() if now is None else now
+        key = self._launched_key(task_id)
+        if not self.redis_client.set(key, now, nx=True, ex=self.ttl):
+            return False
+        self.redis_client.zadd(self.ACTIVE_KEY, {task_id: now})
+        return True
+
+    def start(self, task_id: str, now: Optional[float] = None) -> None:
+        """Record that a launched copy has started running on a worker."""
+        now = time.time() if now is None else now
+        self.redis_client.set(self._started_key(task_id), now, ex=self.ttl)
+
+    def cancel(self, task_id: str, relaunch: bool = False) -> None:
+        """Drop a copy that will not run, allowing another if ``relaunch``."""
+        pipe = self.redis_client.pipeline()
+        pipe.zrem(self.ACTIVE_KEY, task_id)
+        if relaunch:
+            pipe.delete(self._launched_key(task_id))
+        pipe.execute()
+
+    def in_flight(self, now: Optional[float] = None) -> int:
+        """Number of copies launched whose race is undecided."""
+        now = time.time() if now is None else now
+        self.redis_client.zremrangebyscore(
+            self.ACTIVE_KEY, "-inf", now - self.active_ttl
+        )
+        return self.redis_client.zcard(self.ACTIVE_KEY)
+
+    def winner(self, task_id: str) -> Optional[str]:
+        """Attempt that finished the task first, if any has."""
+        return self.redis_client.get(self._winner_key(task_id))
+
+    def finish(
+        self, task_id: str, attempt: str
+    ) -> Tuple[bool, Optional[float], Optional[float]]:
+        """Record ``attempt`` as finished first unless another already was.
+
+        Returns whether it won, when a copy was launched and when the copy
+        started running; the times are ``None`` if that never happened.
+        """
+        pipe = self.redis_client.pipeline()
+        pipe.set(self._winner_key(task_id), attempt, nx=True, ex=self.ttl)
+        pipe.get(self._launched_key(task_id))
+        pipe.get(self._started_key(task_id))
+        won, launched_at, started_at = pipe.execute()
+        if won and launched_at:
+            self.redis_client.zrem(self.ACTIVE_KEY, task_id)
+        return (
+            bool(won),
+            float(launched_at) if launched_at else None,
+            float(started_at) if started_at else None,
+        )
+
+
+class StragglerDetector:
+    """Finds straggling attempts of speculative task types and copies them."""
+
+    def __init__(
+        self,
+        registry: LeaseRegistry,
+        stats: TaskStats,
+        ledger: SpeculationLedger,
+        launch: Callable[[TaskLease], None],
+        task_types: Iterable[str],
+        percentile: float = 75.0,
+        multiplier: float = 1.5,
+        min_samples: int = 20,
+        window: int = 3600,
+        max_in_flight: int = 10,
+    ):
+        self.registry = registry
+        self.stats = stats
+        self.ledger = ledger
+        self.launch = launch
+        self.task_types = frozenset(task_types)
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.window = window
+        self.max_in_flight = max_in_flight
+
+    def baselines(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Baseline run time of each speculative task type with enough data."""
+        histograms = self.stats.duration_histograms(self.window, now)
+        baselines: Dict[str, float] = {}
+        for task_type in self.task_types:
+            histogram = histograms.get(task_type, {})
+            if sum(histogram.values()) < self.min_samples:
+                continue
+            baseline = histogram_percentile(histogram, self.percentile)
+            if baseline is not None and baseline != float("inf"):
+                baselines[task_type] = baseline
+        return baselines
+
+    def is_straggler(
+        self, elapsed: float, progress: Optional[float], baseline: float
+    ) -> bool:
+        """Whether an attempt is worth copying; see the module docstring."""
+        threshold = baseline * self.multiplier
+        if not progress:
+            return elapsed > threshold
+        if progress >= 1.0:
+            return False
+        remaining = elapsed * (1.0 - progress) / progress
+        return elapsed + remaining > threshold and remaining > baseline
+
+    def scan(self, now: Optional[float] = None) -> int:
+        """Launch copies of current stragglers, returning how many."""
+        now = time.time() if now is None else now
+        if not self.task_types:
+            return 0
+        baselines = self.baselines(now)
+        if not baselines:
+            return 0
+
+        candidates: List[TaskLease] = [
+            lease for lease in self.registry.leases() if lease.task_type in baselines
+        ]
+        progress = self.registry.progress([lease.attempt_id for lease in candidates])
+        stragglers = [
+            lease
+            for lease in candidates
+            if self.is_straggler(
+                now - lease.acquired_at,
+                progress.get(lease.attempt_id),
+                baselines[lease.task_type],
+            )
+        ]
+        # Longest-running first, within the in-flight budget
+        stragglers.sort(key=lambda lease: lease.acquired_at)
+        budget = self.max_in_flight - self.ledger.in_flight(now)
+
+        launched = 0
+        for lease in stragglers:
+            if launched >= budget:
+                break
+            if self.ledger.winner(lease.task_id):
+                continue
+            if not self.ledger.launch(lease.task_id, now):
+                continue
+            try:
+                self.launch(lease)
+            except Exception as e:
+                logger.error(
+                    "Speculative launch failed", task_id=lease.task_id, error=str(e)
+                )
+                self.ledger.cancel(lease.task_id, relaunch=True)
+                continue
+            launched += 1
+            speculative_executions_total.labels(
+                task_type=lease.task_type, result="launched"
+            ).inc()
+            logger.info(
+                "Launched speculative copy of straggler",
+                task_id=lease.task_id,
+                task_type=lease.task_type,
+                worker=lease.worker,
+                elapsed=now - lease.acquired_at,
+                baseline=baselines[lease.task_type],
+            )
+        return launched
+
+
+def create_speculation_ledger(
+    redis_client: redis.Redis, active_ttl: float = 30 * 60
+) -> SpeculationLedger:
+    """Create a speculation ledger configured from settings.
+
+    ``active_ttl`` should be the workers' task time limit.
+    """
+    return SpeculationLedger(
+        redis_client, ttl=get_settings().speculation_ttl, active_ttl=active_ttl
+    )
@@ -0,0 +1,393 @@
+"""Incrementally maintained task statistics.
+
+Every status transition updates a handful of Redis counters, so the stats
+endpoint reads a fixed number of hashes instead of grouping over tasks:
+
+- ``task_stats:tasks``: the tracked state of each unfinished task, from
+  which counters are decremented on its next transition.
+- ``task_stats:current``: unfinished tasks by status, task type, priority
+  and, for pending tasks, broker queue.
+- ``task_stats:totals``: finished tasks by the same dimensions.
+- ``task_stats:rollup:{bucket}``: per time bucket, outcomes by task type
+  and tenant plus a duration histogram per task type.
+
+Each transition reads the task's tracked state and writes the counters
+in one WATCH/MULTI transaction, guarded by a per-task key so that only
+transitions of the same task contend.
+
+``reconcile`` corrects current counters that drifted from the tracked
+states, and expires tasks stuck in an unfinished state for longer than
+``stale_after``, whose final transition was lost (say, with a worker or
+a message).
+"""
+
+import bisect
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import redis
+import structlog
+
+from ..core.config import get_settings
+from ..core.metrics import (
+    task_queue_size,
+    task_stats_corrections_total,
+    task_stats_expired_total,
+)
+from .resource_versions import ResourceVersions
+
+logger = structlog.get_logger(__name__)
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+SUCCESS = "SUCCESS"
+FAILED = "FAILED"
+TERMINAL_STATUSES = frozenset({SUCCESS, FAILED})
+
+# Upper bounds of the duration histogram, in seconds
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0, 1800.0)
+
+
+def _duration_bucket(duration: float) -> str:
+    index = bisect.bisect_left(DURATION_BUCKETS, duration)
+    return "inf" if index == len(DURATION_BUCKETS) else repr(DURATION_BUCKETS[index])
+
+
+def _counter_fields(record: Dict[str, Any]) -> List[str]:
+    """Counter fields a task in this state contributes to."""
+    status = record["status"]
+    fields = [f"status:{status}"]
+    if record.get("task_type"):
+        fields.append(f"type:{record['task_type']}:{status}")
+    if record.get("priority"):
+        fields.append(f"priority:{record['priority']}:{status}")
+    if status == PENDING and record.get("queue"):
+        fields.append(f"queue:{record['queue']}")
+    return fields
+
+
+def histogram_percentile(histogram: Dict[str, int], pct: float) -> Optional[float]:
+    """Upper bound of the histogram bucket holding the percentile."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = pct / 100 * total
+    seen = 0
+    for bound in list(map(repr, DURATION_BUCKETS)) + ["inf"]:
+        seen += histogram.get(bound, 0)
+        if seen >= rank:
+            return float(bound)
+    return float("inf")
+
+
+def _merge_rollups(
+    rollups: List[Dict[str, str]], kind: str
+) -> Dict[str, Dict[str, int]]:
+    """Sum ``kind:name:label`` rollup fields across time buckets."""
+    merged: Dict[str, Dict[str, int]] = {}
+    for rollup in rollups:
+        for field, value in rollup.items():
+            field_kind, _, rest = field.partition(":")
+            if field_kind != kind:
+                continue
+            name, _, label = rest.rpartition(":")
+            counts = merged.setdefault(name, {})
+            counts[label] = counts.get(label, 0) + int(value)
+    return merged
+
+
+class TaskStats:
+    """Redis-backed task counters updated on status transitions."""
+
+    STATE_KEY = "task_stats:tasks"
+    CURRENT_KEY = "task_stats:current"
+    TOTALS_KEY = "task_stats:totals"
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        bucket_seconds: int = 300,
+        retention: int = 7 * 24 * 3600,
+        stale_after: int = 24 * 3600,
+        versions: Optional[ResourceVersions] = None,
+    ):
+        self.redis_client = redis_client
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        self.stale_after = stale_after
+        # Invalidates cached stats responses when reconcile changes counters
+        self.versions = versions
+
+    def _guard_key(self, task_id: str) -> str:
+        return f"task_stats:guard:{task_id}"
+
+    def _rollup_key(self, bucket: int) -> str:
+        return f"task_stats:rollup:{bucket}"
+
+    def _bucket(self, now: float) -> int:
+        return int(now // self.bucket_seconds) * self.bucket_seconds
+
+    def _rollup_keys(self, window: int, now: float) -> List[str]:
+        first_bucket = self._bucket(now - window + self.bucket_seconds)
+        buckets = range(first_bucket, self._bucket(now) + 1, self.bucket_seconds)
+        return [self._rollup_key(bucket) for bucket in buckets]
+
+    def transition(
+        self,
+        task_id: str,
+        status: str,
+        task_type: Optional[str] = None,
+        queue: Optional[str] = None,
+        priority: Optional[str] = None,
+        tenant: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        """Move a task to ``status``, updating every affected counter.
+
+        Attributes not given are carried over from the task's previous
+        state, so only the first transition (publication) needs them all.
+        """
+        now = time.time() if now is None else now
+        guard_key = self._guard_key(task_id)
+        with self.redis_client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(guard_key)
+                    raw = pipe.hget(self.STATE_KEY, task_id)
+                    previous = json.loads(raw) if raw else None
+
+                    record = dict(previous or {})
+                    for name, value in (
+                        ("task_type", task_type),
+                        ("queue", queue),
+                        ("priority", priority),
+                        ("tenant", tenant),
+                    ):
+                        if value is not None:
+                            record[name] = value
+                    record["status"] = status
+                    record["since"] = now
+
+                    pipe.multi()
+                    if previous:
+                        for field in _counter_fields(previous):
+                            pipe.hincrby(self.CURRENT_KEY, field, -1)
+
+                    if status in TERMINAL_STATUSES:
+                        pipe.hdel(self.STATE_KEY, task_id)
+                        for field in _counter_fields(record):
+                            pipe.hincrby(self.TOTALS_KEY, field, 1)
+                        self._record_outcome(pipe, record, previous, now)
+                    else:
+                        pipe.hset(self.STATE_KEY, task_id, json.dumps(record))
+                        for field in _counter_fields(record):
+                            pipe.hincrby(self.CURRENT_KEY, field, 1)
+                    self._bump_guard(pipe, guard_key)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    # Another transition of this task landed first
+                    continue
+
+    def _bump_guard(self, pipe: redis.client.Pipeline, guard_key: str) -> None:
+        # Only a change is needed to abort concurrent transactions; the
+        # key need not outlive the task's tracked state.
+        pipe.incr(guard_key)
+        pipe.expire(guard_key, self.stale_after)
+
+    def _record_outcome(
+        self,
+        pipe: redis.client.Pipeline,
+        record: Dict[str, Any],
+        previous: Optional[Dict[str, Any]],
+        now: float,
+    ) -> None:
+        key = self._rollup_key(self._bucket(now))
+        status = record["status"]
+        task_type = record.get("task_type", "unknown")
+        pipe.hincrby(key, f"type:{task_type}:{status}", 1)
+        if record.get("tenant"):
+            pipe.hincrby(key, f"tenant:{record['tenant']}:{status}", 1)
+        if previous and previous["status"] == RUNNING:
+            bucket = _duration_bucket(now - previous["since"])
+            pipe.hincrby(key, f"duration:{task_type}:{bucket}", 1)
+        pipe.expire(key, self.retention)
+
+    def forget(self, task_id: str) -> None:
+        """Stop tracking a task without recording an outcome."""
+        self._untrack(task_id)
+
+    def _untrack(self, task_id: str, since: Optional[float] = None) -> int:
+        """Drop a task's state, optionally only if it is unchanged ``since``.
+
+        Returns the number of counters decremented.
+        """
+        guard_key = self._guard_key(task_id)
+        with self.redis_client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(guard_key)
+                    raw = pipe.hget(self.STATE_KEY, task_id)
+                    if not raw:
+                        return 0
+                    record = json.loads(raw)
+                    if since is not None and record.get("since") != since:
+                        # Moved on since it was found stale
+                        return 0
+                    fields = _counter_fields(record)
+                    pipe.multi()
+                    for field in fields:
+                        pipe.hincrby(self.CURRENT_KEY, field, -1)
+                    pipe.hdel(self.STATE_KEY, task_id)
+                    self._bump_guard(pipe, guard_key)
+                    pipe.execute()
+                    return len(fields)
+                except redis.WatchError:
+                    continue
+
+    def snapshot(
+        self, window: int = 3600, now: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Current counts plus outcome rates and durations over ``window``.
+
+        Reads three hashes and one per time bucket in the window, whatever
+        the number of tasks.
+        """
+        now = time.time() if now is None else now
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hgetall(self.CURRENT_KEY)
+        pipe.hgetall(self.TOTALS_KEY)
+        for key in self._rollup_keys(window, now):
+            pipe.hgetall(key)
+        current, totals, *rollups = pipe.execute()
+
+        by_status: Dict[str, int] = {}
+        by_priority: Dict[str, Dict[str, int]] = {}
+        by_task_type: Dict[str, Dict[str, int]] = {}
+        queue_depths: Dict[str, int] = {}
+        for counters in (current, totals):
+            for field, value in counters.items():
+                count = int(value)
+                kind, _, rest = field.partition(":")
+                if kind == "status":
+                    by_status[rest] = by_status.get(rest, 0) + count
+                elif kind == "queue":
+                    queue_depths[rest] = count
+                elif kind in ("type", "priority"):
+                    name, _, status = rest.rpartition(":")
+                    target = by_task_type if kind == "type" else by_priority
+                    target.setdefault(name, {})
+                    target[name][status] = target[name].get(status, 0) + count
+
+        outcomes = _merge_rollups(rollups, "tenant")
+        durations = _merge_rollups(rollups, "duration")
+
+        success_rate_by_tenant = {
+            tenant: counts.get(SUCCESS, 0) / total
+            for tenant, counts in outcomes.items()
+            if (total := counts.get(SUCCESS, 0) + counts.get(FAILED, 0))
+        }
+        duration_p95_by_task_type = {
+            task_type: histogram_percentile(histogram, 95)
+            for task_type, histogram in durations.items()
+        }
+
+        return {
+            "by_status": by_status,
+            "by_priority": by_priority,
+            "by_task_type": by_task_type,
+            "queue_depths": queue_depths,
+            "window_seconds": window,
+            "success_rate_by_tenant": success_rate_by_tenant,
+            "duration_p95_by_task_type": duration_p95_by_task_type,
+        }
+
+    def duration_histograms(
+        self, window: int = 3600, now: Optional[float] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """Run-time histograms per task type over ``window``.
+
+        Keyed by the upper bounds of ``DURATION_BUCKETS``, the same buckets
+        as ``task_duration_seconds``, but shared by every process.
+        """
+        now = time.time() if now is None else now
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in self._rollup_keys(window, now):
+            pipe.hgetall(key)
+        return _merge_rollups(pipe.execute(), "duration")
+
+    def reconcile(self, now: Optional[float] = None) -> int:
+        """Correct drifted current counters and expire stale task states.
+
+        The counters and task states are read in one MULTI snapshot, and
+        each drifted counter is corrected by its difference with HINCRBY:
+        a transition landing after the snapshot moves the counter and its
+        expected value alike, so it is neither overwritten nor able to
+        abort the pass. Stale tasks are then expired one at a time under
+        their own guard keys, as in ``forget``.
+
+        Any change invalidates cached task collection responses.
+
+        Returns the number of counters corrected, counting each counter of
+        an expired task.
+        """
+        now = time.time() if now is None else now
+        pipe = self.redis_client.pipeline()
+        pipe.hgetall(self.CURRENT_KEY)
+        pipe.hgetall(self.STATE_KEY)
+        current, states = pipe.execute()
+
+        expected: Dict[str, int] = {}
+        stale: Dict[str, float] = {}
+        for task_id, raw in states.items():
+            record = json.loads(raw)
+            if now - record.get("since", now) > self.stale_after:
+                stale[task_id] = record.get("since")
+            for field in _counter_fields(record):
+                expected[field] = expected.get(field, 0) + 1
+        drift = {
+            field: expected.get(field, 0) - int(current.get(field, 0))
+            for field in set(expected) | set(current)
+        }
+        drift = {field: delta for field, delta in drift.items() if delta}
+
+        if drift:
+            pipe = self.redis_client.pipeline()
+            for field, delta in drift.items():
+                pipe.hincrby(self.CURRENT_KEY, field, delta)
+            pipe.execute()
+            task_stats_corrections_total.inc(len(drift))
+            logger.warning("Task statistics drift corrected", counters=len(drift))
+
+        expired = 0
+        expired_counters = 0
+        for task_id, since in stale.items():
+            counters = self._untrack(task_id, since=since)
+            if counters:
+                expired += 1
+                expired_counters += counters
+        if expired:
+            task_stats_expired_total.inc(expired)
+            logger.warning("Stale task states expired", tasks=expired)
+        if (drift or expired) and self.versions:
+            self.versions.touch_tasks(now)
+        return len(drift) + expired_counters
+
+
+def publish_queue_sizes(snapshot: Dict[str, Any]) -> None:
+    """Feed pending-task counts per queue to the ``task_queue_size`` gauge."""
+    for queue_name, depth in snapshot["queue_depths"].items():
+        task_queue_size.labels(queue_name=queue_name).set(depth)
+
+
+def create_task_stats(redis_client: redis.Redis) -> TaskStats:
+    """Create task statistics configured from settings."""
+    settings = get_settings()
+    return TaskStats(
+        redis_client,
+        bucket_seconds=settings.task_stats_bucket_seconds,
+        retention=settings.task_stats_retention,
+        stale_after=settings.task_stats_stale_after,
+        versions=ResourceVersions(redis_client),
+    )
@@ -0,0 +1,123 @@
+"""Per-process asyncio execution pool for I/O-bound task handlers.
+
+Each worker process runs one event loop in a background thread. Pool
+threads submit ``async`` handlers to it and block on the result, so with
+``--pool=threads`` a single process keeps many I/O-bound tasks in flight
+while they share one set of pooled HTTP and database connections.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Any, Awaitable, Optional
+
+import asyncpg
+import httpx
+import structlog
+
+from ..core.config import get_settings
+from ..core.metrics import async_tasks_in_flight
+
+logger = structlog.get_logger(__name__)
+
+
+class AsyncExecutor:
+    """Event loop thread with a concurrency semaphore and shared clients."""
+
+    def __init__(self, concurrency: int = 100):
+        self.concurrency = concurrency
+        self.loop = asyncio.new_event_loop()
+        # Loop-agnostic until first used, which happens on the loop thread
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._db_pool_lock = asyncio.Lock()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._db_pool: Optional[asyncpg.Pool] = None
+        self._thread = threading.Thread(
+            target=self._run_loop, name="async-executor", daemon=True
+        )
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _bounded(self, coro: Awaitable[Any]) -> Any:
+        async with self._semaphore:
+            async_tasks_in_flight.inc()
+            try:
+                return await coro
+            finally:
+                async_tasks_in_flight.dec()
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for it."""
+        future = asyncio.run_coroutine_threadsafe(self._bounded(coro), self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client; call from coroutines on the loop."""
+        if self._http_client is None:
+            settings = get_settings()
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.async_pool_http_max_connections,
+                    max_keepalive_connections=settings.async_pool_http_max_connections,
+                ),
+                timeout=settings.async_pool_http_timeout,
+            )
+        return self._http_client
+
+    async def db_pool(self) -> asyncpg.Pool:
+        """Shared asyncpg connection pool; call from coroutines on the loop."""
+        async with self._db_pool_lock:
+            if self._db_pool is None:
+                settings = get_settings()
+                self._db_pool = await asyncpg.create_pool(
+                    settings.database_url.replace("+asyncpg", ""),
+                    min_size=1,
+                    max_size=settings.async_pool_db_max_size,
+                )
+        return self._db_pool
+
+    async def _close_resources(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        if self._db_pool is not None:
+            await self._db_pool.close()
+
+    def shutdown(self) -> None:
+        """Close shared clients and stop the loop."""
+        asyncio.run_coroutine_threadsafe(self._close_resources(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+_executor: Optional[AsyncExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def get_async_executor() -> AsyncExecutor:
+    """Get this process's executor, creating it after a fork if needed."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = AsyncExecutor(get_settings().async_pool_concurrency)
+            _executor_pid = os.getpid()
+            logger.info("Async executor started", concurrency=_executor.concurrency)
+    return _executor
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP client for ``async`` handlers."""
+    return get_async_executor().http_client()
+
+
+async def get_db_pool() -> asyncpg.Pool:
+    """Pooled asyncpg connections for ``async`` handlers."""
+    return await get_async_executor().db_pool()
@@ -2,15 +2,30 @@
 
 from celery import Celery
 from ..core.config import get_settings
+from .routing import route_by_task_type
 
 settings = get_settings()
 
+broker_url = settings.celery_broker_url
+broker_transport_options = {}
+if settings.celery_broker_backend == "postgres":
+    from . import pg_transport
+
+    pg_transport.register_transport()
+    broker_url = pg_transport.broker_url(settings.database_url)
+    broker_transport_options = {
+        # Must exceed task_time_limit, or acks_late tasks are redelivered
+        "visibility_timeout": settings.pg_queue_visibility_timeout,
+        "batch_size": settings.pg_queue_batch_size,
+        "polling_interval": settings.pg_queue_poll_interval,
+    }
+
 # Create Celery app
 celery_app = Celery(
     "task_worker",
-    broker=settings.celery_broker_url,
+    broker=broker_url,
     backend=settings.celery_result_backend,
-    include=["src.worker.tasks"]
+    include=["src.worker.tasks", *settings.task_handler_modules]
 )
 
 # Configure Celery
@@ -26,8 +41,17 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
     task_acks_late=True,
     worker_disable_rate_limits=False,
-    task_routes={
-        "src.worker.tasks.execute_task": {"queue": "default"},
-        "src.worker.tasks.execute_high_priority_task": {"queue": "high_priority"},
-    }
-)
\ No newline at end of file
+    broker_transport_options=broker_transport_options,
+    # Remote control needs fanout exchanges, which the Postgres queue lacks
+    worker_enable_remote_control=settings.celery_broker_backend != "postgres",
+    task_routes=(route_by_task_type,)
+)
+
+# Count task status transitions in every process that publishes or runs tasks
+from . import stats_signals  # noqa: E402,F401
+
+# Subscribe workers to the host-specific queues used by locality routing
+from . import locality  # noqa: E402,F401
+
+# Check async handlers against ASYNC_POOL_TASK_TYPES when a worker starts
+from . import handlers  # noqa: E402,F401
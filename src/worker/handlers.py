@@ -0,0 +1,126 @@
+"""Registry of task handlers keyed by task type."""
+
+import asyncio
+import importlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+from celery.signals import celeryd_after_setup
+
+from ..core.config import get_settings
+from ..core.exceptions import TaskValidationError
+from ..services.retry_policy import RetryPolicy
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class TaskHandler:
+    """A registered handler and the execution metadata of its task type."""
+
+    task_type: str
+    func: Callable[[Dict[str, Any]], Any]
+    retry_policy: Optional[RetryPolicy] = None
+    cacheable: bool = False
+    version: str = "1"
+    is_async: bool = False
+
+
+_handlers: Dict[str, TaskHandler] = {}
+
+
+def register_handler(
+    task_type: str,
+    retry_policy: Optional[RetryPolicy] = None,
+    cacheable: bool = False,
+    version: str = "1",
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator registering a function as the handler for a task type.
+
+    The handler receives the task ``parameters`` and returns a
+    JSON-serializable result. ``cacheable`` handlers must be deterministic
+    in their parameters: their results are memoized until ``version`` is
+    bumped.
+
+    ``async def`` handlers run on the worker's event loop. Routing them to
+    the I/O queue is configured by ``ASYNC_POOL_TASK_TYPES``, so that
+    publishers do not need the handlers imported.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        _handlers[task_type] = TaskHandler(
+            task_type=task_type,
+            func=func,
+            retry_policy=retry_policy,
+            cacheable=cacheable,
+            version=version,
+            is_async=asyncio.iscoroutinefunction(func),
+        )
+        return func
+
+    return decorator
+
+
+def get_handler(task_type: str) -> TaskHandler:
+    """Get the handler registered for a task type."""
+    try:
+        return _handlers[task_type]
+    except KeyError:
+        raise TaskValidationError(f"No handler registered for task type '{task_type}'")
+
+
+def registered_handlers() -> Dict[str, TaskHandler]:
+    """Get a snapshot of all registered handlers."""
+    return dict(_handlers)
+
+
+def load_handler_modules() -> None:
+    """Import the modules in ``TASK_HANDLER_MODULES``, registering handlers.
+
+    Needed by every process that decides how a task runs or is retried:
+    the workers, and the lease reaper applying handlers' retry policies
+    to the tasks it reclaims.
+    """
+    for module in get_settings().task_handler_modules:
+        importlib.import_module(module)
+
+
+def async_routing_mismatches() -> Dict[str, List[str]]:
+    """Task types whose handler disagrees with ``ASYNC_POOL_TASK_TYPES``.
+
+    ``async_unrouted`` are async handlers left on the prefork queues, where
+    each blocks a process for its whole run; ``sync_routed`` are blocking
+    handlers sent to the I/O queue, where each holds a pool thread.
+    """
+    routed = set(get_settings().async_pool_task_types)
+    handlers = registered_handlers()
+    return {
+        "async_unrouted": sorted(
+            task_type
+            for task_type, handler in handlers.items()
+            if handler.is_async and task_type not in routed
+        ),
+        "sync_routed": sorted(
+            task_type
+            for task_type, handler in handlers.items()
+            if not handler.is_async and task_type in routed
+        ),
+    }
+
+
+@celeryd_after_setup.connect
+def check_async_routing(sender: str, instance: Any, **kwargs: Any) -> None:
+    """Warn at worker startup about handlers routed to the wrong pool."""
+    load_handler_modules()
+    mismatches = async_routing_mismatches()
+    if mismatches["async_unrouted"]:
+        logger.warning(
+            "Async handlers missing from ASYNC_POOL_TASK_TYPES block prefork workers",
+            task_types=mismatches["async_unrouted"],
+        )
+    if mismatches["sync_routed"]:
+        logger.warning(
+            "Blocking handlers in ASYNC_POOL_TASK_TYPES hold I/O worker threads",
+            task_types=mismatches["sync_routed"],
+        )
@@ -0,0 +1,149 @@
+"""Per-process lease heartbeat for the tasks a worker is running.
+
+Each worker process holds one ``LeaseKeeper``. Task attempts register
+their lease when they start and drop it when they finish, and a single background
+thread renews every held lease in one Redis call per interval, so the
+heartbeat cost does not grow with ``--concurrency``.
+
+Handlers may call ``report_progress`` as they work; the latest value is
+sent with the next heartbeat, however often it is reported.
+"""
+
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, Optional, Set
+
+import structlog
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis_client
+from ..services.leases import LeaseRegistry, TaskLease, create_lease_registry
+
+logger = structlog.get_logger(__name__)
+
+# Lease attempt id of the task running in the current thread or coroutine
+_current_attempt_id: ContextVar[Optional[str]] = ContextVar(
+    "current_attempt_id", default=None
+)
+
+
+class LeaseKeeper:
+    """Holds the leases of running tasks and renews them together."""
+
+    def __init__(self, registry: LeaseRegistry, interval: float = 10.0):
+        self.registry = registry
+        self.interval = interval
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._attempt_ids: Set[str] = set()
+        self._progress: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="lease-heartbeat", daemon=True
+        )
+        self._thread.start()
+
+    def acquire(self, lease: TaskLease) -> bool:
+        """Start holding a task's lease; ``False`` for a fenced attempt."""
+        lease.worker = self.worker
+        if not self.registry.acquire(lease):
+            return False
+        with self._lock:
+            self._attempt_ids.add(lease.attempt_id)
+        return True
+
+    def release(self, attempt_id: str) -> None:
+        """Stop holding an attempt's lease once it has finished."""
+        with self._lock:
+            self._attempt_ids.discard(attempt_id)
+            self._progress.pop(attempt_id, None)
+        self.registry.release(attempt_id)
+
+    def report_progress(self, attempt_id: str, fraction: float) -> None:
+        """Record a held attempt's progress for the next heartbeat."""
+        with self._lock:
+            if attempt_id in self._attempt_ids:
+                self._progress[attempt_id] = min(max(fraction, 0.0), 1.0)
+
+    def heartbeat(self) -> None:
+        """Renew every held lease in one round trip."""
+        with self._lock:
+            attempt_ids = list(self._attempt_ids)
+            progress, self._progress = self._progress, {}
+        if not attempt_ids:
+            return
+        renewed = self.registry.renew(attempt_ids, progress=progress)
+        if renewed < len(attempt_ids):
+            with self._lock:
+                held = len(self._attempt_ids.intersection(attempt_ids))
+            if renewed < held:
+                # A reaper reclaimed them after missed heartbeats
+                logger.warning(
+                    "Leases lost while tasks were running",
+                    worker=self.worker,
+                    lost=held - renewed,
+                )
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error("Lease heartbeat failed", worker=self.worker, error=str(e))
+
+    def stop(self) -> None:
+        """Stop the heartbeat thread."""
+        self._stopped.set()
+        self._thread.join()
+
+
+_keeper: Optional[LeaseKeeper] = None
+_keeper_pid: Optional[int] = None
+_keeper_lock = threading.Lock()
+
+
+def get_lease_keeper() -> LeaseKeeper:
+    """Get this process's lease keeper, creating it after a fork if needed."""
+    global _keeper, _keeper_pid
+    with _keeper_lock:
+        if _keeper is None or _keeper_pid != os.getpid():
+            _keeper = LeaseKeeper(
+                create_lease_registry(get_redis_client()),
+                interval=get_settings().task_lease_heartbeat_interval,
+            )
+            _keeper_pid = os.getpid()
+    return _keeper
+
+
+@contextmanager
+def running_task(attempt_id: str) -> Iterator[None]:
+    """Attribute progress reported in this context to ``attempt_id``."""
+    token = _current_attempt_id.set(attempt_id)
+    try:
+        yield
+    finally:
+        _current_attempt_id.reset(token)
+
+
+async def run_as_task(attempt_id: str, coro: Awaitable[Any]) -> Any:
+    """Await a handler coroutine with progress attributed to ``attempt_id``.
+
+    Coroutines run on the event loop thread, which does not see the
+    context of the pool thread that submitted them.
+    """
+    with running_task(attempt_id):
+        return await coro
+
+
+def report_progress(fraction: float) -> None:
+    """Report the completed fraction, 0.0 to 1.0, of the running task.
+
+    Optional for handlers; the straggler detector uses it to estimate a
+    task's remaining time instead of going by elapsed time alone.
+    """
+    attempt_id = _current_attempt_id.get()
+    if attempt_id is not None:
+        get_lease_keeper().report_progress(attempt_id, fraction)
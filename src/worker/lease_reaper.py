@@ -0,0 +1,69 @@
+"""Reaper reclaiming tasks whose worker stopped heartbeating.
+
+Run with ``python -m src.worker.lease_reaper``; several instances can run
+side by side. It imports ``TASK_HANDLER_MODULES`` as the workers do, so
+reclaimed tasks are retried under their handlers' retry policies.
+"""
+
+import time
+
+import structlog
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis_client
+from ..services.fair_scheduler import create_tenant_limiter
+from ..services.leases import LeaseReaper, TaskLease, create_lease_registry
+from ..services.resource_versions import ResourceVersions
+from ..services.retry_policy import RetryDecision
+from ..services.speculation import attempt_message_id
+from ..services.task_stats import create_task_stats
+from .celery_app import celery_app
+from .routing import task_queue
+from .tasks import get_dead_letter_queue, get_retry_engine
+
+logger = structlog.get_logger(__name__)
+
+
+def requeue_task(lease: TaskLease, decision: RetryDecision) -> None:
+    """Publish the next attempt of a reclaimed task, as a retry would."""
+    celery_app.send_task(
+        lease.task_name,
+        args=[lease.task_id, lease.task_type, lease.parameters],
+        kwargs={"retry_delay": decision.delay},
+        queue=task_queue(lease.task_name, lease.task_type),
+        headers={"tenant": lease.tenant} if lease.tenant else None,
+        task_id=attempt_message_id(lease.task_id),
+        retries=lease.retries + 1,
+        countdown=decision.delay,
+    )
+
+
+def run_reaper() -> None:
+    """Reclaim expired leases, sleeping only when none are left."""
+    settings = get_settings()
+    redis_client = get_redis_client()
+    reaper = LeaseReaper(
+        create_lease_registry(redis_client),
+        get_retry_engine(),
+        requeue_task,
+        get_dead_letter_queue(),
+        limiter=create_tenant_limiter(redis_client),
+        stats=create_task_stats(redis_client),
+        versions=ResourceVersions(redis_client),
+        batch_size=settings.task_lease_reaper_batch_size,
+    )
+
+    logger.info("Lease reaper started", lease_ttl=settings.task_lease_ttl)
+    while True:
+        reclaimed = 0
+        try:
+            reclaimed = reaper.reap()
+        except Exception as e:
+            logger.error("Lease reaper pass failed", error=str(e), exc_info=True)
+
+        if reclaimed < settings.task_lease_reaper_batch_size:
+            time.sleep(settings.task_lease_reaper_interval)
+
+
+if __name__ == "__main__":
+    run_reaper()
@@ -0,0 +1,59 @@
+"""Worker side of locality-aware routing.
+
+With ``LOCALITY_ROUTING_ENABLED``, every worker also consumes the
+``<queue>@<host>`` variant of each queue it was started with, and
+advertises the data keys of the tasks it completes as warm on its host.
+"""
+
+import socket
+from typing import Any, Dict, List, Optional
+
+import structlog
+from celery.signals import celeryd_after_setup
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis_client
+from ..services.locality import (
+    LocalityRouter,
+    WarmDataRegistry,
+    create_locality_router,
+    locality_keys,
+    locality_queue,
+)
+
+logger = structlog.get_logger(__name__)
+
+# Shared queues this worker consumes; set before the pool forks
+_worker_queues: List[str] = []
+
+
+@celeryd_after_setup.connect
+def add_locality_queues(sender: str, instance: Any, **kwargs: Any) -> None:
+    """Consume the host-specific variant of every queue this worker serves."""
+    if not get_settings().locality_routing_enabled:
+        return
+    queues = instance.app.amqp.queues
+    host = socket.gethostname()
+    shared = [name for name in (queues.consume_from or queues) if "@" not in name]
+    for name in shared:
+        queues.select_add(locality_queue(name, host))
+    _worker_queues[:] = shared
+    logger.info("Consuming host queues", worker=sender, host=host, queues=shared)
+
+
+def get_locality_router() -> Optional[LocalityRouter]:
+    """Get the locality router, or ``None`` if locality routing is off."""
+    return create_locality_router(get_redis_client())
+
+
+def advertise_warm_data(parameters: Dict[str, Any]) -> None:
+    """Advertise a completed task's data keys as warm on this host."""
+    if not _worker_queues:
+        return
+    settings = get_settings()
+    keys = locality_keys(parameters, settings.locality_parameter_keys)
+    if not keys:
+        return
+    WarmDataRegistry(get_redis_client(), ttl=settings.locality_warm_ttl).advertise(
+        socket.gethostname(), keys, _worker_queues
+    )
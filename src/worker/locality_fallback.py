@@ -0,0 +1,49 @@
+"""Fallback scanner for locality routing's delay-scheduling window.
+
+Run with ``python -m src.worker.locality_fallback``; republishes tasks that
+waited too long in a host queue to their shared queue. Several instances
+can run side by side.
+"""
+
+import time
+from typing import Any, Dict
+
+import structlog
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis_client
+from ..services.locality import create_locality_router
+from .celery_app import celery_app
+
+logger = structlog.get_logger(__name__)
+
+BATCH_SIZE = 100
+
+
+def republish(message: Dict[str, Any]) -> None:
+    """Publish the shared-queue copy of a locality-routed task."""
+    celery_app.send_task(**message)
+
+
+def run_fallback() -> None:
+    """Move tasks past their locality window, sleeping only when none are."""
+    settings = get_settings()
+    router = create_locality_router(get_redis_client())
+    if router is None:
+        logger.warning("Locality routing is disabled; nothing to fall back")
+        return
+
+    logger.info("Locality fallback started", wait=settings.locality_wait)
+    while True:
+        moved = 0
+        try:
+            moved = router.fallback(republish, limit=BATCH_SIZE)
+        except Exception as e:
+            logger.error("Locality fallback pass failed", error=str(e), exc_info=True)
+
+        if moved < BATCH_SIZE:
+            time.sleep(settings.locality_fallback_interval)
+
+
+if __name__ == "__main__":
+    run_fallback()
@@ -0,0 +1,73 @@
+"""Relay publishing committed outbox rows to the Celery broker.
+
+Run with ``python -m src.worker.outbox_relay``; several instances can run
+side by side.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+
+import structlog
+
+from ..core.config import get_settings
+from ..core.database import get_session_factory
+from ..core.redis_client import get_redis_client
+from ..services.locality import create_locality_router
+from ..services.outbox import (
+    OutboxRelay,
+    make_celery_batch_publisher,
+    make_fair_batch_publisher,
+)
+from .celery_app import celery_app
+
+logger = structlog.get_logger(__name__)
+
+PURGE_INTERVAL = 300
+
+
+async def run_relay() -> None:
+    """Publish outbox batches back to back, sleeping only when drained."""
+    settings = get_settings()
+    redis_client = get_redis_client()
+    if settings.fair_scheduling_enabled:
+        # The fair dispatcher publishes them on to the broker
+        publish_batch = make_fair_batch_publisher(redis_client)
+    else:
+        publish_batch = make_celery_batch_publisher(
+            celery_app, router=create_locality_router(redis_client)
+        )
+    relay = OutboxRelay(
+        get_session_factory(),
+        publish_batch,
+        batch_size=settings.outbox_batch_size,
+        max_attempts=settings.outbox_max_attempts,
+        retry_backoff=settings.outbox_retry_backoff,
+        retry_backoff_max=settings.outbox_retry_backoff_max,
+    )
+    retention = timedelta(hours=settings.outbox_retention_hours)
+    last_purge = 0.0
+
+    logger.info(
+        "Outbox relay started",
+        batch_size=settings.outbox_batch_size,
+        fair_scheduling=settings.fair_scheduling_enabled,
+    )
+    while True:
+        claimed = 0
+        try:
+            claimed = await relay.relay_batch()
+            if time.time() - last_purge > PURGE_INTERVAL:
+                purged = await relay.purge_published(retention)
+                last_purge = time.time()
+                if purged:
+                    logger.info("Purged published outbox rows", count=purged)
+        except Exception as e:
+            logger.error("Outbox relay batch failed", error=str(e), exc_info=True)
+
+        if claimed < settings.outbox_batch_size:
+            await asyncio.sleep(settings.outbox_poll_interval)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_relay())
@@ -0,0 +1,221 @@
+"""Memoization of task results keyed by task type, parameters and code version.
+
+Each worker node keeps results in a size-bounded on-disk LRU. A shared
+Redis index records which node holds each result, and results small
+enough to inline, so a worker can serve a hit computed elsewhere.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+import structlog
+
+from ..core.config import get_settings
+from ..core.metrics import result_cache_requests_total
+
+logger = structlog.get_logger(__name__)
+
+MISS = object()
+
+
+def cache_key(task_type: str, parameters: Dict[str, Any], version: str) -> str:
+    """Stable hash of a task's inputs, independent of parameter ordering."""
+    canonical = json.dumps(
+        [task_type, version, parameters],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class DiskLRUCache:
+    """Size-bounded on-disk result store shared by the processes of a node.
+
+    Recency is kept in file mtimes, which hits refresh, so every prefork
+    child sees the same LRU order without coordinating. The directory is
+    only scanned when this process believes the budget is exceeded.
+    """
+
+    SUFFIX = ".json"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._approx_bytes = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        return (
+            entry
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(self.SUFFIX)
+        )
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Read a cached payload and mark it as recently used."""
+        path = self._path(key)
+        try:
+            payload = path.read_text()
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by this or a sibling process
+            return None
+        return payload
+
+    def put(self, key: str, payload: str) -> None:
+        """Atomically write a payload, evicting old entries if over budget."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                tmp.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            # Don't leave a partial file behind on a full disk
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+        self._approx_bytes += len(payload)
+        if self._approx_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries down to 90% of the budget."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._approx_bytes = total
+
+
+class SharedResultIndex:
+    """Redis index of cached results across all worker nodes."""
+
+    KEY_PREFIX = "result_cache"
+
+    def __init__(self, redis_client: redis.Redis, ttl: int = 24 * 3600):
+        self.redis_client = redis_client
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}:{key}"
+
+    def lookup(self, key: str) -> Dict[str, str]:
+        """Get the index entry for a result, empty if none exists."""
+        return self.redis_client.hgetall(self._key(key))
+
+    def publish(self, key: str, node: str, payload: str, inline: bool) -> None:
+        """Record that ``node`` holds a result, inlining small payloads."""
+        entry = {"node": node, "size": len(payload), "created_at": time.time()}
+        if inline:
+            entry["payload"] = payload
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._key(key), mapping=entry)
+        pipe.expire(self._key(key), self.ttl)
+        pipe.execute()
+
+
+class ResultCache:
+    """Two-level result cache: local disk first, then the shared index."""
+
+    def __init__(
+        self,
+        local: DiskLRUCache,
+        index: SharedResultIndex,
+        node: str,
+        inline_max_bytes: int = 64 * 1024,
+    ):
+        self.local = local
+        self.index = index
+        self.node = node
+        self.inline_max_bytes = inline_max_bytes
+
+    def get(self, task_type: str, key: str) -> Tuple[str, Any]:
+        """Look a result up, returning ``(source, result)``.
+
+        ``result`` is ``MISS`` when neither level can serve it. An
+        unreadable local cache counts as a local miss, and a shared hit
+        that cannot be copied to disk is still served.
+        """
+        try:
+            payload = self.local.get(key)
+        except OSError as e:
+            logger.warning("Local result cache unreadable", error=str(e))
+            payload = None
+        source = "hit_local"
+
+        if payload is None:
+            try:
+                entry = self.index.lookup(key)
+            except redis.RedisError as e:
+                logger.warning("Result index unavailable", error=str(e))
+                entry = {}
+            payload = entry.get("payload")
+            source = "hit_shared"
+            if payload is not None:
+                try:
+                    self.local.put(key, payload)
+                except OSError as e:
+                    logger.warning("Local result cache unwritable", error=str(e))
+            elif entry:
+                # Another node holds a result too large to inline
+                source = "miss_remote"
+            else:
+                source = "miss"
+
+        result_cache_requests_total.labels(task_type=task_type, result=source).inc()
+        if payload is None:
+            return source, MISS
+        return source, json.loads(payload)
+
+    def put(self, key: str, result: Any) -> None:
+        """Store a result locally and advertise it in the shared index."""
+        payload = json.dumps(result, default=str)
+        self.local.put(key, payload)
+        try:
+            self.index.publish(
+                key,
+                self.node,
+                payload,
+                inline=len(payload) <= self.inline_max_bytes,
+            )
+        except redis.RedisError as e:
+            logger.warning("Result index unavailable", error=str(e))
+
+
+def create_result_cache(redis_client: redis.Redis) -> ResultCache:
+    """Create the node's result cache configured from settings."""
+    settings = get_settings()
+    return ResultCache(
+        DiskLRUCache(settings.result_cache_dir, settings.result_cache_max_bytes),
+        SharedResultIndex(redis_client, ttl=settings.result_cache_ttl),
+        node=socket.gethostname(),
+        inline_max_bytes=settings.result_cache_inline_max_bytes,
+    )
@@ -0,0 +1,68 @@
+"""Celery routing based on task type metadata."""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..core.config import get_settings
+
+# Queue of each execute task when its task type is not I/O-bound
+STATIC_QUEUES = {
+    "src.worker.tasks.execute_task": "default",
+    "src.worker.tasks.execute_high_priority_task": "high_priority",
+}
+EXECUTE_TASK_NAMES = frozenset(STATIC_QUEUES)
+
+# TaskPriority name -> message priority, higher is dequeued first
+PRIORITY_LEVELS = {"LOW": 0, "NORMAL": 3, "HIGH": 6, "URGENT": 9}
+
+
+def task_queue(task_name: str, task_type: str) -> str:
+    """Queue an execute task of ``task_type`` is published to.
+
+    Every publisher resolves queues here: the outbox, retries, dead-letter
+    redrive, the lease reaper and the speculator. The decision only reads
+    settings, so it does not depend on which handlers a process imported.
+    """
+    settings = get_settings()
+    if task_type in settings.async_pool_task_types:
+        return settings.async_pool_queue
+    return STATIC_QUEUES.get(task_name, "default")
+
+
+def routed_queues() -> List[str]:
+    """All queues ``task_queue`` can return."""
+    return [*dict.fromkeys(STATIC_QUEUES.values()), get_settings().async_pool_queue]
+
+
+def route_by_task_type(
+    name: str,
+    args: Sequence[Any],
+    kwargs: Dict[str, Any],
+    options: Dict[str, Any],
+    task: Any = None,
+    **kw: Any,
+) -> Optional[Dict[str, str]]:
+    """Celery router applying ``task_queue`` to execute tasks.
+
+    Returns ``None`` for other tasks so Celery's default queue applies.
+    """
+    if name not in EXECUTE_TASK_NAMES or len(args) < 2:
+        return None
+    return {"queue": task_queue(name, args[1])}
+
+
+def priority_level(priority: Any) -> int:
+    """Map a ``TaskPriority`` (or its name) to a message priority level."""
+    name = getattr(priority, "name", str(priority))
+    return PRIORITY_LEVELS.get(name, PRIORITY_LEVELS["NORMAL"])
+
+
+def message_priority(level: int) -> Optional[int]:
+    """Priority to publish with, or ``None`` if the broker ignores it.
+
+    Only the Postgres queue orders by priority. The Redis transport uses
+    the opposite convention (0 is highest), so priorities are not sent
+    there; the ``high_priority`` queue separates urgent work instead.
+    """
+    if get_settings().celery_broker_backend == "postgres":
+        return level
+    return None
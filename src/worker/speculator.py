@@ -0,0 +1,77 @@
+"""Straggler detector launching speculative copies of slow tasks.
+
+Run with ``python -m src.worker.speculator``. Only task types listed in
+``SPECULATION_TASK_TYPES`` are copied; list idempotent types only, since
+both attempts may run to completion.
+"""
+
+import time
+
+import structlog
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis_client
+from ..services.leases import TaskLease, create_lease_registry
+from ..services.speculation import (
+    StragglerDetector,
+    create_speculation_ledger,
+    speculative_task_id,
+)
+from ..services.task_stats import create_task_stats
+from .celery_app import celery_app
+from .routing import task_queue
+
+logger = structlog.get_logger(__name__)
+
+
+def launch_copy(lease: TaskLease) -> None:
+    """Publish a duplicate of a running attempt, steered off its host."""
+    headers = {
+        "speculative_of": lease.message_id or lease.task_id,
+        "speculative_lease": lease.attempt_id,
+        "avoid_host": lease.worker.rpartition(":")[0],
+    }
+    if lease.tenant:
+        headers["tenant"] = lease.tenant
+    celery_app.send_task(
+        lease.task_name,
+        args=[lease.task_id, lease.task_type, lease.parameters],
+        queue=task_queue(lease.task_name, lease.task_type),
+        headers=headers,
+        task_id=speculative_task_id(lease.message_id or lease.task_id),
+    )
+
+
+def run_speculator() -> None:
+    """Scan running tasks for stragglers on an interval."""
+    settings = get_settings()
+    redis_client = get_redis_client()
+    detector = StragglerDetector(
+        create_lease_registry(redis_client),
+        create_task_stats(redis_client),
+        create_speculation_ledger(
+            redis_client, active_ttl=celery_app.conf.task_time_limit
+        ),
+        launch_copy,
+        settings.speculation_task_types,
+        percentile=settings.speculation_percentile,
+        multiplier=settings.speculation_multiplier,
+        min_samples=settings.speculation_min_samples,
+        window=settings.speculation_window,
+        max_in_flight=settings.speculation_max_in_flight,
+    )
+
+    logger.info(
+        "Straggler detector started", task_types=settings.speculation_task_types
+    )
+    while True:
+        try:
+            detector.scan()
+        except Exception as e:
+            logger.error("Straggler scan failed", error=str(e), exc_info=True)
+
+        time.sleep(settings.speculation_interval)
+
+
+if __name__ == "__main__":
+    run_speculator()
@@ -0,0 +1,40 @@
+"""Periodic reconciliation of the precomputed task statistics.
+
+Run with ``python -m src.worker.stats_reconciler``; it also keeps the
+``task_queue_size`` gauge current between stats requests.
+"""
+
+import time
+
+import structlog
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis_client
+from ..services.task_stats import create_task_stats, publish_queue_sizes
+
+logger = structlog.get_logger(__name__)
+
+
+def run_reconciler() -> None:
+    """Expire stale tasks, repair drift and refresh queue gauges on an interval."""
+    settings = get_settings()
+    stats = create_task_stats(get_redis_client())
+
+    logger.info(
+        "Task statistics reconciler started",
+        interval=settings.task_stats_reconcile_interval,
+    )
+    while True:
+        try:
+            stats.reconcile()
+            publish_queue_sizes(stats.snapshot(window=settings.task_stats_window))
+        except Exception as e:
+            logger.error(
+                "Statistics reconciliation failed", error=str(e), exc_info=True
+            )
+
+        time.sleep(settings.task_stats_reconcile_interval)
+
+
+if __name__ == "__main__":
+    run_reconciler()
@@ -0,0 +1,86 @@
+"""Celery signal handlers recording task status transitions.
+
+Connected in every process that imports ``celery_app``, so publications
+from the API, outbox relay, fair dispatcher and lease reaper are all
+counted as well as outcomes on the workers.
+"""
+
+from typing import Any, Dict, Optional
+
+import structlog
+from celery.signals import before_task_publish, task_postrun
+
+from ..core.redis_client import get_redis_client
+from ..services.locality import SHARED
+from ..services.resource_versions import ResourceVersions
+from ..services.task_stats import FAILED, PENDING, SUCCESS, create_task_stats
+from .routing import EXECUTE_TASK_NAMES
+
+logger = structlog.get_logger(__name__)
+
+# Celery outcome states -> task statuses; RETRY is counted at republication
+OUTCOME_STATUSES = {"SUCCESS": SUCCESS, "FAILURE": FAILED}
+
+
+@before_task_publish.connect
+def record_task_published(
+    sender: Optional[str] = None,
+    body: Any = None,
+    routing_key: Optional[str] = None,
+    headers: Optional[Dict[str, Any]] = None,
+    **kwargs: Any,
+) -> None:
+    """Count a task as pending in the queue it is published to.
+
+    Runs before the message is sent, so the worker's RUNNING transition
+    can never be overtaken by this one.
+    """
+    if sender not in EXECUTE_TASK_NAMES or not headers:
+        return
+    if headers.get("speculative_of") or headers.get("locality") == SHARED:
+        # A straggler's duplicate, or the shared-queue copy of a task
+        # already counted when it went to a host queue
+        return
+    args = body[0] if isinstance(body, (list, tuple)) and body else []
+    if len(args) < 2:
+        return
+
+    try:
+        redis_client = get_redis_client()
+        create_task_stats(redis_client).transition(
+            args[0],
+            PENDING,
+            task_type=args[1],
+            queue=headers.get("locality_queue") or routing_key,
+            priority=headers.get("task_priority"),
+            tenant=headers.get("tenant"),
+        )
+        ResourceVersions(redis_client).touch_task(args[0])
+    except Exception as e:
+        # Statistics must never block publishing
+        logger.warning("Task statistics update failed", task_id=args[0], error=str(e))
+
+
+@task_postrun.connect
+def record_task_outcome(
+    sender: Any = None,
+    args: Any = None,
+    state: Optional[str] = None,
+    **kwargs: Any,
+) -> None:
+    """Count a finished task and invalidate cached API views of it.
+
+    Runs after the result backend has stored the outcome, so a client
+    revalidating straight away sees the new state.
+    """
+    if sender is None or sender.name not in EXECUTE_TASK_NAMES or not args:
+        return
+
+    try:
+        redis_client = get_redis_client()
+        status = OUTCOME_STATUSES.get(state)
+        if status:
+            create_task_stats(redis_client).transition(args[0], status)
+        ResourceVersions(redis_client).touch_task(args[0])
+    except Exception as e:
+        logger.warning("Task statistics update failed", task_id=args[0], error=str(e))
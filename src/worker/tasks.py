@@ -0,0 +1,502 @@
+"""Celery tasks dispatching work to registered task handlers."""
+
+import socket
+import time
+from typing import Any, Dict, Optional
+
+import structlog
+from celery import Task as CeleryTask
+from celery import states
+from celery.exceptions import Ignore
+
+from ..core.config import get_settings
+from ..core.exceptions import TaskValidationError
+from ..core.metrics import (
+    speculative_duplicate_seconds_total,
+    speculative_executions_total,
+    speculative_latency_saved,
+    task_duration_histogram,
+)
+from ..core.redis_client import get_redis_client
+from ..services.dead_letter import DeadLetterEntry, DeadLetterQueue
+from ..services.fair_scheduler import create_tenant_limiter
+from ..services.leases import TaskLease
+from ..services.resource_versions import ResourceVersions
+from ..services.retry_policy import RetryPolicyEngine, create_retry_engine
+from ..services.speculation import (
+    PRIMARY,
+    SPECULATIVE,
+    SpeculationLedger,
+    create_speculation_ledger,
+    speculative_task_id,
+)
+from ..services.task_stats import RUNNING, create_task_stats
+from .async_pool import get_async_executor
+from .celery_app import celery_app
+from .handlers import (
+    TaskHandler,
+    get_handler,
+    load_handler_modules,
+    registered_handlers,
+)
+from .heartbeat import get_lease_keeper, run_as_task, running_task
+from .locality import advertise_warm_data, get_locality_router
+from .result_cache import MISS, ResultCache, cache_key, create_result_cache
+from .routing import task_queue
+
+logger = structlog.get_logger(__name__)
+
+_retry_engine: Optional[RetryPolicyEngine] = None
+_result_cache: Optional[ResultCache] = None
+
+
+def get_retry_engine() -> RetryPolicyEngine:
+    """Get the process-wide retry engine with handler policies registered."""
+    global _retry_engine
+    if _retry_engine is None:
+        # Processes other than workers, such as the lease reaper, have not
+        # imported the handlers yet
+        load_handler_modules()
+        _retry_engine = create_retry_engine(get_redis_client())
+        for task_type, handler in registered_handlers().items():
+            if handler.retry_policy:
+                _retry_engine.register(task_type, handler.retry_policy)
+    return _retry_engine
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = create_result_cache(get_redis_client())
+    return _result_cache
+
+
+def _result_cache_key(handler: TaskHandler, parameters: Dict[str, Any]) -> str:
+    """Cache key covering the app and handler versions."""
+    version = f"{get_settings().version}:{handler.version}"
+    return cache_key(handler.task_type, parameters, version)
+
+
+def _cached_result(task_id: str, task_type: str, key: str) -> Any:
+    """Look a memoized result up, best effort; ``MISS`` if unavailable.
+
+    Like a failed write, a cache directory that cannot be created or read,
+    or an entry that no longer decodes, only costs the hit: the handler
+    can still run.
+    """
+    try:
+        source, cached = get_result_cache().get(task_type, key)
+    except (OSError, ValueError) as e:
+        logger.warning("Result cache lookup failed", task_id=task_id, error=repr(e))
+        return MISS
+    if cached is not MISS:
+        logger.info("Task served from result cache", task_id=task_id, source=source)
+    return cached
+
+
+def _cache_result(task_id: str, key: str, result: Any) -> None:
+    """Memoize a successful result, best effort.
+
+    The handler has already succeeded: a full disk, an unwritable cache
+    directory or a result JSON cannot encode only costs a future hit, and
+    must not fail the task.
+    """
+    try:
+        get_result_cache().put(key, result)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("Task result not cached", task_id=task_id, error=repr(e))
+
+
+def get_dead_letter_queue() -> DeadLetterQueue:
+    """Get the dead-letter queue configured from settings."""
+    return DeadLetterQueue(
+        get_redis_client(),
+        max_entries=get_settings().dead_letter_max_entries,
+    )
+
+
+def _release_tenant_slot(celery_task: CeleryTask, task_id: str) -> None:
+    """Free the tenant concurrency slot taken by the fair dispatcher."""
+    tenant = celery_task.request.get("tenant")
+    if tenant:
+        create_tenant_limiter(get_redis_client()).release(tenant, task_id)
+
+
+def _delivery_queue(celery_task: CeleryTask) -> str:
+    """Queue the current message was consumed from."""
+    return (celery_task.request.delivery_info or {}).get("routing_key", "default")
+
+
+def _task_queue(celery_task: CeleryTask, task_type: str) -> str:
+    """Shared queue of the task, even if consumed from a host queue."""
+    return task_queue(celery_task.name, task_type)
+
+
+def _claim_locality(
+    celery_task: CeleryTask, task_id: str, task_type: str, copy: str
+) -> bool:
+    """Whether this copy of a locality-routed task is the one to run."""
+    router = get_locality_router()
+    if router is None:
+        return True
+    return router.claim(
+        task_id,
+        copy,
+        _task_queue(celery_task, task_type),
+        host_queue=_delivery_queue(celery_task),
+        token=celery_task.request.get("locality_token"),
+    )
+
+
+def get_speculation_ledger() -> SpeculationLedger:
+    """Get the speculation ledger configured from settings."""
+    return create_speculation_ledger(
+        get_redis_client(), active_ttl=celery_app.conf.task_time_limit
+    )
+
+
+def _call_handler(
+    handler: TaskHandler, attempt_id: str, parameters: Dict[str, Any]
+) -> Any:
+    """Call a handler with its progress reports attributed to ``attempt_id``."""
+    with running_task(attempt_id):
+        if handler.is_async:
+            return get_async_executor().run(
+                run_as_task(attempt_id, handler.func(parameters)),
+                timeout=celery_app.conf.task_soft_time_limit,
+            )
+        return handler.func(parameters)
+
+
+def _record_running(task_id: str, task_type: str) -> None:
+    """Count a task as running and invalidate cached API views of it.
+
+    Best effort, as in the publish and outcome signals: the lease is
+    already held, and only the handler's own failure may end the attempt.
+    """
+    try:
+        redis_client = get_redis_client()
+        create_task_stats(redis_client).transition(
+            task_id, RUNNING, task_type=task_type
+        )
+        ResourceVersions(redis_client).touch_task(task_id)
+    except Exception as e:
+        logger.warning("Task statistics update failed", task_id=task_id, error=str(e))
+
+
+def _run_handler(
+    celery_task: CeleryTask,
+    task_id: str,
+    task_type: str,
+    parameters: Dict[str, Any],
+    retry_delay: Optional[float],
+) -> Any:
+    """Run the handler for a task, applying the retry policy on failure."""
+    try:
+        handler = get_handler(task_type)
+    except TaskValidationError as exc:
+        # Not retryable: no attempt will find a handler either
+        _dead_letter(celery_task, task_id, task_type, parameters, exc, "no_handler")
+        raise
+
+    copy = celery_task.request.get("locality")
+    if copy and not _claim_locality(celery_task, task_id, task_type, copy):
+        # The other copy of a locality-routed task was consumed first
+        logger.info("Dropping duplicate of locality-routed task", task_id=task_id)
+        raise Ignore()
+
+    speculative_copy = bool(celery_task.request.get("speculative_of"))
+    speculative = speculative_copy or task_type in get_settings().speculation_task_types
+
+    if speculative and get_speculation_ledger().winner(task_id):
+        # A speculative race already produced the result
+        logger.info("Dropping attempt of finished task", task_id=task_id)
+        raise Ignore()
+    if speculative_copy:
+        return _run_speculative_copy(celery_task, handler, task_id, parameters)
+
+    if handler.cacheable:
+        key = _result_cache_key(handler, parameters)
+        cached = _cached_result(task_id, task_type, key)
+        if cached is not MISS:
+            _store_task_result(celery_task, task_id, cached)
+            _release_tenant_slot(celery_task, task_id)
+            return cached
+
+    keeper = get_lease_keeper()
+    lease = TaskLease(
+        task_id=task_id,
+        task_type=task_type,
+        parameters=parameters,
+        queue=_task_queue(celery_task, task_type),
+        task_name=celery_task.name,
+        retries=celery_task.request.retries,
+        retry_delay=retry_delay,
+        tenant=celery_task.request.get("tenant"),
+        message_id=celery_task.request.id,
+    )
+    if not keeper.acquire(lease):
+        # The broker redelivered an attempt the reaper already requeued
+        logger.warning("Dropping reclaimed task redelivery", task_id=task_id)
+        raise Ignore()
+
+    _record_running(task_id, task_type)
+
+    start_time = time.time()
+    try:
+        get_retry_engine().record_attempt(task_type)
+        result = _call_handler(handler, lease.attempt_id, parameters)
+    except Exception as exc:
+        _handle_failure(celery_task, task_id, task_type, parameters, retry_delay, exc)
+        raise
+    finally:
+        keeper.release(lease.attempt_id)
+        task_duration_histogram.labels(task_type=task_type).observe(
+            time.time() - start_time
+        )
+
+    if speculative:
+        _finish_race(celery_task, task_id, task_type, PRIMARY, result)
+    advertise_warm_data(parameters)
+
+    if handler.cacheable:
+        _cache_result(task_id, key, result)
+
+    _store_task_result(celery_task, task_id, result)
+    _release_tenant_slot(celery_task, task_id)
+    return result
+
+
+def _run_speculative_copy(
+    celery_task: CeleryTask,
+    handler: TaskHandler,
+    task_id: str,
+    parameters: Dict[str, Any],
+) -> Any:
+    """Run the duplicate of a straggler, racing its original attempt.
+
+    The copy holds no lease and never retries: the original attempt still
+    owns the task, including its failure handling.
+    """
+    if celery_task.request.get("avoid_host") == socket.gethostname():
+        # Landed on the straggler's own host; send it on to another worker
+        _bounce_speculative_copy(celery_task, task_id, handler.task_type)
+        raise Ignore()
+
+    ledger = get_speculation_ledger()
+    ledger.start(task_id)
+    try:
+        result = _call_handler(handler, celery_task.request.id, parameters)
+    except Exception as exc:
+        logger.warning("Speculative copy failed", task_id=task_id, error=repr(exc))
+        ledger.cancel(task_id)
+        speculative_executions_total.labels(
+            task_type=handler.task_type, result="failed"
+        ).inc()
+        raise Ignore()
+
+    _finish_race(celery_task, task_id, handler.task_type, SPECULATIVE, result)
+    advertise_warm_data(parameters)
+    if handler.cacheable:
+        _cache_result(task_id, _result_cache_key(handler, parameters), result)
+    _store_task_result(celery_task, task_id, result)
+    _release_tenant_slot(celery_task, task_id)
+    return result
+
+
+def _bounce_speculative_copy(
+    celery_task: CeleryTask, task_id: str, task_type: str
+) -> None:
+    """Republish a copy consumed on its straggler's host, or give it up."""
+    request = celery_task.request
+    bounces = request.get("speculation_bounces") or 0
+    if bounces >= get_settings().speculation_max_bounces:
+        get_speculation_ledger().cancel(task_id)
+        speculative_executions_total.labels(task_type=task_type, result="skipped").inc()
+        logger.info("No other worker took speculative copy", task_id=task_id)
+        return
+
+    headers = {
+        name: request.get(name)
+        for name in ("tenant", "speculative_of", "speculative_lease", "avoid_host")
+        if request.get(name)
+    }
+    celery_task.apply_async(
+        args=request.args,
+        kwargs=request.kwargs,
+        task_id=request.id,
+        queue=_task_queue(celery_task, task_type),
+        headers={**headers, "speculation_bounces": bounces + 1},
+    )
+
+
+def _store_task_result(
+    celery_task: CeleryTask, task_id: str, result: Any, state: str = states.SUCCESS
+) -> None:
+    """Store a task's outcome under its task id, which clients poll.
+
+    Attempts are published under their own message ids, and Celery only
+    stores the outcome under the id of the message that ran.
+    """
+    if celery_task.request.id != task_id:
+        celery_app.backend.store_result(task_id, result, state)
+
+
+def _finish_race(
+    celery_task: CeleryTask, task_id: str, task_type: str, attempt: str, result: Any
+) -> None:
+    """Settle a speculative race, raising ``Ignore`` if this attempt lost.
+
+    The winner revokes the other attempt by its message id. That is never
+    the task id, under which the winner stores the result clients poll,
+    so the revocation cannot block a later publication of the task.
+    """
+    won, launched_at, started_at = get_speculation_ledger().finish(task_id, attempt)
+    if not won:
+        logger.info(
+            "Discarding result of losing attempt", task_id=task_id, attempt=attempt
+        )
+        raise Ignore()
+    if launched_at is None:
+        return
+
+    now = time.time()
+    if attempt == SPECULATIVE:
+        loser_id = celery_task.request.get("speculative_of")
+        registry = get_lease_keeper().registry
+        attempt_id = celery_task.request.get("speculative_lease") or ""
+        lease = registry.get(attempt_id)
+        wasted = now - lease.acquired_at if lease else 0.0
+        progress = registry.progress([attempt_id]).get(attempt_id) if lease else None
+        if progress:
+            speculative_latency_saved.labels(task_type=task_type).observe(
+                wasted * (1.0 - progress) / progress
+            )
+        # Released here: a terminated original never reaches its own release
+        registry.release(attempt_id)
+        outcome = "won"
+    else:
+        loser_id = speculative_task_id(celery_task.request.id)
+        wasted = now - started_at if started_at else 0.0
+        outcome = "lost"
+
+    speculative_executions_total.labels(task_type=task_type, result=outcome).inc()
+    speculative_duplicate_seconds_total.labels(task_type=task_type).inc(wasted)
+    logger.info(
+        "Speculative race settled",
+        task_id=task_id,
+        task_type=task_type,
+        winner=attempt,
+        wasted_seconds=wasted,
+    )
+    _revoke_attempt(loser_id)
+
+
+def _revoke_attempt(message_id: str) -> None:
+    """Stop the losing attempt of a speculative race.
+
+    Without remote control (Postgres broker) the loser runs to completion
+    and discards its result in ``_finish_race``.
+    """
+    if not celery_app.conf.worker_enable_remote_control:
+        return
+    try:
+        celery_app.control.revoke(message_id, terminate=True)
+    except Exception as e:
+        logger.warning(
+            "Revoking losing attempt failed", message_id=message_id, error=str(e)
+        )
+
+
+def _handle_failure(
+    celery_task: CeleryTask,
+    task_id: str,
+    task_type: str,
+    parameters: Dict[str, Any],
+    retry_delay: Optional[float],
+    exc: Exception,
+) -> None:
+    """Schedule a jittered retry or park the task in the dead-letter queue."""
+    retries = celery_task.request.retries
+    decision = get_retry_engine().decide(task_type, retries, retry_delay)
+
+    if decision.retry:
+        logger.info(
+            "Retrying task",
+            task_id=task_id,
+            task_type=task_type,
+            retries=retries,
+            countdown=decision.delay,
+        )
+        raise celery_task.retry(
+            kwargs={**celery_task.request.kwargs, "retry_delay": decision.delay},
+            exc=exc,
+            countdown=decision.delay,
+            queue=_task_queue(celery_task, task_type),
+        )
+
+    _dead_letter(celery_task, task_id, task_type, parameters, exc, decision.reason)
+
+
+def _dead_letter(
+    celery_task: CeleryTask,
+    task_id: str,
+    task_type: str,
+    parameters: Dict[str, Any],
+    exc: Exception,
+    reason: str,
+) -> None:
+    """Park a task that will not be retried and release what it holds."""
+    if task_type in get_settings().speculation_task_types:
+        # A copy still racing would otherwise hold speculation budget
+        get_speculation_ledger().cancel(task_id)
+    get_dead_letter_queue().push(
+        DeadLetterEntry(
+            task_id=task_id,
+            task_type=task_type,
+            parameters=parameters,
+            queue=_task_queue(celery_task, task_type),
+            task_name=celery_task.name,
+            error=repr(exc),
+            reason=reason,
+            retries=celery_task.request.retries,
+        )
+    )
+    _store_task_result(celery_task, task_id, exc, states.FAILURE)
+    _release_tenant_slot(celery_task, task_id)
+
+
+@celery_app.task(bind=True, name="src.worker.tasks.execute_task", max_retries=None)
+def execute_task(
+    self: CeleryTask,
+    task_id: str,
+    task_type: str,
+    parameters: Dict[str, Any],
+    retry_delay: Optional[float] = None,
+) -> Any:
+    """Execute a task on the default queue."""
+    return _run_handler(self, task_id, task_type, parameters, retry_delay)
+
+
+@celery_app.task(
+    bind=True, name="src.worker.tasks.execute_high_priority_task", max_retries=None
+)
+def execute_high_priority_task(
+    self: CeleryTask,
+    task_id: str,
+    task_type: str,
+    parameters: Dict[str, Any],
+    retry_delay: Optional[float] = None,
+) -> Any:
+    """Execute a task on the high priority queue."""
+    return _run_handler(self, task_id, task_type, parameters, retry_delay)
+
+
+def redrive_dead_letter(entry: DeadLetterEntry) -> None:
+    """Publish a dead-lettered task again with a fresh retry count."""
+    celery_app.send_task(
+        entry.task_name,
+        args=[entry.task_id, entry.task_type, entry.parameters],
+        queue=task_queue(entry.task_name, entry.task_type),
+    )
@@ -0,0 +1,129 @@
+"""Unit tests for async task execution and I/O routing."""
+
+import asyncio
+
+import pytest
+
+from src.core.config import get_settings
+from src.worker.async_pool import AsyncExecutor
+from src.worker.handlers import (
+    async_routing_mismatches,
+    get_handler,
+    register_handler,
+)
+from src.worker.routing import route_by_task_type, task_queue
+
+
+@register_handler("test_http_call")
+async def http_call_handler(parameters):
+    await asyncio.sleep(0)
+    return parameters["url"]
+
+
+@register_handler("test_cpu_work")
+def cpu_work_handler(parameters):
+    return sum(range(parameters["n"]))
+
+
+@pytest.fixture
+def executor():
+    """Async executor torn down after the test."""
+    executor = AsyncExecutor(concurrency=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def io_task_types(monkeypatch):
+    """Route ``test_http_call`` to the I/O queue."""
+    monkeypatch.setattr(get_settings(), "async_pool_task_types", ["test_http_call"])
+
+
+class TestRouting:
+    """Test cases for I/O routing."""
+    
+    def test_async_handlers_flagged(self):
+        """Test async handlers are flagged to run on the event loop."""
+        assert get_handler("test_http_call").is_async is True
+        assert get_handler("test_cpu_work").is_async is False
+    
+    def test_io_bound_routed_to_io_queue(self, io_task_types):
+        """Test configured I/O-bound task types are routed to the I/O queue."""
+        route = route_by_task_type(
+            "src.worker.tasks.execute_task", ("id", "test_http_call", {}), {}, {}
+        )
+        
+        assert route == {"queue": "io"}
+    
+    def test_cpu_bound_uses_static_queues(self, io_task_types):
+        """Test other task types stay on their priority queue."""
+        route = route_by_task_type(
+            "src.worker.tasks.execute_high_priority_task",
+            ("id", "test_cpu_work", {}),
+            {},
+            {},
+        )
+        
+        assert route == {"queue": "high_priority"}
+    
+    def test_routing_ignores_handler_registry(self, io_task_types):
+        """Test publishers route task types whose handlers they never imported."""
+        assert task_queue("src.worker.tasks.execute_task", "test_http_call") == "io"
+        assert task_queue("src.worker.tasks.execute_task", "unknown") == "default"
+    
+    def test_other_tasks_not_routed(self):
+        """Test non-execute tasks fall through to Celery's default queue."""
+        assert route_by_task_type("celery.ping", (), {}, {}) is None
+    
+    def test_configured_pools_match_handlers(self, io_task_types):
+        """Test no mismatch is reported when the setting lists the async handlers."""
+        mismatches = async_routing_mismatches()
+        
+        assert "test_http_call" not in mismatches["async_unrouted"]
+        assert "test_cpu_work" not in mismatches["sync_routed"]
+    
+    def test_mismatched_pools_reported(self, monkeypatch):
+        """Test async handlers left out and blocking handlers listed are reported."""
+        monkeypatch.setattr(get_settings(), "async_pool_task_types", ["test_cpu_work"])
+        
+        mismatches = async_routing_mismatches()
+        
+        assert "test_http_call" in mismatches["async_unrouted"]
+        assert mismatches["sync_routed"] == ["test_cpu_work"]
+
+
+class TestAsyncExecutor:
+    """Test cases for AsyncExecutor."""
+    
+    def test_runs_coroutine(self, executor):
+        """Test coroutines run on the loop and return their result."""
+        result = executor.run(http_call_handler({"url": "https://example.com"}))
+        
+        assert result == "https://example.com"
+    
+    def test_concurrency_bounded(self, executor):
+        """Test no more coroutines than the semaphore allows run at once."""
+        running = 0
+        peak = 0
+        
+        async def probe():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        async def fan_out():
+            await asyncio.gather(*(executor._bounded(probe()) for _ in range(6)))
+        
+        asyncio.run_coroutine_threadsafe(fan_out(), executor.loop).result(5)
+        
+        assert peak == 2
+    
+    def test_exceptions_propagate(self, executor):
+        """Test handler exceptions surface in the calling thread."""
+        async def failing():
+            raise ValueError("upstream returned 500")
+        
+        with pytest.raises(ValueError):
+            executor.run(failing())
@@ -48,6 +48,23 @@ class TestSettings:
         # Invalid environment
         with pytest.raises(ValidationError):
             Settings(environment="invalid")
+    
+    def test_broker_backend_validation(self):
+        """Test Celery broker backend validation."""
+        assert Settings().celery_broker_backend == "redis"
+        settings = Settings(celery_broker_backend="postgres")
+        assert settings.celery_broker_backend == "postgres"
+        
+        with pytest.raises(ValidationError):
+            Settings(celery_broker_backend="sqs")
+    
+    def test_tenant_weight_validation(self):
+        """Test tenant weights must be positive."""
+        settings = Settings(tenant_weights={"system": 2.0})
+        assert settings.tenant_weights == {"system": 2.0}
+        
+        with pytest.raises(ValidationError):
+            Settings(tenant_weights={"system": 0})
 
 
 class TestFeatureFlags:
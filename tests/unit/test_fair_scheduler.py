@@ -0,0 +1,143 @@
+"""Unit tests for multi-tenant fair scheduling."""
+
+from collections import Counter
+
+import fakeredis
+import pytest
+
+from src.services.fair_scheduler import (
+    DeficitRoundRobin,
+    FairScheduler,
+    TenantConcurrencyLimiter,
+)
+
+
+@pytest.fixture
+def redis_client():
+    """In-memory Redis client."""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+class TestDeficitRoundRobin:
+    """Test cases for DeficitRoundRobin."""
+    
+    def test_equal_share_under_skewed_backlog(self):
+        """Test a deep backlog does not starve a shallow one."""
+        drr = DeficitRoundRobin()
+        backlog = {"data_team": 1000, "ml_team": 5}
+        
+        picks = []
+        for _ in range(10):
+            tenant = drr.select(backlog)
+            backlog[tenant] -= 1
+            picks.append(tenant)
+        
+        assert picks.count("ml_team") == 5
+    
+    def test_weights(self):
+        """Test weighted tenants get proportionally more slots."""
+        drr = DeficitRoundRobin(weights={"system": 3.0})
+        backlog = {"system": 100, "data_team": 100}
+        
+        picks = Counter(drr.select(backlog) for _ in range(40))
+        
+        assert picks["system"] == 30
+        assert picks["data_team"] == 10
+    
+    def test_empty_backlog(self):
+        """Test no tenant is selected when nothing is pending."""
+        assert DeficitRoundRobin().select({"data_team": 0}) is None
+    
+    def test_non_positive_weight_rejected(self):
+        """Test a weight that would never earn credit is refused."""
+        with pytest.raises(ValueError):
+            DeficitRoundRobin(weights={"system": 0})
+        with pytest.raises(ValueError):
+            DeficitRoundRobin(weights={"system": -1.0})
+
+
+class TestTenantConcurrencyLimiter:
+    """Test cases for TenantConcurrencyLimiter."""
+    
+    def test_cap_enforced(self, redis_client):
+        """Test slots are refused above the tenant cap and freed on release."""
+        limiter = TenantConcurrencyLimiter(redis_client, default_limit=2)
+        
+        assert limiter.acquire("ml_team", "t1") is True
+        assert limiter.acquire("ml_team", "t2") is True
+        assert limiter.acquire("ml_team", "t3") is False
+        
+        limiter.release("ml_team", "t1")
+        assert limiter.acquire("ml_team", "t3") is True
+    
+    def test_expired_slots_reclaimed(self, redis_client):
+        """Test slots held past their lease stop counting."""
+        limiter = TenantConcurrencyLimiter(redis_client, default_limit=1, slot_ttl=10)
+        
+        assert limiter.acquire("ml_team", "t1", now=100.0) is True
+        assert limiter.acquire("ml_team", "t2", now=105.0) is False
+        assert limiter.acquire("ml_team", "t2", now=111.0) is True
+
+
+class TestFairScheduler:
+    """Test cases for FairScheduler."""
+    
+    def test_dispatch_interleaves_tenants(self, redis_client):
+        """Test a flooding tenant does not delay a light tenant's tasks."""
+        published = []
+        scheduler = FairScheduler(
+            redis_client,
+            lambda tenant, message: published.append(tenant)
+        )
+        for i in range(50):
+            scheduler.submit("data_team", f"heavy-{i}", "data_processing", {})
+        scheduler.submit("ml_team", "light-0", "ml_training", {})
+        
+        assert scheduler.dispatch(4) == 4
+        assert "ml_team" in published
+    
+    def test_throttled_tenant_keeps_its_tasks(self, redis_client):
+        """Test tasks over the concurrency cap stay queued."""
+        limiter = TenantConcurrencyLimiter(redis_client, default_limit=1)
+        published = []
+        scheduler = FairScheduler(
+            redis_client,
+            lambda tenant, message: published.append(message["task_id"]),
+            limiter=limiter
+        )
+        scheduler.submit("data_team", "a", "data_processing", {})
+        scheduler.submit("data_team", "b", "data_processing", {})
+        
+        assert scheduler.dispatch(10) == 1
+        assert published == ["a"]
+        assert scheduler.depths() == {"data_team": 1}
+    
+    def test_dispatch_publishes_submitted_headers(self, redis_client):
+        """Test headers and priority given at submit reach the publisher."""
+        published = []
+        scheduler = FairScheduler(
+            redis_client,
+            lambda tenant, message: published.append(message)
+        )
+        scheduler.submit(
+            "ml_team",
+            "a",
+            "ml_training",
+            {},
+            headers={"task_priority": "HIGH"},
+            priority=6,
+        )
+        
+        scheduler.dispatch(1)
+        
+        assert published[0]["headers"] == {"task_priority": "HIGH"}
+        assert published[0]["priority"] == 6
+    
+    def test_idle_tenants_pruned(self, redis_client):
+        """Test drained tenants are removed from the tenant set."""
+        scheduler = FairScheduler(redis_client, lambda tenant, message: None)
+        scheduler.submit("ml_team", "a", "ml_training", {})
+        
+        scheduler.dispatch(10)
+        
+        assert redis_client.smembers(scheduler.tenants_key) == set()
@@ -0,0 +1,213 @@
+"""Unit tests for the ETag and compression middleware."""
+
+import json
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from src.api.middleware.compression import CompressionMiddleware, choose_encoding
+from src.api.middleware import etag
+from src.api.middleware.etag import ETagMiddleware, etag_matches
+from src.services.resource_versions import ResourceVersions
+
+TASK_ID = "0b7c1bd2-6a55-4b4c-8f44-1d7d3c0a9e51"
+
+
+@pytest.fixture
+def server():
+    """In-memory Redis shared by sync writers and the async middleware."""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def versions(server):
+    """Resource version writer, as workers use it."""
+    return ResourceVersions(fakeredis.FakeRedis(server=server, decode_responses=True))
+
+
+@pytest_asyncio.fixture
+async def client(server):
+    """Client for an app whose task routes count how often they run."""
+    calls = {"count": 0}
+
+    async def get_task(request):
+        calls["count"] += 1
+        task_id = request.path_params["task_id"]
+        return JSONResponse({"id": task_id, "status": "running"})
+
+    async def list_tasks(request):
+        calls["count"] += 1
+        limit = int(request.query_params.get("limit", 500))
+        return JSONResponse(
+            [{"id": str(i), "status": "success"} for i in range(limit)]
+        )
+
+    async def get_stats(request):
+        calls["count"] += 1
+        return JSONResponse({"by_status": {"running": 1}})
+
+    async def export_tasks(request):
+        async def rows():
+            for i in range(500):
+                row = {"id": str(i), "status": "success"}
+                yield json.dumps(row).encode() + b"\n"
+
+        return StreamingResponse(rows(), media_type="application/json")
+
+    app = Starlette(routes=[
+        Route("/api/v1/tasks", list_tasks),
+        Route("/api/v1/tasks/export/stream", export_tasks),
+        Route("/api/v1/tasks/{task_id}", get_task),
+        Route("/api/v1/stats", get_stats),
+    ])
+    app.add_middleware(
+        ETagMiddleware,
+        redis_client=fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+    )
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as client:
+        client.calls = calls
+        yield client
+
+
+@pytest.mark.asyncio
+class TestETagMiddleware:
+    """Test cases for conditional requests on task endpoints."""
+    
+    async def test_revalidation_skips_the_route(self, client, versions):
+        """Test a matching If-None-Match is answered with 304 before the route."""
+        versions.touch_task(TASK_ID)
+        
+        first = await client.get(f"/api/v1/tasks/{TASK_ID}")
+        etag = first.headers["etag"]
+        second = await client.get(
+            f"/api/v1/tasks/{TASK_ID}", headers={"If-None-Match": etag}
+        )
+        
+        assert second.status_code == 304
+        assert second.headers["etag"] == etag
+        assert client.calls["count"] == 1
+    
+    async def test_task_change_invalidates(self, client, versions):
+        """Test a task change invalidates the task and the task list."""
+        versions.touch_task(TASK_ID, updated_at=1.0)
+        task_etag = (await client.get(f"/api/v1/tasks/{TASK_ID}")).headers["etag"]
+        list_etag = (await client.get("/api/v1/tasks")).headers["etag"]
+        
+        versions.touch_task(TASK_ID, updated_at=2.0)
+        task = await client.get(
+            f"/api/v1/tasks/{TASK_ID}", headers={"If-None-Match": task_etag}
+        )
+        tasks = await client.get("/api/v1/tasks", headers={"If-None-Match": list_etag})
+        
+        assert task.status_code == 200
+        assert tasks.status_code == 200
+    
+    async def test_query_string_is_part_of_etag(self, client, versions):
+        """Test different pages of a list get different ETags."""
+        versions.touch_task(TASK_ID)
+        
+        first = await client.get("/api/v1/tasks?limit=10")
+        second = await client.get("/api/v1/tasks?limit=20")
+        
+        assert first.headers["etag"] != second.headers["etag"]
+    
+    async def test_stats_window_moving_invalidates(
+        self, client, versions, monkeypatch
+    ):
+        """Test statistics are revalidated only within one statistics bucket."""
+        versions.touch_task(TASK_ID)
+        monkeypatch.setattr(etag.time, "time", lambda: 1000.0)
+        stats_etag = (await client.get("/api/v1/stats")).headers["etag"]
+        
+        monkeypatch.setattr(etag.time, "time", lambda: 1100.0)
+        same_bucket = await client.get(
+            "/api/v1/stats", headers={"If-None-Match": stats_etag}
+        )
+        monkeypatch.setattr(etag.time, "time", lambda: 1300.0)
+        next_bucket = await client.get(
+            "/api/v1/stats", headers={"If-None-Match": stats_etag}
+        )
+        
+        assert same_bucket.status_code == 304
+        assert next_bucket.status_code == 200
+    
+    async def test_unknown_version_has_no_etag(self, client):
+        """Test responses are not validated when no version is recorded."""
+        response = await client.get(f"/api/v1/tasks/{TASK_ID}")
+        
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+
+@pytest.mark.asyncio
+class TestCompressionMiddleware:
+    """Test cases for response compression."""
+    
+    async def test_large_json_is_gzipped(self, client, versions):
+        """Test large JSON bodies are compressed for gzip clients."""
+        response = await client.get(
+            "/api/v1/tasks", headers={"Accept-Encoding": "gzip"}
+        )
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert len(response.json()) == 500
+    
+    async def test_small_json_is_not_compressed(self, client):
+        """Test bodies under the threshold are sent as is."""
+        response = await client.get(
+            "/api/v1/tasks?limit=1", headers={"Accept-Encoding": "gzip"}
+        )
+        
+        assert "content-encoding" not in response.headers
+    
+    async def test_streamed_body_is_compressed(self, client):
+        """Test bodies of unknown length are compressed as they stream."""
+        response = await client.get(
+            "/api/v1/tasks/export/stream", headers={"Accept-Encoding": "gzip"}
+        )
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert len(response.text.splitlines()) == 500
+    
+    async def test_not_modified_is_not_compressed(self, client, versions):
+        """Test 304 answers pass through untouched."""
+        versions.touch_task(TASK_ID)
+        etag = (await client.get(f"/api/v1/tasks/{TASK_ID}")).headers["etag"]
+        
+        response = await client.get(
+            f"/api/v1/tasks/{TASK_ID}",
+            headers={"If-None-Match": etag, "Accept-Encoding": "gzip"},
+        )
+        
+        assert response.status_code == 304
+        assert "content-encoding" not in response.headers
+
+
+class TestHeaderNegotiation:
+    """Test cases for parsing conditional and encoding request headers."""
+    
+    def test_weak_comparison(self):
+        """Test If-None-Match lists and weak validators are matched."""
+        assert etag_matches('"abc", W/"def"', 'W/"def"')
+        assert etag_matches("*", 'W/"def"')
+        assert not etag_matches('"abc"', 'W/"def"')
+    
+    def test_encoding_negotiation(self):
+        """Test brotli is preferred when available and q-values are honored."""
+        assert choose_encoding("gzip, br", brotli_available=True) == "br"
+        assert choose_encoding("gzip, br", brotli_available=False) == "gzip"
+        assert choose_encoding("br;q=0.5, gzip", brotli_available=True) == "gzip"
+        assert choose_encoding("identity") is None
+        assert choose_encoding("gzip;q=0") is None
@@ -0,0 +1,239 @@
+"""Unit tests for task leases, the heartbeat and the lease reaper."""
+
+import fakeredis
+import pytest
+
+from src.services.dead_letter import DeadLetterQueue
+from src.services.leases import LeaseReaper, LeaseRegistry, TaskLease
+from src.services.resource_versions import (
+    TASKS_RESOURCE,
+    ResourceVersions,
+    task_resource,
+)
+from src.services.retry_policy import RetryPolicy, RetryPolicyEngine
+from src.services.task_stats import FAILED, RUNNING, TaskStats
+from src.worker.heartbeat import LeaseKeeper
+
+
+@pytest.fixture
+def redis_client():
+    """In-memory Redis client."""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def registry(redis_client):
+    """Lease registry with a 60 second lease."""
+    return LeaseRegistry(redis_client, ttl=60)
+
+
+def make_lease(task_id="task-1", retries=0):
+    return TaskLease(
+        task_id=task_id,
+        task_type="data_processing",
+        parameters={"data_source": "/data/customers.csv"},
+        retries=retries,
+        tenant="data_team",
+    )
+
+
+class TestLeaseRegistry:
+    """Test cases for acquiring, renewing and claiming leases."""
+    
+    def test_only_expired_leases_are_found(self, registry):
+        """Test the index returns leases past their expiry only."""
+        registry.acquire(make_lease("old"), now=0)
+        registry.acquire(make_lease("new"), now=100)
+        
+        assert registry.expired(now=70) == ["old:0"]
+    
+    def test_renew_extends_leases(self, registry):
+        """Test a batched heartbeat pushes every lease's expiry out."""
+        registry.acquire(make_lease("a"), now=0)
+        registry.acquire(make_lease("b"), now=0)
+        
+        assert registry.renew(["a:0", "b:0"], now=50) == 2
+        assert registry.expired(now=70) == []
+    
+    def test_renew_does_not_resurrect(self, registry):
+        """Test a late heartbeat cannot revive a claimed lease."""
+        registry.acquire(make_lease(), now=0)
+        registry.claim("task-1:0", now=70)
+        
+        assert registry.renew(["task-1:0"], now=71) == 0
+        assert registry.expired(now=1000) == []
+    
+    def test_claim_is_exclusive(self, registry):
+        """Test an expired lease is claimed by one reaper only."""
+        registry.acquire(make_lease(), now=0)
+        
+        lease, expires_at = registry.claim("task-1:0", now=70)
+        assert lease.task_id == "task-1"
+        assert expires_at == 60
+        assert registry.claim("task-1:0", now=70) is None
+    
+    def test_unexpired_lease_is_not_claimed(self, registry):
+        """Test a lease renewed before the claim is left alone."""
+        registry.acquire(make_lease(), now=0)
+        
+        assert registry.claim("task-1:0", now=30) is None
+    
+    def test_claimed_attempt_is_fenced(self, registry):
+        """Test a stale redelivery of a reclaimed attempt is refused."""
+        registry.acquire(make_lease(retries=0), now=0)
+        registry.claim("task-1:0", now=70)
+        
+        assert registry.acquire(make_lease(retries=0), now=80) is False
+        assert registry.acquire(make_lease(retries=1), now=80) is True
+    
+    def test_attempts_of_one_task_hold_separate_leases(self, registry):
+        """Test two deliveries of one task do not share or release a lease."""
+        first = make_lease()
+        first.message_id = "message-1"
+        second = make_lease()
+        second.message_id = "message-2"
+        registry.acquire(first, now=0)
+        registry.acquire(second, now=50)
+        
+        registry.release(second.attempt_id)
+        
+        assert registry.get(first.attempt_id).message_id == "message-1"
+        assert registry.get(second.attempt_id) is None
+        assert registry.expired(now=70) == ["message-1:0"]
+    
+    def test_fence_written_during_acquire_wins(self, registry, monkeypatch):
+        """Test a reaper fencing the attempt mid-acquire stops the lease."""
+        lease = make_lease()
+        fence_key = registry._fence_key(lease.attempt_id)
+        pipeline = registry.redis_client.pipeline
+        
+        def racing_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            multi = pipe.multi
+            
+            def fence_then_multi():
+                # The reaper's claim lands between the check and the write
+                registry.redis_client.set(fence_key, 1)
+                multi()
+            
+            pipe.multi = fence_then_multi
+            return pipe
+        
+        monkeypatch.setattr(registry.redis_client, "pipeline", racing_pipeline)
+        
+        assert registry.acquire(lease, now=0) is False
+        assert registry.get(lease.attempt_id) is None
+    
+    def racing_claim(self, registry, monkeypatch, write):
+        """Claim an expired lease with ``write`` landing mid-claim, once."""
+        pipeline = registry.redis_client.pipeline
+        
+        def racing_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            multi = pipe.multi
+            
+            def write_then_multi():
+                monkeypatch.setattr(registry.redis_client, "pipeline", pipeline)
+                write()
+                multi()
+            
+            pipe.multi = write_then_multi
+            return pipe
+        
+        monkeypatch.setattr(registry.redis_client, "pipeline", racing_pipeline)
+        return registry.claim("task-1:0", now=100)
+    
+    def test_other_leases_do_not_abort_a_claim(self, registry, monkeypatch):
+        """Test a heartbeat for another attempt lets the claim through."""
+        registry.acquire(make_lease("task-1"), now=0)
+        registry.acquire(make_lease("task-2"), now=0)
+        
+        claimed = self.racing_claim(
+            registry, monkeypatch, lambda: registry.renew(["task-2:0"], now=100)
+        )
+        
+        assert claimed is not None
+        assert claimed[0].task_id == "task-1"
+    
+    def test_renewal_mid_claim_wins(self, registry, monkeypatch):
+        """Test a heartbeat renewing the claimed lease makes the claim back off."""
+        registry.acquire(make_lease("task-1"), now=0)
+        
+        claimed = self.racing_claim(
+            registry, monkeypatch, lambda: registry.renew(["task-1:0"], now=100)
+        )
+        
+        assert claimed is None
+        assert registry.get("task-1:0") is not None
+        assert registry.expired(now=100) == []
+
+
+class TestLeaseReaper:
+    """Test cases for reclaiming tasks with expired leases."""
+    
+    def make_reaper(self, redis_client, registry, max_retries=3):
+        self.requeued = []
+        self.dead_letter = DeadLetterQueue(redis_client)
+        self.stats = TaskStats(redis_client)
+        self.versions = ResourceVersions(redis_client)
+        engine = RetryPolicyEngine(default_policy=RetryPolicy(max_retries=max_retries))
+        return LeaseReaper(
+            registry,
+            engine,
+            lambda lease, decision: self.requeued.append(lease),
+            self.dead_letter,
+            stats=self.stats,
+            versions=self.versions,
+        )
+    
+    def test_requeues_retryable_task(self, redis_client, registry):
+        """Test a task with retries left is requeued."""
+        reaper = self.make_reaper(redis_client, registry)
+        registry.acquire(make_lease(), now=0)
+        
+        assert reaper.reap(now=70) == 1
+        assert [lease.task_id for lease in self.requeued] == ["task-1"]
+        assert self.dead_letter.size() == 0
+    
+    def test_dead_letters_exhausted_task(self, redis_client, registry):
+        """Test a task out of retries is dead-lettered."""
+        reaper = self.make_reaper(redis_client, registry, max_retries=1)
+        registry.acquire(make_lease(retries=1), now=0)
+        self.stats.transition("task-1", RUNNING, task_type="data_processing")
+        
+        reaper.reap(now=70)
+        
+        entry = self.dead_letter.get("task-1")
+        assert entry.reason == "max_retries_exceeded"
+        assert self.requeued == []
+        assert self.stats.snapshot()["by_status"] == {RUNNING: 0, FAILED: 1}
+        assert self.versions.get(task_resource("task-1")) is not None
+        assert self.versions.get(TASKS_RESOURCE) is not None
+    
+    def test_failed_requeue_is_retried(self, redis_client, registry):
+        """Test a lease is restored when publishing the requeue fails."""
+        reaper = self.make_reaper(redis_client, registry)
+        reaper.requeue = lambda lease, decision: 1 / 0
+        registry.acquire(make_lease(), now=0)
+        
+        reaper.reap(now=70)
+        
+        assert registry.expired(now=70) == ["task-1:0"]
+        assert registry.acquire(make_lease(), now=80) is True
+
+
+class TestLeaseKeeper:
+    """Test cases for the per-process heartbeat."""
+    
+    def test_heartbeat_renews_held_leases(self, registry):
+        """Test one heartbeat renews all leases and skips released ones."""
+        keeper = LeaseKeeper(registry, interval=3600)
+        keeper.acquire(make_lease("a"))
+        keeper.acquire(make_lease("b"))
+        keeper.release("b:0")
+        
+        keeper.heartbeat()
+        keeper.stop()
+        
+        assert registry.redis_client.zrange(LeaseRegistry.INDEX_KEY, 0, -1) == ["a:0"]
+        assert registry.expired() == []
@@ -0,0 +1,299 @@
+"""Unit tests for locality-aware routing."""
+
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from src.services.locality import (
+    LOCAL,
+    SHARED,
+    LocalityRouter,
+    WarmDataRegistry,
+    locality_keys,
+    publish_task,
+)
+from src.services.task_stats import PENDING, RUNNING, TaskStats
+from src.worker import stats_signals
+
+PARAMETERS = {"data_source": "/data/customers.csv", "batch_size": 100}
+DATA_KEY = "data_source=/data/customers.csv"
+
+
+@pytest.fixture
+def redis_client():
+    """In-memory Redis client."""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def registry(redis_client):
+    """Warm data registry with a 60 second TTL."""
+    return WarmDataRegistry(redis_client, ttl=60)
+
+
+@pytest.fixture
+def router(redis_client, registry):
+    """Router with a 5 second window and room for two waiting tasks per host."""
+    return LocalityRouter(
+        redis_client, registry, ["data_source", "model_path"], wait=5.0, max_backlog=2
+    )
+
+
+def make_message(task_id, queue="default"):
+    return {
+        "name": "src.worker.tasks.execute_task",
+        "args": [task_id, "data_processing", PARAMETERS],
+        "kwargs": None,
+        "queue": queue,
+        "headers": {"tenant": "data_team"},
+        "task_id": task_id,
+        "priority": None,
+    }
+
+
+def route_task(router, task_id, now=0):
+    route = router.route("default", PARAMETERS, {"tenant": "data_team"}, now=now)
+    router.dispatched(task_id, route, make_message(task_id), now=now)
+    return route
+
+
+class TestWarmDataRegistry:
+    """Test cases for advertising warm data keys."""
+    
+    def test_keys_from_configured_parameters(self):
+        """Test only non-empty string values of named parameters are keys."""
+        parameters = {"data_source": "s3://bucket/a", "model_path": "", "limit": 5}
+        
+        assert locality_keys(parameters, ["data_source", "model_path", "limit"]) == [
+            "data_source=s3://bucket/a"
+        ]
+    
+    def test_holders_expire_per_host(self, registry):
+        """Test a host's entry ages out without affecting other hosts."""
+        registry.advertise("host-a", ["data_source=x"], ["default"], now=0)
+        registry.advertise("host-b", ["data_source=x"], ["default"], now=30)
+        
+        assert registry.holders(["data_source=x"], "default", now=70) == {"host-b": 1}
+    
+    def test_holders_must_consume_the_queue(self, registry):
+        """Test hosts not serving the task's queue are not candidates."""
+        registry.advertise("host-a", ["data_source=x"], ["high_priority"], now=0)
+        
+        assert registry.holders(["data_source=x"], "default", now=1) == {}
+
+
+class TestLocalityRouter:
+    """Test cases for routing decisions and delay scheduling."""
+    
+    def test_routes_to_host_with_most_keys_warm(self, router, registry):
+        """Test the host holding more of the task's data is preferred."""
+        registry.advertise("host-a", [DATA_KEY], ["default"], now=0)
+        registry.advertise("host-b", [DATA_KEY, "model_path=m1"], ["default"], now=0)
+        
+        route = router.route(
+            "default",
+            {"data_source": "/data/customers.csv", "model_path": "m1"},
+            {"tenant": "data_team"},
+            now=1,
+        )
+        
+        assert route.decision == "local"
+        assert route.queue == "default@host-b"
+        token = route.headers.pop("locality_token")
+        assert token
+        assert route.headers == {
+            "tenant": "data_team",
+            "locality": LOCAL,
+            "locality_queue": "default",
+        }
+    
+    def test_shared_queue_without_holder(self, router):
+        """Test tasks with cold or no data keys use the shared queue."""
+        assert router.route("default", PARAMETERS, now=0).decision == "no_holder"
+        assert router.route("default", {"batch_size": 1}, now=0).decision == "no_key"
+        assert router.route("default", PARAMETERS, now=0).queue == "default"
+    
+    def test_busy_host_is_skipped(self, router, registry):
+        """Test a host with a full backlog does not get more tasks."""
+        registry.advertise("host-a", [DATA_KEY], ["default"], now=0)
+        route_task(router, "task-1")
+        route_task(router, "task-2")
+        
+        route = router.route("default", PARAMETERS, now=0)
+        
+        assert route.decision == "busy"
+        assert route.queue == "default"
+    
+    def test_local_copy_runs_once(self, router, registry):
+        """Test the host copy claims the task and redeliveries may run too."""
+        registry.advertise("host-a", [DATA_KEY], ["default"], now=0)
+        token = route_task(router, "task-1").headers["locality_token"]
+        
+        for _ in range(2):
+            claimed = router.claim(
+                "task-1", LOCAL, "default", "default@host-a", token=token
+            )
+            assert claimed is True
+        assert router.fallback(lambda message: None, now=10) == 0
+        backlog = router.redis_client.hget(LocalityRouter.BACKLOG_KEY, "default@host-a")
+        assert backlog == "0"
+    
+    def test_falls_back_after_window(self, router, registry):
+        """Test a task not taken in time moves to the shared queue."""
+        registry.advertise("host-a", [DATA_KEY], ["default"], now=0)
+        local_token = route_task(router, "task-1").headers["locality_token"]
+        republished = []
+        
+        assert router.fallback(republished.append, now=4) == 0
+        assert router.fallback(republished.append, now=6) == 1
+        
+        headers = republished[0]["headers"]
+        assert republished[0]["queue"] == "default"
+        assert headers["locality"] == SHARED
+        assert headers["locality_token"] != local_token
+        assert router.claim(
+            "task-1", SHARED, "default", token=headers["locality_token"]
+        )
+        assert not router.claim(
+            "task-1", LOCAL, "default", "default@host-a", token=local_token
+        )
+        assert router.route("default", PARAMETERS, now=6).decision == "local"
+    
+    def test_concurrent_scanners_republish_once(self, router, registry):
+        """Test a scanner running during another's republish skips the task."""
+        registry.advertise("host-a", [DATA_KEY], ["default"], now=0)
+        route_task(router, "task-1")
+        republished = []
+        
+        def republish(message):
+            # A second scanner passes while the first is publishing
+            router.fallback(republished.append, now=6)
+            republished.append(message)
+        
+        assert router.fallback(republish, now=6) == 1
+        
+        assert len(republished) == 1
+        backlog = router.redis_client.hget(LocalityRouter.BACKLOG_KEY, "default@host-a")
+        assert backlog == "0"
+    
+    def test_only_one_publication_claims(self, router):
+        """Test two shared publications of a task cannot both run it."""
+        assert router.claim("task-1", SHARED, "default", token="a") is True
+        assert router.claim("task-1", SHARED, "default", token="b") is False
+        assert router.claim("task-1", SHARED, "default", token="a") is True
+    
+    def test_failed_fallback_is_retried(self, router, registry):
+        """Test a task stays pending when republishing fails."""
+        registry.advertise("host-a", [DATA_KEY], ["default"], now=0)
+        route_task(router, "task-1")
+        
+        def fail(message):
+            raise ConnectionError("broker down")
+        
+        assert router.fallback(fail, now=6) == 0
+        assert router.fallback(lambda message: None, now=7) == 1
+        backlog = router.redis_client.hget(LocalityRouter.BACKLOG_KEY, "default@host-a")
+        assert backlog == "0"
+
+
+class TestPublishTask:
+    """Test cases for publishing through the router."""
+    
+    def test_publishes_to_host_queue_with_fallback_message(self, router, registry):
+        """Test a routed publish records the shared-queue message."""
+        registry.advertise("host-a", [DATA_KEY], ["default"])
+        sent = []
+        celery_app = SimpleNamespace(send_task=lambda **kwargs: sent.append(kwargs))
+        
+        publish_task(
+            celery_app,
+            router,
+            "src.worker.tasks.execute_task",
+            args=["task-1", "data_processing", PARAMETERS],
+            queue="default",
+            task_id="task-1",
+            producer="producer",
+        )
+        republished = []
+        router.fallback(republished.append, now=float("inf"))
+        
+        assert sent[0]["queue"] == "default@host-a"
+        assert sent[0]["producer"] == "producer"
+        assert republished[0]["queue"] == "default"
+        assert "producer" not in republished[0]
+    
+    def test_window_opens_before_the_send(self, router, registry, redis_client):
+        """Test a host copy consumed during the send finds its window open."""
+        registry.advertise("host-a", [DATA_KEY], ["default"])
+        pending_at_send = []
+        celery_app = SimpleNamespace(
+            send_task=lambda **kwargs: pending_at_send.append(
+                redis_client.zscore(LocalityRouter.PENDING_KEY, "task-1")
+            )
+        )
+        
+        publish_task(
+            celery_app,
+            router,
+            "src.worker.tasks.execute_task",
+            args=["task-1", "data_processing", PARAMETERS],
+            queue="default",
+        )
+        
+        assert pending_at_send[0] is not None
+    
+    def test_failed_send_closes_the_window(self, router, registry, redis_client):
+        """Test a task whose publish failed is neither pending nor backlogged."""
+        registry.advertise("host-a", [DATA_KEY], ["default"])
+        
+        def broker_down(**kwargs):
+            raise ConnectionError("broker unavailable")
+        
+        with pytest.raises(ConnectionError):
+            publish_task(
+                SimpleNamespace(send_task=broker_down),
+                router,
+                "src.worker.tasks.execute_task",
+                args=["task-1", "data_processing", PARAMETERS],
+                queue="default",
+            )
+        
+        assert router.fallback(lambda message: None, now=float("inf")) == 0
+        assert int(redis_client.hget(LocalityRouter.BACKLOG_KEY, "default@host-a")) == 0
+    
+    def test_fallback_copy_is_not_counted_again(self, redis_client, monkeypatch):
+        """Test a shared copy racing the host copy's start leaves it running."""
+        monkeypatch.setattr(stats_signals, "get_redis_client", lambda: redis_client)
+        stats = TaskStats(redis_client)
+        
+        def published(copy):
+            stats_signals.record_task_published(
+                sender="src.worker.tasks.execute_task",
+                body=(["task-1", "data_processing", PARAMETERS], {}, None),
+                routing_key="default",
+                headers={"locality": copy, "locality_queue": "default"},
+            )
+        
+        published(LOCAL)
+        stats.transition("task-1", RUNNING)
+        published(SHARED)
+        
+        snapshot = stats.snapshot()
+        assert snapshot["by_status"] == {PENDING: 0, RUNNING: 1}
+    
+    def test_publishes_unrouted_without_router(self):
+        """Test publishing is unchanged when locality routing is off."""
+        sent = []
+        celery_app = SimpleNamespace(send_task=lambda **kwargs: sent.append(kwargs))
+        
+        publish_task(
+            celery_app,
+            None,
+            "src.worker.tasks.execute_task",
+            args=["task-1", "data_processing", PARAMETERS],
+            queue="default",
+        )
+        
+        assert sent[0]["queue"] == "default"
+        assert sent[0]["name"] == "src.worker.tasks.execute_task"
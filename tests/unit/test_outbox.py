@@ -0,0 +1,183 @@
+"""Unit tests for the transactional outbox and its relay."""
+
+from datetime import timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.core.config import get_settings
+from src.models.base import Base
+from src.models.outbox import OutboxMessage
+from src.services.fair_scheduler import FairScheduler
+from src.services.outbox import (
+    OutboxRelay,
+    add_task_message,
+    make_fair_batch_publisher,
+)
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    """Session factory on an in-memory SQLite database."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    await engine.dispose()
+
+
+def make_task(priority="NORMAL", created_by="data_team"):
+    """Task-like object carrying the fields the outbox reads."""
+    return SimpleNamespace(
+        id=uuid4(),
+        task_type="data_processing",
+        parameters={"data_source": "/data/customers.csv"},
+        priority=SimpleNamespace(name=priority),
+        created_by=created_by
+    )
+
+
+async def stage(session_factory, *tasks):
+    """Commit outbox rows for tasks as task creation would."""
+    async with session_factory() as session:
+        async with session.begin():
+            for task in tasks:
+                add_task_message(session, task)
+
+
+async def all_messages(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(select(OutboxMessage).order_by(OutboxMessage.id))
+        return result.scalars().all()
+
+
+@pytest.mark.asyncio
+class TestOutbox:
+    """Test cases for staging and relaying outbox messages."""
+    
+    async def test_message_follows_task_priority(self, session_factory):
+        """Test high priority tasks are staged for the high priority queue."""
+        await stage(session_factory, make_task("URGENT"), make_task("NORMAL"))
+        
+        urgent, normal = await all_messages(session_factory)
+        
+        assert urgent.queue == "high_priority"
+        assert urgent.priority == 9
+        assert normal.priority == 3
+        assert urgent.task_name == "src.worker.tasks.execute_high_priority_task"
+        assert normal.queue == "default"
+        assert normal.headers == {"tenant": "data_team", "task_priority": "NORMAL"}
+    
+    async def test_message_queue_follows_routing(self, session_factory, monkeypatch):
+        """Test staged messages carry the queue the task type routes to."""
+        monkeypatch.setattr(get_settings(), "async_pool_task_types", ["http_call"])
+        task = make_task("URGENT")
+        task.task_type = "http_call"
+        await stage(session_factory, task)
+        
+        (message,) = await all_messages(session_factory)
+        
+        assert message.queue == "io"
+    
+    async def test_rolled_back_task_is_never_published(self, session_factory):
+        """Test a message is dropped when its transaction rolls back."""
+        async with session_factory() as session:
+            add_task_message(session, make_task())
+            await session.rollback()
+        
+        assert await all_messages(session_factory) == []
+    
+    async def test_relay_publishes_and_marks(self, session_factory):
+        """Test relayed messages are published once, in order."""
+        tasks = [make_task() for _ in range(3)]
+        await stage(session_factory, *tasks)
+        published = []
+        
+        def publish_batch(messages):
+            published.extend(message.task_id for message in messages)
+            return {message.id for message in messages}
+        
+        relay = OutboxRelay(session_factory, publish_batch, batch_size=2)
+        
+        assert await relay.relay_batch() == 2
+        assert await relay.relay_batch() == 1
+        assert await relay.relay_batch() == 0
+        assert published == [str(task.id) for task in tasks]
+        messages = await all_messages(session_factory)
+        assert all(message.published_at is not None for message in messages)
+    
+    async def test_failed_publish_is_retried(self, session_factory):
+        """Test messages whose publish failed stay pending with a backoff."""
+        await stage(session_factory, make_task())
+        relay = OutboxRelay(session_factory, lambda messages: set(), retry_backoff=60)
+        
+        assert await relay.relay_batch() == 1
+        
+        message, = await all_messages(session_factory)
+        assert message.published_at is None
+        assert message.dead_at is None
+        assert message.attempts == 1
+        assert message.next_attempt_at is not None
+        # Not claimed again until the backoff has passed
+        assert await relay.relay_batch() == 0
+    
+    async def test_backoff_is_exponential_and_capped(self, session_factory):
+        """Test the retry delay doubles per attempt up to its cap."""
+        relay = OutboxRelay(
+            session_factory,
+            lambda messages: set(),
+            retry_backoff=1,
+            retry_backoff_max=5,
+        )
+        
+        assert [relay.retry_delay(n) for n in range(1, 6)] == [1, 2, 4, 5, 5]
+    
+    async def test_exhausted_message_is_dead_lettered(self, session_factory):
+        """Test a message is marked dead after its last attempt."""
+        await stage(session_factory, make_task())
+        relay = OutboxRelay(
+            session_factory, lambda messages: set(), max_attempts=2, retry_backoff=0
+        )
+        
+        assert await relay.relay_batch() == 1
+        assert await relay.relay_batch() == 1
+        assert await relay.relay_batch() == 0
+        
+        message, = await all_messages(session_factory)
+        assert message.attempts == 2
+        assert message.dead_at is not None
+        assert message.published_at is None
+    
+    async def test_purge_published(self, session_factory):
+        """Test published rows past retention are deleted."""
+        await stage(session_factory, make_task())
+        relay = OutboxRelay(session_factory, lambda messages: {m.id for m in messages})
+        await relay.relay_batch()
+        
+        assert await relay.purge_published(timedelta(seconds=-1)) == 1
+        assert await all_messages(session_factory) == []
+    
+    async def test_relay_submits_to_tenant_sub_queues(self, session_factory):
+        """Test fair scheduling queues tasks per tenant instead of publishing."""
+        redis_client = fakeredis.FakeRedis(decode_responses=True)
+        await stage(
+            session_factory,
+            make_task(created_by="data_team"),
+            make_task(created_by=None),
+        )
+        relay = OutboxRelay(session_factory, make_fair_batch_publisher(redis_client))
+        
+        assert await relay.relay_batch() == 2
+        
+        scheduler = FairScheduler(redis_client, queue_name="default")
+        assert scheduler.depths() == {"data_team": 1, "default": 1}
+        messages = await all_messages(session_factory)
+        assert all(message.published_at is not None for message in messages)
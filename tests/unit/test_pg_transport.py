@@ -0,0 +1,317 @@
+"""Unit tests for the Postgres queue transport wiring and priorities."""
+
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from kombu import Connection
+
+from src.worker import pg_transport
+from src.worker.routing import priority_level
+
+
+class FakeDatabase:
+    """In-memory ``kombu_pgqueue`` executing the statements the channel sends.
+
+    Claims hide rows until their visibility deadline, as the
+    ``UPDATE ... FOR UPDATE SKIP LOCKED`` does, and ``pg_notify`` wakes
+    every listening connection through a pipe it can be selected on.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.next_id = 1
+        self.clock = 0.0
+        self.listeners = []
+    
+    def connect(self, dsn):
+        return FakeConnection(self)
+    
+    def execute(self, conn, sql, params):
+        with self.lock:
+            if sql == pg_transport.CLAIM_SQL:
+                return self._claim(**params)
+            if sql == pg_transport.SIZE_SQL:
+                (queue,) = params
+                return [(len(self._visible(queue)),)]
+            if sql.startswith("INSERT INTO kombu_pgqueue"):
+                queue, priority, payload, channel, notify_payload = params
+                self.rows[self.next_id] = {
+                    "queue": queue,
+                    "priority": priority,
+                    "payload": payload,
+                    "visible_at": self.clock,
+                    "deliveries": 0,
+                }
+                self.next_id += 1
+                self._notify(channel, notify_payload)
+                return []
+            if sql.startswith("DELETE FROM kombu_pgqueue WHERE id"):
+                for row_id in params[0]:
+                    self.rows.pop(row_id, None)
+                return []
+            if sql.startswith("UPDATE kombu_pgqueue SET visible_at = now()"):
+                for row_id in params[0]:
+                    self.rows[row_id]["visible_at"] = self.clock
+                return []
+            if sql.startswith("DELETE FROM kombu_pgqueue WHERE queue"):
+                purged = self._visible(params[0])
+                for row_id in purged:
+                    del self.rows[row_id]
+                return []
+            if sql.startswith("LISTEN"):
+                self.listeners.append(conn)
+                return []
+            raise AssertionError(f"unexpected statement: {sql}")
+    
+    def _visible(self, queue):
+        return [
+            row_id
+            for row_id, row in self.rows.items()
+            if row["queue"] == queue and row["visible_at"] <= self.clock
+        ]
+    
+    def _claim(self, queue, limit, visibility_timeout):
+        claimed = sorted(
+            self._visible(queue),
+            key=lambda row_id: (-self.rows[row_id]["priority"], row_id),
+        )[:limit]
+        for row_id in claimed:
+            self.rows[row_id]["visible_at"] = self.clock + visibility_timeout
+            self.rows[row_id]["deliveries"] += 1
+        # RETURNING order is unspecified; hand rows back reversed
+        return [
+            (row_id, self.rows[row_id]["priority"], self.rows[row_id]["payload"])
+            for row_id in reversed(claimed)
+        ]
+    
+    def _notify(self, channel, payload):
+        for conn in self.listeners:
+            conn.pending.append(SimpleNamespace(channel=channel, payload=payload))
+            os.write(conn.write_fd, b"x")
+
+
+class FakeConnection:
+    """psycopg2 connection stand-in bound to a ``FakeDatabase``."""
+    
+    def __init__(self, database):
+        self.database = database
+        self.read_fd, self.write_fd = os.pipe()
+        self.pending = []
+        self.notifies = []
+        self.result = None
+        self.commits = 0
+    
+    def cursor(self):
+        return self
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def execute(self, sql, params=None):
+        self.result = self.database.execute(self, sql, params)
+    
+    def fetchall(self):
+        return list(self.result)
+    
+    @property
+    def rowcount(self):
+        return len(self.result)
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        pass
+    
+    def set_isolation_level(self, level):
+        pass
+    
+    def fileno(self):
+        return self.read_fd
+    
+    def poll(self):
+        os.read(self.read_fd, 1024)
+        self.notifies.extend(self.pending)
+        self.pending.clear()
+    
+    def close(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Fake database every ``pgqueue://`` connection in the test talks to."""
+    database = FakeDatabase()
+    monkeypatch.setattr(pg_transport.psycopg2, "connect", database.connect)
+    pg_transport.register_transport()
+    return database
+
+
+def connect(**options):
+    return Connection("pgqueue://user:pass@db/taskdb", transport_options=options)
+
+
+def publish(connection, queue, body, priority=0):
+    with connection.SimpleQueue(queue) as simple_queue:
+        simple_queue.put(body, priority=priority)
+
+
+class TestBrokerUrl:
+    """Test cases for deriving the broker connection from the database URL."""
+    
+    def test_broker_url_reuses_database(self):
+        """Test the async driver suffix is dropped from the scheme."""
+        url = pg_transport.broker_url("postgresql+asyncpg://user:pass@db:5432/taskdb")
+        
+        assert url == "pgqueue://user:pass@db:5432/taskdb"
+    
+    def test_transport_dsn(self):
+        """Test the registered transport builds a libpq DSN from the URL."""
+        pg_transport.register_transport()
+        connection = Connection("pgqueue://user:pass@db:5433/taskdb")
+        
+        assert isinstance(connection.transport, pg_transport.Transport)
+        assert connection.transport.dsn == (
+            "host=db port=5433 user=user password=pass dbname=taskdb"
+        )
+
+
+class TestPriorityLevel:
+    """Test cases for mapping task priorities to message priorities."""
+    
+    def test_levels_follow_task_priority(self):
+        """Test higher task priorities map to higher message priorities."""
+        levels = [priority_level(SimpleNamespace(name=name))
+                  for name in ("LOW", "NORMAL", "HIGH", "URGENT")]
+        
+        assert levels == sorted(levels)
+        assert len(set(levels)) == 4
+    
+    def test_unknown_priority_is_normal(self):
+        """Test unrecognized priorities fall back to normal."""
+        assert priority_level("CRITICAL") == priority_level("NORMAL")
+
+
+class TestDelivery:
+    """Test cases for claiming, acking and redelivering queued messages."""
+    
+    def test_claims_highest_priority_first(self, database):
+        """Test a backlog is delivered by priority, then in publish order."""
+        with connect() as connection:
+            backlog = (("low", 0), ("urgent", 9), ("normal", 3), ("urgent-2", 9))
+            for body, priority in backlog:
+                publish(connection, "default", body, priority)
+            
+            with connection.SimpleQueue("default") as queue:
+                received = []
+                for _ in range(4):
+                    message = queue.get_nowait()
+                    received.append(message.payload)
+                    message.ack()
+        
+        assert received == ["urgent", "urgent-2", "normal", "low"]
+        assert database.rows == {}
+    
+    def test_concurrent_consumers_claim_disjoint_batches(self, database):
+        """Test claimed rows are skipped by other consumers' claims."""
+        with connect() as producer:
+            for index in range(4):
+                publish(producer, "default", index)
+        
+        with connect(batch_size=2) as first, connect(batch_size=2) as second:
+            one = first.SimpleQueue("default")
+            two = second.SimpleQueue("default")
+            received = [one.get_nowait().payload, two.get_nowait().payload]
+            received += [one.get_nowait().payload, two.get_nowait().payload]
+        
+        assert sorted(received) == [0, 1, 2, 3]
+        assert all(row["deliveries"] == 1 for row in database.rows.values())
+    
+    def test_unacked_message_redelivered_after_visibility_timeout(self, database):
+        """Test a message claimed by a dead worker comes back once it times out."""
+        with connect(visibility_timeout=60) as connection:
+            publish(connection, "default", "work")
+            with connection.SimpleQueue("default") as queue:
+                # The worker dies: nothing acks, restores or closes
+                queue.get_nowait()
+                
+                with connect() as other, other.SimpleQueue("default") as other_queue:
+                    with pytest.raises(other_queue.Empty):
+                        other_queue.get_nowait()
+                    database.clock += 61
+                    message = other_queue.get_nowait()
+        
+        assert message.payload == "work"
+        (row,) = database.rows.values()
+        assert row["deliveries"] == 2
+    
+    def test_unacked_messages_restored_on_close(self, database):
+        """Test closing a channel makes its unacked messages visible at once."""
+        with connect() as connection:
+            publish(connection, "default", "work")
+            channel = connection.channel()
+            with connection.SimpleQueue("default", channel=channel) as queue:
+                queue.get_nowait()
+            channel.close()
+            
+            with connection.SimpleQueue("default") as queue:
+                message = queue.get_nowait()
+        
+        assert message.payload == "work"
+    
+    def test_reject_with_requeue(self, database):
+        """Test a requeued message is delivered again and a dropped one deleted."""
+        with connect() as connection:
+            publish(connection, "default", "retry")
+            with connection.SimpleQueue("default") as queue:
+                queue.get_nowait().reject(requeue=True)
+                message = queue.get_nowait()
+                assert message.payload == "retry"
+                
+                message.reject(requeue=False)
+                
+                assert database.rows == {}
+    
+    def test_size_counts_visible_messages(self, database):
+        """Test claimed messages are not counted as waiting."""
+        with connect(batch_size=1) as connection:
+            publish(connection, "default", "first")
+            publish(connection, "default", "second")
+            with connection.SimpleQueue("default") as queue:
+                queue.get_nowait()
+                
+                assert queue.qsize() == 1
+
+
+class TestNotifyWakeup:
+    """Test cases for waking idle consumers with LISTEN/NOTIFY."""
+    
+    def test_idle_consumer_woken_by_publish(self, database):
+        """Test a blocked get returns on NOTIFY rather than the next poll."""
+        def publish_later():
+            time.sleep(0.2)
+            with connect() as producer:
+                publish(producer, "default", "wake")
+        
+        with connect() as connection, connection.SimpleQueue("default") as queue:
+            connection.transport.polling_interval = 30
+            publisher = threading.Thread(target=publish_later)
+            start = time.monotonic()
+            publisher.start()
+            message = queue.get(timeout=10)
+            elapsed = time.monotonic() - start
+            publisher.join()
+        
+        assert message.payload == "wake"
+        assert elapsed < 5
+        payload = json.loads(next(iter(database.rows.values()))["payload"])
+        assert payload["properties"]["priority"] == 0
@@ -0,0 +1,174 @@
+"""Unit tests for the task result cache."""
+
+import os
+
+import fakeredis
+import pytest
+
+from src.worker import tasks
+from src.worker.result_cache import (
+    MISS,
+    DiskLRUCache,
+    ResultCache,
+    SharedResultIndex,
+    cache_key,
+)
+
+
+@pytest.fixture
+def index():
+    """Shared result index on in-memory Redis."""
+    return SharedResultIndex(fakeredis.FakeRedis(decode_responses=True))
+
+
+class TestCacheKey:
+    """Test cases for cache key derivation."""
+    
+    def test_key_ignores_parameter_order(self):
+        """Test equal parameters in any order map to the same key."""
+        first = {"date_range": "last_7_days", "format": "pdf"}
+        second = {"format": "pdf", "date_range": "last_7_days"}
+        
+        assert cache_key("report_generation", first, "1") == cache_key(
+            "report_generation", second, "1"
+        )
+    
+    def test_key_depends_on_version_and_type(self):
+        """Test code version and task type are part of the key."""
+        parameters = {"data_source": "/data/customers.csv"}
+        key = cache_key("data_processing", parameters, "1")
+        
+        assert key != cache_key("data_processing", parameters, "2")
+        assert key != cache_key("report_generation", parameters, "1")
+
+
+class TestDiskLRUCache:
+    """Test cases for DiskLRUCache."""
+    
+    def test_put_and_get(self, tmp_path):
+        """Test stored payloads can be read back."""
+        cache = DiskLRUCache(str(tmp_path), max_bytes=1024)
+        cache.put("a", '{"rows": 1}')
+        
+        assert cache.get("a") == '{"rows": 1}'
+        assert cache.get("missing") is None
+    
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test the least recently used entry is evicted over budget."""
+        cache = DiskLRUCache(str(tmp_path), max_bytes=250)
+        cache.put("a", "x" * 100)
+        cache.put("b", "x" * 100)
+        os.utime(tmp_path / "a.json", (0, 0))
+        os.utime(tmp_path / "b.json", (1, 1))
+        cache.get("a")
+        
+        cache.put("c", "x" * 100)
+        
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+
+class TestResultCache:
+    """Test cases for ResultCache."""
+    
+    def test_local_hit(self, tmp_path, index):
+        """Test results are served from local disk after a put."""
+        cache = ResultCache(DiskLRUCache(str(tmp_path), 1024), index, node="worker-1")
+        cache.put("k", {"report": "ok"})
+        
+        assert cache.get("report_generation", "k") == ("hit_local", {"report": "ok"})
+    
+    def test_shared_hit_from_other_node(self, tmp_path, index):
+        """Test a small result computed on another node is served inline."""
+        other = ResultCache(
+            DiskLRUCache(str(tmp_path / "a"), 1024), index, node="worker-1"
+        )
+        local = ResultCache(
+            DiskLRUCache(str(tmp_path / "b"), 1024), index, node="worker-2"
+        )
+        other.put("k", [1, 2, 3])
+        
+        assert local.get("data_processing", "k") == ("hit_shared", [1, 2, 3])
+        assert local.get("data_processing", "k") == ("hit_local", [1, 2, 3])
+    
+    def test_large_remote_result_is_a_miss(self, tmp_path, index):
+        """Test results too large to inline are reported as remote misses."""
+        other = ResultCache(
+            DiskLRUCache(str(tmp_path / "a"), 1024),
+            index,
+            node="worker-1",
+            inline_max_bytes=4
+        )
+        local = ResultCache(
+            DiskLRUCache(str(tmp_path / "b"), 1024), index, node="worker-2"
+        )
+        other.put("k", "a large result")
+        
+        assert local.get("data_processing", "k") == ("miss_remote", MISS)
+    
+    def test_miss(self, tmp_path, index):
+        """Test unknown keys are misses."""
+        cache = ResultCache(DiskLRUCache(str(tmp_path), 1024), index, node="worker-1")
+        
+        assert cache.get("data_processing", "unknown") == ("miss", MISS)
+    
+    def test_failed_write_leaves_no_partial_file(self, tmp_path, monkeypatch):
+        """Test a write failing mid-way removes its temporary file."""
+        cache = DiskLRUCache(str(tmp_path), 1024)
+        
+        def disk_full(src, dst):
+            raise OSError(28, "No space left on device")
+        
+        monkeypatch.setattr(os, "replace", disk_full)
+        with pytest.raises(OSError):
+            cache.put("k", "payload")
+        
+        assert os.listdir(tmp_path) == []
+    
+    def test_cache_write_failure_does_not_fail_task(self, monkeypatch):
+        """Test a successful task survives its result failing to cache."""
+        class BrokenCache:
+            def put(self, key, result):
+                raise OSError(13, "Permission denied")
+        
+        monkeypatch.setattr(tasks, "get_result_cache", lambda: BrokenCache())
+        
+        tasks._cache_result("task-1", "k", {"report": "ok"})
+    
+    def test_shared_hit_without_local_copy(self, tmp_path, index, monkeypatch):
+        """Test a shared hit is returned even if it cannot be written to disk."""
+        other = ResultCache(
+            DiskLRUCache(str(tmp_path / "a"), 1024), index, node="worker-1"
+        )
+        local = ResultCache(
+            DiskLRUCache(str(tmp_path / "b"), 1024), index, node="worker-2"
+        )
+        other.put("k", [1, 2, 3])
+        
+        def read_only(key, payload):
+            raise PermissionError(13, "Permission denied")
+        
+        monkeypatch.setattr(local.local, "put", read_only)
+        
+        assert local.get("data_processing", "k") == ("hit_shared", [1, 2, 3])
+    
+    def test_unreadable_local_cache_is_a_miss(self, tmp_path, index, monkeypatch):
+        """Test a local read error falls through to the shared index."""
+        cache = ResultCache(DiskLRUCache(str(tmp_path), 1024), index, node="worker-1")
+        
+        def unreadable(key):
+            raise PermissionError(13, "Permission denied")
+        
+        monkeypatch.setattr(cache.local, "get", unreadable)
+        
+        assert cache.get("data_processing", "k") == ("miss", MISS)
+    
+    def test_cache_lookup_failure_is_a_miss(self, monkeypatch):
+        """Test a cache that cannot even be created does not fail the task."""
+        def unwritable_directory():
+            raise PermissionError(13, "Permission denied: '/tmp/task-result-cache'")
+        
+        monkeypatch.setattr(tasks, "get_result_cache", unwritable_directory)
+        
+        assert tasks._cached_result("task-1", "data_processing", "k") is MISS
@@ -0,0 +1,133 @@
+"""Unit tests for retry policies and the dead-letter queue."""
+
+import random
+
+import fakeredis
+import pytest
+
+from src.services.dead_letter import DeadLetterEntry, DeadLetterQueue
+from src.services.retry_policy import RetryBudget, RetryPolicy, RetryPolicyEngine
+
+
+@pytest.fixture
+def redis_client():
+    """In-memory Redis client."""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+class TestRetryPolicy:
+    """Test cases for RetryPolicy backoff."""
+    
+    def test_delay_bounds(self):
+        """Test delays stay between base delay and cap."""
+        policy = RetryPolicy(base_delay=1.0, max_delay=30.0)
+        rng = random.Random(42)
+        
+        delay = None
+        for _ in range(50):
+            delay = policy.next_delay(delay, rng=rng)
+            assert 1.0 <= delay <= 30.0
+    
+    def test_delays_are_decorrelated(self):
+        """Test tasks failing together get different delays."""
+        policy = RetryPolicy(base_delay=1.0, max_delay=300.0)
+        rng = random.Random(7)
+        
+        delays = {round(policy.next_delay(10.0, rng=rng), 6) for _ in range(20)}
+        assert len(delays) > 1
+
+
+class TestRetryPolicyEngine:
+    """Test cases for RetryPolicyEngine decisions."""
+    
+    def test_max_retries_exceeded(self):
+        """Test tasks are not retried past their policy's max retries."""
+        engine = RetryPolicyEngine()
+        engine.register("ml_training", RetryPolicy(max_retries=1))
+        
+        assert engine.decide("ml_training", retries=0).retry is True
+        
+        decision = engine.decide("ml_training", retries=1)
+        assert decision.retry is False
+        assert decision.reason == "max_retries_exceeded"
+    
+    def test_default_policy(self):
+        """Test unknown task types fall back to the default policy."""
+        engine = RetryPolicyEngine(default_policy=RetryPolicy(max_retries=5))
+        
+        assert engine.policy_for("unknown").max_retries == 5
+    
+    def test_budget_exhausted(self, redis_client):
+        """Test retries are refused once the budget is spent."""
+        budget = RetryBudget(redis_client, window=60, min_retries=2)
+        engine = RetryPolicyEngine(
+            budget=budget,
+            default_policy=RetryPolicy(max_retries=10, budget_ratio=0.1)
+        )
+        
+        for _ in range(10):
+            engine.record_attempt("data_processing")
+        
+        assert engine.decide("data_processing", retries=0).retry is True
+        assert engine.decide("data_processing", retries=0).retry is True
+        
+        decision = engine.decide("data_processing", retries=0)
+        assert decision.retry is False
+        assert decision.reason == "budget_exhausted"
+    
+    def test_budget_is_per_task_type(self, redis_client):
+        """Test one task type exhausting its budget does not affect others."""
+        budget = RetryBudget(redis_client, window=60, min_retries=1)
+        
+        assert budget.try_acquire("email_campaign", ratio=0.0) is True
+        assert budget.try_acquire("email_campaign", ratio=0.0) is False
+        assert budget.try_acquire("report_generation", ratio=0.0) is True
+
+
+class TestDeadLetterQueue:
+    """Test cases for DeadLetterQueue."""
+    
+    def test_push_and_list(self, redis_client):
+        """Test parked tasks can be listed globally and by task type."""
+        dlq = DeadLetterQueue(redis_client)
+        dlq.push(DeadLetterEntry(task_id="a", task_type="ml_training", failed_at=1.0))
+        dlq.push(
+            DeadLetterEntry(task_id="b", task_type="email_campaign", failed_at=2.0)
+        )
+        
+        assert dlq.size() == 2
+        assert [e.task_id for e in dlq.list()] == ["a", "b"]
+        assert [e.task_id for e in dlq.list(task_type="email_campaign")] == ["b"]
+    
+    def test_max_entries(self, redis_client):
+        """Test the oldest entries are dropped beyond max_entries."""
+        dlq = DeadLetterQueue(redis_client, max_entries=2)
+        for i in range(3):
+            dlq.push(DeadLetterEntry(task_id=str(i), task_type="test", failed_at=i))
+        
+        assert dlq.size() == 2
+        assert dlq.get("0") is None
+    
+    def test_redrive(self, redis_client):
+        """Test bulk re-drive publishes and removes entries."""
+        dlq = DeadLetterQueue(redis_client)
+        for i in range(3):
+            dlq.push(DeadLetterEntry(task_id=str(i), task_type="test", failed_at=i))
+        
+        published = []
+        redriven = dlq.redrive(published.append, task_ids=["0", "2"])
+        
+        assert redriven == ["0", "2"]
+        assert [e.task_id for e in published] == ["0", "2"]
+        assert [e.task_id for e in dlq.list()] == ["1"]
+    
+    def test_failed_redrive_keeps_entry(self, redis_client):
+        """Test entries whose publish fails stay in the queue."""
+        dlq = DeadLetterQueue(redis_client)
+        dlq.push(DeadLetterEntry(task_id="a", task_type="test"))
+        
+        def publish(entry):
+            raise ConnectionError("broker down")
+        
+        assert dlq.redrive(publish) == []
+        assert dlq.get("a") is not None
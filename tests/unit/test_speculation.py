@@ -0,0 +1,246 @@
+"""Unit tests for straggler detection and speculative races."""
+
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from celery.app.task import Context
+
+from src.services.leases import LeaseRegistry, TaskLease
+from src.services.speculation import (
+    PRIMARY,
+    SPECULATIVE,
+    SpeculationLedger,
+    StragglerDetector,
+    attempt_message_id,
+    speculative_task_id,
+)
+from src.services.task_stats import PENDING, RUNNING, SUCCESS, TaskStats
+from src.worker import tasks
+from src.worker.heartbeat import LeaseKeeper, report_progress
+
+
+@pytest.fixture
+def redis_client():
+    """In-memory Redis client."""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def registry(redis_client):
+    """Lease registry with a long lease, so none expire during a test."""
+    return LeaseRegistry(redis_client, ttl=3600)
+
+
+@pytest.fixture
+def ledger(redis_client):
+    """Speculation ledger."""
+    return SpeculationLedger(redis_client)
+
+
+@pytest.fixture
+def stats(redis_client):
+    """Task statistics holding 20 data_processing runs of about 20 seconds."""
+    stats = TaskStats(redis_client)
+    for index in range(20):
+        stats.transition(f"done-{index}", PENDING, task_type="data_processing", now=0)
+        stats.transition(f"done-{index}", RUNNING, now=0)
+        stats.transition(f"done-{index}", SUCCESS, now=20)
+    return stats
+
+
+def make_detector(registry, stats, ledger, **kwargs):
+    launched = []
+    detector = StragglerDetector(
+        registry,
+        stats,
+        ledger,
+        launched.append,
+        ["data_processing"],
+        **kwargs,
+    )
+    return detector, launched
+
+
+def start(registry, task_id, acquired_at, task_type="data_processing"):
+    registry.acquire(
+        TaskLease(task_id=task_id, task_type=task_type, acquired_at=acquired_at),
+        now=acquired_at,
+    )
+
+
+class TestSpeculationLedger:
+    """Test cases for launch records and race winners."""
+    
+    def test_copy_is_launched_once(self, ledger):
+        """Test a task gets at most one speculative copy."""
+        assert ledger.launch("task-1", now=0) is True
+        assert ledger.launch("task-1", now=1) is False
+        assert ledger.in_flight(now=1) == 1
+    
+    def test_first_finisher_wins(self, ledger):
+        """Test only the first attempt to finish wins the race."""
+        ledger.launch("task-1", now=10)
+        ledger.start("task-1", now=12)
+        
+        assert ledger.finish("task-1", SPECULATIVE) == (True, 10.0, 12.0)
+        assert ledger.finish("task-1", PRIMARY)[0] is False
+        assert ledger.winner("task-1") == SPECULATIVE
+        assert ledger.in_flight(now=20) == 0
+    
+    def test_finish_without_copy(self, ledger):
+        """Test an attempt finishing unraced still records the win."""
+        assert ledger.finish("task-1", PRIMARY) == (True, None, None)
+        assert ledger.launch("task-1", now=0) is True
+        assert ledger.winner("task-1") == PRIMARY
+    
+    def test_failed_launch_can_be_retried(self, ledger):
+        """Test cancelling with relaunch clears the launch record."""
+        ledger.launch("task-1", now=0)
+        ledger.cancel("task-1", relaunch=True)
+        
+        assert ledger.in_flight(now=0) == 0
+        assert ledger.launch("task-1", now=1) is True
+    
+    def test_undecided_copies_stop_counting_after_time_limit(self, redis_client):
+        """Test a race never settled frees its budget after the time limit."""
+        ledger = SpeculationLedger(redis_client, ttl=24 * 3600, active_ttl=1800)
+        ledger.launch("task-1", now=0)
+        
+        assert ledger.in_flight(now=1799) == 1
+        assert ledger.in_flight(now=1801) == 0
+        assert ledger.launch("task-1", now=1801) is False
+
+
+class TestStragglerDetector:
+    """Test cases for finding stragglers against the duration distribution."""
+    
+    def test_baseline_from_duration_histogram(self, registry, stats, ledger):
+        """Test the baseline is the percentile bucket bound of recent runs."""
+        detector, _ = make_detector(registry, stats, ledger)
+        
+        assert detector.baselines(now=100) == {"data_processing": 30.0}
+    
+    def test_too_few_samples_disable_speculation(self, registry, stats, ledger):
+        """Test task types with little history are not speculated."""
+        detector, _ = make_detector(registry, stats, ledger, min_samples=50)
+        
+        assert detector.baselines(now=100) == {}
+    
+    def test_elapsed_time_without_progress(self, registry, stats, ledger):
+        """Test a task is a straggler past the baseline times the multiplier."""
+        detector, _ = make_detector(registry, stats, ledger, multiplier=1.5)
+        
+        assert detector.is_straggler(44.0, None, baseline=30.0) is False
+        assert detector.is_straggler(46.0, None, baseline=30.0) is True
+    
+    def test_progress_rate_projects_remaining_time(self, registry, stats, ledger):
+        """Test progress reports allow early detection and avoid late copies."""
+        detector, _ = make_detector(registry, stats, ledger, multiplier=1.5)
+        
+        # 10% done after 10s: about 90s left, a fresh copy takes ~30s
+        assert detector.is_straggler(10.0, 0.1, baseline=30.0) is True
+        # Slow, but nearly done: a copy would not finish first
+        assert detector.is_straggler(60.0, 0.9, baseline=30.0) is False
+    
+    def test_scan_copies_stragglers_only(self, registry, stats, ledger):
+        """Test only slow attempts of speculative types are copied, once."""
+        detector, launched = make_detector(registry, stats, ledger)
+        start(registry, "slow", acquired_at=100)
+        start(registry, "fast", acquired_at=190)
+        start(registry, "other", acquired_at=100, task_type="report_generation")
+        
+        assert detector.scan(now=200) == 1
+        assert detector.scan(now=201) == 0
+        assert [lease.task_id for lease in launched] == ["slow"]
+    
+    def test_in_flight_budget(self, registry, stats, ledger):
+        """Test the oldest stragglers are copied first, within the budget."""
+        detector, launched = make_detector(registry, stats, ledger, max_in_flight=2)
+        for index in range(4):
+            start(registry, f"task-{index}", acquired_at=100 + index)
+        
+        assert detector.scan(now=200) == 2
+        assert detector.scan(now=201) == 0
+        assert [lease.task_id for lease in launched] == ["task-0", "task-1"]
+    
+    def test_reported_progress_is_used(self, registry, stats, ledger):
+        """Test a straggler making good progress is left alone."""
+        detector, launched = make_detector(registry, stats, ledger)
+        start(registry, "nearly-done", acquired_at=100)
+        registry.renew(["nearly-done:0"], now=190, progress={"nearly-done:0": 0.95})
+        
+        assert detector.scan(now=200) == 0
+
+
+class TestProgressReporting:
+    """Test cases for handler progress reports sent with heartbeats."""
+    
+    def test_progress_is_sent_with_heartbeat(self, registry):
+        """Test the latest report of a running task reaches Redis."""
+        keeper = LeaseKeeper(registry, interval=3600)
+        lease = TaskLease(task_id="task-1", task_type="data_processing")
+        keeper.acquire(lease)
+        keeper.report_progress(lease.attempt_id, 0.25)
+        keeper.report_progress(lease.attempt_id, 0.5)
+        keeper.report_progress("unknown", 0.5)
+        
+        keeper.heartbeat()
+        keeper.stop()
+        
+        assert registry.progress([lease.attempt_id, "unknown"]) == {"task-1:0": 0.5}
+    
+    def test_reports_outside_a_task_are_ignored(self):
+        """Test report_progress is a no-op when no task is running."""
+        report_progress(0.5)
+
+
+class TestRaceSettlement:
+    """Test cases for stopping the losing attempt of a race."""
+    
+    @pytest.fixture
+    def revoked(self, monkeypatch, registry, ledger):
+        revoked = []
+        monkeypatch.setattr(tasks, "get_speculation_ledger", lambda: ledger)
+        monkeypatch.setattr(
+            tasks, "get_lease_keeper", lambda: SimpleNamespace(registry=registry)
+        )
+        monkeypatch.setattr(tasks, "_revoke_attempt", revoked.append)
+        return revoked
+    
+    def test_attempt_ids_are_distinct_from_the_task_id(self):
+        """Test attempts never share the id clients poll the task under."""
+        assert attempt_message_id("task-1") != "task-1"
+        assert attempt_message_id("task-1") != attempt_message_id("task-1")
+        assert attempt_message_id("task-1", "7") == attempt_message_id("task-1", "7")
+    
+    def test_primary_revokes_its_own_copy(self, revoked, ledger):
+        """Test a winning original revokes the copy launched from it."""
+        ledger.launch("task-1", now=0)
+        request = Context(id="task-1.a1")
+        
+        tasks._finish_race(
+            SimpleNamespace(request=request), "task-1", "report", PRIMARY, 1
+        )
+        
+        assert revoked == [speculative_task_id("task-1.a1")]
+    
+    def test_copy_revokes_the_original_attempt(self, revoked, ledger, registry):
+        """Test a winning copy revokes the original's message, not the task."""
+        original = TaskLease(
+            task_id="task-1", task_type="report", message_id="task-1.a1"
+        )
+        registry.acquire(original, now=0)
+        ledger.launch("task-1", now=0)
+        request = Context(
+            id=speculative_task_id("task-1.a1"),
+            speculative_of="task-1.a1",
+            speculative_lease=original.attempt_id,
+        )
+        
+        tasks._finish_race(
+            SimpleNamespace(request=request), "task-1", "report", SPECULATIVE, 1
+        )
+        
+        assert revoked == ["task-1.a1"]
+        assert registry.get(original.attempt_id) is None
@@ -0,0 +1,245 @@
+"""Unit tests for incrementally maintained task statistics."""
+
+import fakeredis
+import pytest
+
+from src.services.resource_versions import TASKS_RESOURCE, ResourceVersions
+from src.services.task_stats import FAILED, PENDING, RUNNING, SUCCESS, TaskStats
+
+
+@pytest.fixture
+def redis_client():
+    """In-memory Redis client."""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def stats(redis_client):
+    """Task statistics with five minute buckets."""
+    return TaskStats(redis_client, bucket_seconds=300)
+
+
+def publish(stats, task_id, task_type="data_processing", tenant="data_team", now=0):
+    stats.transition(
+        task_id,
+        PENDING,
+        task_type=task_type,
+        queue="default",
+        priority="NORMAL",
+        tenant=tenant,
+        now=now,
+    )
+
+
+class TestTransitions:
+    """Test cases for counters updated on status transitions."""
+    
+    def test_pending_task_is_counted_in_its_queue(self, stats):
+        """Test publication counts the task by status, type and queue."""
+        publish(stats, "a")
+        publish(stats, "b")
+        
+        snapshot = stats.snapshot(now=0)
+        
+        assert snapshot["by_status"] == {PENDING: 2}
+        assert snapshot["by_task_type"] == {"data_processing": {PENDING: 2}}
+        assert snapshot["by_priority"] == {"NORMAL": {PENDING: 2}}
+        assert snapshot["queue_depths"] == {"default": 2}
+    
+    def test_running_leaves_the_queue(self, stats):
+        """Test a started task moves between status counters."""
+        publish(stats, "a")
+        stats.transition("a", RUNNING, now=1)
+        
+        snapshot = stats.snapshot(now=1)
+        
+        assert snapshot["by_status"] == {PENDING: 0, RUNNING: 1}
+        assert snapshot["queue_depths"] == {"default": 0}
+    
+    def test_finished_task_moves_to_totals(self, stats, redis_client):
+        """Test a terminal transition stops tracking the task."""
+        publish(stats, "a")
+        stats.transition("a", RUNNING, now=1)
+        stats.transition("a", SUCCESS, now=2)
+        
+        snapshot = stats.snapshot(now=2)
+        
+        assert snapshot["by_status"][SUCCESS] == 1
+        assert snapshot["by_status"][RUNNING] == 0
+        assert snapshot["by_task_type"]["data_processing"][SUCCESS] == 1
+        assert redis_client.hlen(TaskStats.STATE_KEY) == 0
+    
+    def test_retry_is_not_double_counted(self, stats):
+        """Test a republished task replaces its previous state."""
+        publish(stats, "a")
+        stats.transition("a", RUNNING, now=1)
+        publish(stats, "a", now=2)
+        
+        assert stats.snapshot(now=2)["by_status"] == {PENDING: 1, RUNNING: 0}
+
+
+class TestWindowedStatistics:
+    """Test cases for outcome rates and durations from time buckets."""
+    
+    def test_success_rate_by_tenant(self, stats):
+        """Test success rates are computed per tenant."""
+        for index, outcome in enumerate([SUCCESS, SUCCESS, SUCCESS, FAILED]):
+            publish(stats, f"t{index}", tenant="data_team")
+            stats.transition(f"t{index}", outcome, now=10)
+        publish(stats, "other", tenant="ml_team")
+        stats.transition("other", FAILED, now=10)
+        
+        rates = stats.snapshot(now=10)["success_rate_by_tenant"]
+        
+        assert rates == {"data_team": 0.75, "ml_team": 0.0}
+    
+    def test_p95_duration_by_task_type(self, stats):
+        """Test the p95 comes from the duration histogram of run times."""
+        for index in range(20):
+            publish(stats, f"t{index}")
+            stats.transition(f"t{index}", RUNNING, now=100)
+            duration = 40.0 if index == 19 else 0.3
+            stats.transition(f"t{index}", SUCCESS, now=100 + duration)
+        
+        p95 = stats.snapshot(now=200)["duration_p95_by_task_type"]
+        
+        assert p95 == {"data_processing": 0.5}
+    
+    def test_outcomes_outside_the_window_are_excluded(self, stats):
+        """Test only buckets inside the window contribute."""
+        publish(stats, "old")
+        stats.transition("old", FAILED, now=0)
+        publish(stats, "new")
+        stats.transition("new", SUCCESS, now=7200)
+        
+        snapshot = stats.snapshot(window=3600, now=7200)
+        
+        assert snapshot["success_rate_by_tenant"] == {"data_team": 1.0}
+
+
+class TestAtomicTransitions:
+    """Test cases for transitions racing on the same task."""
+    
+    def test_concurrent_transition_is_retried(self, stats, redis_client, monkeypatch):
+        """Test a transition landing mid-update is re-read, not overwritten."""
+        publish(stats, "a")
+        pipeline = redis_client.pipeline
+        raced = []
+        
+        def racing_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            multi = pipe.multi
+            
+            def transition_then_multi():
+                if not raced:
+                    # A worker starts the task between our read and write
+                    raced.append(True)
+                    stats.transition("a", RUNNING, now=1)
+                multi()
+            
+            pipe.multi = transition_then_multi
+            return pipe
+        
+        monkeypatch.setattr(redis_client, "pipeline", racing_pipeline)
+        stats.transition("a", SUCCESS, now=2)
+        monkeypatch.undo()
+        
+        snapshot = stats.snapshot(now=2)
+        assert snapshot["by_status"] == {PENDING: 0, RUNNING: 0, SUCCESS: 1}
+        assert snapshot["duration_p95_by_task_type"] == {"data_processing": 1.0}
+        assert redis_client.hlen(TaskStats.STATE_KEY) == 0
+
+
+class TestReconcile:
+    """Test cases for repairing counter drift."""
+    
+    def test_drift_is_corrected(self, stats, redis_client):
+        """Test counters are brought back to the tracked task states."""
+        publish(stats, "a")
+        publish(stats, "b")
+        redis_client.hincrby(TaskStats.CURRENT_KEY, "status:PENDING", 5)
+        redis_client.hincrby(TaskStats.CURRENT_KEY, "queue:stale", 3)
+        
+        assert stats.reconcile(now=1) == 2
+        snapshot = stats.snapshot(now=0)
+        assert snapshot["by_status"] == {PENDING: 2}
+        assert snapshot["queue_depths"] == {"default": 2, "stale": 0}
+    
+    def test_corrections_invalidate_cached_stats(self, redis_client):
+        """Test a pass that changes counters touches the task collections."""
+        versions = ResourceVersions(redis_client)
+        stats = TaskStats(redis_client, versions=versions)
+        publish(stats, "a")
+        
+        stats.reconcile(now=1)
+        assert versions.get(TASKS_RESOURCE) is None
+        
+        redis_client.hincrby(TaskStats.CURRENT_KEY, "status:PENDING", 5)
+        stats.reconcile(now=2)
+        assert versions.get(TASKS_RESOURCE) == "2:tasks"
+    
+    def test_concurrent_transition_does_not_abort(
+        self, stats, redis_client, monkeypatch
+    ):
+        """Test a transition landing mid-pass neither aborts nor is lost."""
+        publish(stats, "a")
+        redis_client.hincrby(TaskStats.CURRENT_KEY, "status:PENDING", 100)
+        pipeline = redis_client.pipeline
+        
+        def racing_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+            
+            def execute_then_publish():
+                result = execute()
+                # An unrelated task is published right after the snapshot
+                monkeypatch.setattr(redis_client, "pipeline", pipeline)
+                publish(stats, "b")
+                return result
+            
+            pipe.execute = execute_then_publish
+            return pipe
+        
+        monkeypatch.setattr(redis_client, "pipeline", racing_pipeline)
+        assert stats.reconcile(now=1) == 1
+        
+        snapshot = stats.snapshot(now=1)
+        assert snapshot["by_status"] == {PENDING: 2}
+        assert snapshot["queue_depths"] == {"default": 2}
+    
+    def test_consistent_counters_are_left_alone(self, stats):
+        """Test no corrections are made when nothing drifted."""
+        publish(stats, "a")
+        stats.transition("a", RUNNING, now=1)
+        
+        assert stats.reconcile(now=1) == 0
+    
+    def test_stale_tasks_are_expired(self, redis_client):
+        """Test tasks whose final transition never came stop being counted."""
+        stats = TaskStats(redis_client, stale_after=3600)
+        publish(stats, "lost", now=0)
+        publish(stats, "queued", now=3000)
+        
+        # Its status, type, priority and queue counters all drop by one
+        assert stats.reconcile(now=4000) == 4
+        
+        snapshot = stats.snapshot(now=4000)
+        assert snapshot["by_status"] == {PENDING: 1}
+        assert snapshot["queue_depths"] == {"default": 1}
+        assert list(redis_client.hkeys(TaskStats.STATE_KEY)) == ["queued"]
+    
+    def test_stale_task_that_moved_on_is_kept(self, redis_client, monkeypatch):
+        """Test a task transitioning after it was found stale is not expired."""
+        stats = TaskStats(redis_client, stale_after=3600)
+        publish(stats, "slow", now=0)
+        untrack = stats._untrack
+        
+        def start_then_untrack(task_id, since=None):
+            # The task finally starts between the snapshot and its expiry
+            stats.transition(task_id, RUNNING, now=4000)
+            return untrack(task_id, since=since)
+        
+        monkeypatch.setattr(stats, "_untrack", start_then_untrack)
+        assert stats.reconcile(now=4000) == 0
+        
+        assert stats.snapshot(now=4000)["by_status"] == {PENDING: 0, RUNNING: 1}
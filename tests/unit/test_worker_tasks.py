@@ -0,0 +1,143 @@
+"""Unit tests for running tasks through the worker's execute task."""
+
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+import redis
+from celery.app.task import Context
+
+from src.core.config import get_settings
+from src.core.exceptions import TaskValidationError
+from src.services.dead_letter import DeadLetterQueue
+from src.services.fair_scheduler import create_tenant_limiter
+from src.services.speculation import SpeculationLedger
+from src.services.leases import LeaseRegistry
+from src.services.retry_policy import RetryPolicy
+from src.worker import stats_signals, tasks
+from src.worker.handlers import register_handler
+from src.worker.heartbeat import LeaseKeeper
+
+
+@register_handler("test_echo")
+def echo(parameters):
+    return parameters
+
+
+@register_handler("test_broken", retry_policy=RetryPolicy(max_retries=0))
+def broken(parameters):
+    raise RuntimeError("handler failed")
+
+
+@pytest.fixture
+def redis_client():
+    """In-memory Redis client."""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def keeper(redis_client):
+    """Lease keeper that never heartbeats during a test."""
+    keeper = LeaseKeeper(LeaseRegistry(redis_client), interval=3600)
+    yield keeper
+    keeper.stop()
+
+
+@pytest.fixture(autouse=True)
+def worker(monkeypatch, redis_client, keeper, tmp_path):
+    """Worker process state backed by the in-memory Redis."""
+    monkeypatch.setattr(tasks, "get_redis_client", lambda: redis_client)
+    monkeypatch.setattr(stats_signals, "get_redis_client", lambda: redis_client)
+    monkeypatch.setattr(tasks, "get_lease_keeper", lambda: keeper)
+    monkeypatch.setattr(tasks, "get_locality_router", lambda: None)
+    monkeypatch.setattr(tasks, "_retry_engine", None)
+    monkeypatch.setattr(tasks, "_result_cache", None)
+    monkeypatch.setattr(get_settings(), "result_cache_dir", str(tmp_path / "cache"))
+
+
+def run(task_type, parameters=None, task_id="task-1"):
+    return tasks.execute_task.apply(
+        args=[task_id, task_type, parameters or {}], task_id=task_id
+    )
+
+
+class TestExecuteTask:
+    """Test cases for a task's bookkeeping around its handler."""
+    
+    def test_statistics_outage_does_not_strand_the_lease(
+        self, monkeypatch, keeper, redis_client
+    ):
+        """Test a Redis error recording RUNNING neither fails nor leaks the task."""
+        def unavailable(redis_client):
+            raise redis.ConnectionError("stats unavailable")
+        
+        monkeypatch.setattr(tasks, "create_task_stats", unavailable)
+        
+        result = run("test_echo", {"n": 1})
+        
+        assert result.successful()
+        assert result.result == {"n": 1}
+        assert not keeper._attempt_ids
+        assert not redis_client.zcard(LeaseRegistry.INDEX_KEY)
+    
+    def test_terminal_failure_is_dead_lettered(self, redis_client):
+        """Test a handler failing past its policy parks the task."""
+        result = run("test_broken")
+        
+        assert result.failed()
+        entries = DeadLetterQueue(redis_client).list()
+        assert [entry.task_id for entry in entries] == ["task-1"]
+    
+    def test_unknown_task_type_is_dead_lettered(self, redis_client):
+        """Test a task no handler is registered for is parked and its slot freed."""
+        limiter = create_tenant_limiter(redis_client)
+        limiter.acquire("data_team", "task-1")
+        celery_task = SimpleNamespace(
+            name=tasks.execute_task.name,
+            request=Context(id="task-1", tenant="data_team"),
+        )
+        
+        with pytest.raises(TaskValidationError):
+            tasks._run_handler(celery_task, "task-1", "test_unregistered", {}, None)
+        
+        entries = DeadLetterQueue(redis_client).list()
+        assert [(entry.task_id, entry.reason) for entry in entries] == [
+            ("task-1", "no_handler")
+        ]
+        assert limiter.in_flight("data_team") == 0
+    
+    def test_dead_lettered_task_cancels_its_race(self, monkeypatch, redis_client):
+        """Test a primary failing for good frees its copy's speculation budget."""
+        monkeypatch.setattr(get_settings(), "speculation_task_types", ["test_broken"])
+        ledger = SpeculationLedger(redis_client)
+        ledger.launch("task-1")
+        
+        assert run("test_broken").failed()
+        
+        assert ledger.in_flight() == 0
+        assert ledger.launch("task-1") is False
+
+
+class TestHandlerModules:
+    """Test cases for loading handlers outside the worker."""
+    
+    def test_retry_engine_applies_policies_of_configured_modules(
+        self, monkeypatch, tmp_path
+    ):
+        """Test a process without handlers imported, like the reaper, sees them."""
+        (tmp_path / "reaper_handlers.py").write_text(
+            "from src.services.retry_policy import RetryPolicy\n"
+            "from src.worker.handlers import register_handler\n"
+            "\n"
+            "\n"
+            "@register_handler('test_once', retry_policy=RetryPolicy(max_retries=0))\n"
+            "def once(parameters):\n"
+            "    return parameters\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(get_settings(), "task_handler_modules", ["reaper_handlers"])
+        
+        decision = tasks.get_retry_engine().decide("test_once", 0)
+        
+        assert not decision.retry
+        assert decision.reason == "max_retries_exceeded"